@@ -3,26 +3,36 @@ import platform
 import shutil
 import subprocess
 import sys
+import threading
 import traceback
-import json
+
+# 명령줄 모드 (예: python ImageToWebp.py convert a.png -q 80) - PyQt5를 불러오지 않고 바로 실행
+if __name__ == "__main__" and len(sys.argv) > 1:
+    import cli
+
+    if sys.argv[1] in cli.COMMANDS:
+        sys.exit(cli.main(sys.argv[1:]))
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QColor, QPalette, QFont, QIcon, QPixmap, QLinearGradient, QPainter, QPen, QBrush
 from PyQt5.QtCore import Qt, QSize, QRect, QPoint
 
-# 설정 파일 경로 (실행 파일과 같은 디렉토리에 저장)
-SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.json')
+from converter import (DEFAULT_LOSSLESS_LEVEL, DEFAULT_MAX_ATTEMPTS, ConversionEngine, default_workers, is_image_file,
+                       load_settings, save_settings, source_name)
+from encoders import DEFAULT_PROFILE, PROFILES, available_encoders, load_profile_summary
+from journal import DONE, FAILED, BatchJournal
+from manifest import ConversionManifest, DEFAULT_MAX_ENTRIES
+from classify import available as classify_available
+from metrics import DEFAULT_FLOORS, available as metrics_available
+from progress import ProgressTracker, format_bytes
+from report import failed_results, report_summary, write_report
+from walker import FileWalker, is_archive
 
 # 이미지파일 경로 설정
 icon_path = os.path.join(os.path.dirname(__file__), 'icon.ico')
 
 
-def is_macos():
-    system_info = platform.system()
-    return system_info == "Darwin"
-
-
 # OS에 따라 폴더 열기 명령 실행
 def open_folder(folder_path):
     if folder_path:
@@ -47,14 +57,6 @@ def open_folder(folder_path):
             print(f"폴더 열기 오류: {str(e)}")
 
 
-# exe 파일에서 실행될 경우의 상대경로로 설정
-if (is_macos()):
-    print('이 운영체제는 맥입니다.')
-    cwebp_path = os.path.join(os.path.dirname(__file__), 'cwebp')
-else:
-    print('이 운영체제는 윈도우입니다.')
-    cwebp_path = os.path.join(os.path.dirname(__file__), 'cwebp.exe')
-
 # 색상 상수 - 제공된 디자인 팔레트 기반
 ROYAL_BLUE = "#4136C3"  # 액센트 컬러 - 01
 DEEP_INDIGO = "#3E31B3"  # 보조 컬러 - 01
@@ -68,39 +70,16 @@ LIGHT_GRAY = "#F0F0F0"  # 밝은 회색 (텍스트용)
 WHITE = "#FFFFFF"  # 흰색
 BLACK = "#000000"  # 검정색
 
+# 설정 창에 표시할 프로필 이름
+PROFILE_NAMES = {
+    "fastest": "가장 빠름",
+    "balanced": "균형",
+    "smallest": "가장 작음",
+    "quality": "화질 우선 (느림)"
+}
 
-# 설정 파일 로드 함수
-def load_settings():
-    try:
-        if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # 기본 설정 반환
-            return {
-                "quality": 75,
-                "save_location_type": "subfolder",
-                "save_location_path": "변환된 이미지"
-            }
-    except Exception as e:
-        print(f"설정 로드 오류: {str(e)}")
-        # 오류 발생 시 기본 설정 반환
-        return {
-            "quality": 75,
-            "save_location_type": "subfolder",
-            "save_location_path": "변환된 이미지"
-        }
-
-
-# 설정 파일 저장 함수
-def save_settings(settings):
-    try:
-        with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(settings, f, ensure_ascii=False, indent=4)
-        return True
-    except Exception as e:
-        print(f"설정 저장 오류: {str(e)}")
-        return False
+# 프로그레스바 최댓값 (천분율 - 바이트 수는 QProgressBar 의 int 범위를 넘을 수 있으므로 진행률로 표시)
+PROGRESS_SCALE = 1000
 
 
 # 클릭 가능한 레이블 클래스
@@ -118,7 +97,15 @@ class ClickableLabel(QtWidgets.QLabel):
 
 class SettingsDialog(QtWidgets.QDialog):
     def __init__(self, parent=None, current_quality=75, current_location_type="subfolder",
-                 current_location_path="변환된 이미지"):
+                 current_location_path="변환된 이미지", current_workers=0, current_use_cache=True,
+                 current_dedupe=True, current_include="", current_exclude="", current_scan_archives=False,
+                 current_gif_mode="lossy", current_gif_kmax=0, current_gif_min_size=False,
+                 current_encoder="cwebp", current_quality_mode="fixed", current_target_size_kb=100,
+                 current_max_attempts=DEFAULT_MAX_ATTEMPTS, current_perceptual_metric="ssim",
+                 current_perceptual_floor=DEFAULT_FLOORS["ssim"], current_max_width=0, current_max_height=0,
+                 current_max_megapixels=0.0, current_variants="", current_order="input",
+                 current_lossless_mode="off", current_lossless_level=DEFAULT_LOSSLESS_LEVEL,
+                 current_profile=DEFAULT_PROFILE, current_collision_policy="suffix", current_metadata="none"):
         super().__init__(parent)
         self.setWindowTitle("설정")
         self.resize(400, 0)
@@ -257,8 +244,507 @@ class SettingsDialog(QtWidgets.QDialog):
         # Connect slider to update label
         self.qualitySlider.valueChanged.connect(self.updateQualityLabel)
 
+        # 목표 용량 모드 - 파일마다 목표 용량 이하가 되는 가장 높은 품질을 찾음 (슬라이더 값에서 탐색 시작)
+        # 화질 기준 모드 - 파일마다 SSIM/PSNR 이 기준 이상인 가장 낮은 품질을 찾음 (NumPy, Pillow 필요)
+        qualityModeLayout = QtWidgets.QFormLayout()
+
+        self.qualityModeCombo = QtWidgets.QComboBox()
+        self.qualityModeCombo.addItem("고정 품질", "fixed")
+        self.qualityModeCombo.addItem("목표 용량에 맞춤", "target_size")
+        self.qualityModeCombo.addItem("화질 기준에 맞춤 (SSIM/PSNR)", "perceptual")
+        if not metrics_available():
+            self.qualityModeCombo.model().item(2).setEnabled(False)
+        self.qualityModeCombo.setCurrentIndex(max(self.qualityModeCombo.findData(current_quality_mode), 0))
+
+        self.targetSizeSpinBox = QtWidgets.QSpinBox()
+        self.targetSizeSpinBox.setMinimum(1)
+        self.targetSizeSpinBox.setMaximum(100000)
+        self.targetSizeSpinBox.setSuffix(" KB")
+        self.targetSizeSpinBox.setValue(current_target_size_kb)
+
+        self.maxAttemptsSpinBox = QtWidgets.QSpinBox()
+        self.maxAttemptsSpinBox.setMinimum(1)
+        self.maxAttemptsSpinBox.setMaximum(20)
+        self.maxAttemptsSpinBox.setSuffix("회")
+        self.maxAttemptsSpinBox.setValue(current_max_attempts)
+
+        self.metricCombo = QtWidgets.QComboBox()
+        self.metricCombo.addItem("SSIM", "ssim")
+        self.metricCombo.addItem("PSNR (dB)", "psnr")
+        self.metricCombo.setCurrentIndex(max(self.metricCombo.findData(current_perceptual_metric), 0))
+
+        self.floorSpinBox = QtWidgets.QDoubleSpinBox()
+        self.updateFloorRange()
+        self.floorSpinBox.setValue(current_perceptual_floor)
+
+        # 무손실 자동 선택 - 로고, 스크린샷 같은 그래픽 PNG/GIF 는 무손실로 변환 (고정 품질에서만, NumPy, Pillow 필요)
+        self.losslessCombo = QtWidgets.QComboBox()
+        self.losslessCombo.addItem("사용 안 함", "off")
+        self.losslessCombo.addItem("그래픽은 무손실", "auto")
+        self.losslessCombo.addItem("그래픽은 무손실/손실 중 작은 쪽", "smallest")
+        if not classify_available():
+            self.losslessCombo.model().item(1).setEnabled(False)
+            self.losslessCombo.model().item(2).setEnabled(False)
+        self.losslessCombo.setCurrentIndex(max(self.losslessCombo.findData(current_lossless_mode), 0))
+
+        self.losslessLevelSpinBox = QtWidgets.QSpinBox()
+        self.losslessLevelSpinBox.setRange(0, 9)
+        self.losslessLevelSpinBox.setValue(current_lossless_level)
+
+        for widget in (self.qualityModeCombo, self.targetSizeSpinBox, self.maxAttemptsSpinBox, self.metricCombo,
+                       self.floorSpinBox, self.losslessCombo, self.losslessLevelSpinBox):
+            widget.setStyleSheet(f"""
+                background-color: {MEDIUM_GRAY};
+                color: {WHITE};
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 4px;
+                padding: 5px;
+                font-family: 'Arial';
+                font-size: 12px;
+            """)
+
+        for text, widget in (("품질 결정 방식:", self.qualityModeCombo), ("목표 용량:", self.targetSizeSpinBox),
+                             ("화질 지표:", self.metricCombo), ("화질 기준 (이상):", self.floorSpinBox),
+                             ("최대 시도 횟수:", self.maxAttemptsSpinBox), ("무손실 자동 선택:", self.losslessCombo),
+                             ("무손실 압축 수준 (0~9):", self.losslessLevelSpinBox)):
+            label = QtWidgets.QLabel(text)
+            label.setStyleSheet(f"""
+                font-family: 'Arial';
+                font-size: 12px;
+                color: {WHITE};
+            """)
+            qualityModeLayout.addRow(label, widget)
+        qualityLayout.addLayout(qualityModeLayout)
+
+        self.qualityModeCombo.currentIndexChanged.connect(self.updateQualityMode)
+        self.metricCombo.currentIndexChanged.connect(self.updateMetric)
+        self.updateQualityMode()
+
         contentLayout.addWidget(qualityGroup)
 
+        # Resize settings
+        resizeGroup = QtWidgets.QGroupBox("크기 조정")
+        resizeGroup.setStyleSheet(f"""
+            QGroupBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 20px;
+                padding-bottom: 10px;
+            }}
+            QGroupBox::title {{
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }}
+        """)
+
+        resizeLayout = QtWidgets.QFormLayout(resizeGroup)
+
+        # 0 은 제한 없음 (제한보다 큰 이미지만 비율을 유지하며 줄이고, 작은 이미지는 확대하지 않음)
+        self.maxWidthSpinBox = QtWidgets.QSpinBox()
+        self.maxWidthSpinBox.setMaximum(100000)
+        self.maxWidthSpinBox.setSuffix(" px")
+        self.maxWidthSpinBox.setSpecialValueText("제한 없음")
+        self.maxWidthSpinBox.setValue(current_max_width)
+
+        self.maxHeightSpinBox = QtWidgets.QSpinBox()
+        self.maxHeightSpinBox.setMaximum(100000)
+        self.maxHeightSpinBox.setSuffix(" px")
+        self.maxHeightSpinBox.setSpecialValueText("제한 없음")
+        self.maxHeightSpinBox.setValue(current_max_height)
+
+        self.maxMegapixelsSpinBox = QtWidgets.QDoubleSpinBox()
+        self.maxMegapixelsSpinBox.setDecimals(1)
+        self.maxMegapixelsSpinBox.setMaximum(1000.0)
+        self.maxMegapixelsSpinBox.setSingleStep(0.5)
+        self.maxMegapixelsSpinBox.setSuffix(" MP")
+        self.maxMegapixelsSpinBox.setSpecialValueText("제한 없음")
+        self.maxMegapixelsSpinBox.setValue(current_max_megapixels)
+
+        # 반응형 크기 변형 - 파일마다 여러 너비로 변환 (이름@640w.webp, 목록은 이름.variants.json)
+        self.variantsInput = QtWidgets.QLineEdit(current_variants)
+        self.variantsInput.setPlaceholderText("예: 320:60, 640, 1280:80 (너비:품질)")
+
+        for text, widget in (("최대 너비:", self.maxWidthSpinBox), ("최대 높이:", self.maxHeightSpinBox),
+                             ("최대 화소 수:", self.maxMegapixelsSpinBox), ("크기 변형:", self.variantsInput)):
+            widget.setStyleSheet(f"""
+                background-color: {MEDIUM_GRAY};
+                color: {WHITE};
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 4px;
+                padding: 5px;
+                font-family: 'Arial';
+                font-size: 12px;
+            """)
+            label = QtWidgets.QLabel(text)
+            label.setStyleSheet(f"""
+                font-family: 'Arial';
+                font-size: 12px;
+                color: {WHITE};
+            """)
+            resizeLayout.addRow(label, widget)
+
+        contentLayout.addWidget(resizeGroup)
+
+        # Conversion engine settings
+        workersGroup = QtWidgets.QGroupBox("변환 엔진")
+        workersGroup.setStyleSheet(f"""
+            QGroupBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 20px;
+                padding-bottom: 10px;
+            }}
+            QGroupBox::title {{
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }}
+        """)
+
+        workersLayout = QtWidgets.QFormLayout(workersGroup)
+
+        self.workersLabel = QtWidgets.QLabel("동시에 실행할 변환 수:")
+        self.workersLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {WHITE};
+        """)
+
+        # 0 은 자동 (CPU 코어 수)
+        self.workersSpinBox = QtWidgets.QSpinBox()
+        self.workersSpinBox.setMinimum(0)
+        self.workersSpinBox.setMaximum(64)
+        self.workersSpinBox.setSpecialValueText(f"자동 ({default_workers()})")
+        self.workersSpinBox.setValue(current_workers)
+        self.workersSpinBox.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {MEDIUM_GRAY};
+                color: {WHITE};
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 4px;
+                padding: 5px;
+                font-family: 'Arial';
+                font-size: 12px;
+            }}
+        """)
+        workersLayout.addRow(self.workersLabel, self.workersSpinBox)
+
+        # 인코더 백엔드 (Pillow 가 없으면 cwebp 만 선택 가능)
+        self.encoderLabel = QtWidgets.QLabel("인코더:")
+        self.encoderLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {WHITE};
+        """)
+        self.encoderCombo = QtWidgets.QComboBox()
+        self.encoderCombo.addItem("cwebp (외부 프로그램)", "cwebp")
+        self.encoderCombo.addItem("libwebp 내장 (Pillow, 빠른 시작)", "pillow")
+        if "pillow" not in available_encoders():
+            self.encoderCombo.model().item(1).setEnabled(False)
+        self.encoderCombo.setCurrentIndex(max(self.encoderCombo.findData(current_encoder), 0))
+        self.encoderCombo.setStyleSheet(f"""
+            background-color: {MEDIUM_GRAY};
+            color: {WHITE};
+            border: 1px solid {CORNFLOWER_BLUE};
+            border-radius: 4px;
+            padding: 5px;
+            font-family: 'Arial';
+            font-size: 12px;
+        """)
+        workersLayout.addRow(self.encoderLabel, self.encoderCombo)
+
+        # 속도/용량 프로필 (benchmark.json 이 있으면 인코더별 측정값을 함께 표시)
+        self.profileLabel = QtWidgets.QLabel("프로필:")
+        self.profileLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {WHITE};
+        """)
+        self.profileCombo = QtWidgets.QComboBox()
+        for profile in PROFILES:
+            self.profileCombo.addItem(PROFILE_NAMES.get(profile, profile), profile)
+        self.profileCombo.setCurrentIndex(max(self.profileCombo.findData(current_profile), 0))
+        self.profileCombo.setStyleSheet(f"""
+            background-color: {MEDIUM_GRAY};
+            color: {WHITE};
+            border: 1px solid {CORNFLOWER_BLUE};
+            border-radius: 4px;
+            padding: 5px;
+            font-family: 'Arial';
+            font-size: 12px;
+        """)
+        workersLayout.addRow(self.profileLabel, self.profileCombo)
+        self.encoderCombo.currentIndexChanged.connect(self.updateProfileNames)
+        self.updateProfileNames()
+
+        # 변환 순서 (크기는 헤더에서 읽은 화소 수로 추정)
+        self.orderLabel = QtWidgets.QLabel("변환 순서:")
+        self.orderLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {WHITE};
+        """)
+        self.orderCombo = QtWidgets.QComboBox()
+        self.orderCombo.addItem("추가한 순서", "input")
+        self.orderCombo.addItem("큰 이미지부터 (전체 시간 단축)", "largest")
+        self.orderCombo.addItem("작은 이미지부터 (결과가 빨리 나옴)", "smallest")
+        self.orderCombo.setCurrentIndex(max(self.orderCombo.findData(current_order), 0))
+        self.orderCombo.setStyleSheet(f"""
+            background-color: {MEDIUM_GRAY};
+            color: {WHITE};
+            border: 1px solid {CORNFLOWER_BLUE};
+            border-radius: 4px;
+            padding: 5px;
+            font-family: 'Arial';
+            font-size: 12px;
+        """)
+        workersLayout.addRow(self.orderLabel, self.orderCombo)
+
+        # 메타데이터 - 출력 파일에 남길 항목 (EXIF 방향은 설정과 관계없이 회전해서 적용)
+        self.metadataLabel = QtWidgets.QLabel("메타데이터:")
+        self.metadataLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {WHITE};
+        """)
+        self.metadataCombo = QtWidgets.QComboBox()
+        self.metadataCombo.addItem("제거 (가장 작음)", "none")
+        self.metadataCombo.addItem("ICC 색 프로필 (색 유지)", "icc")
+        self.metadataCombo.addItem("EXIF (촬영 정보)", "exif")
+        self.metadataCombo.addItem("모두 (ICC, EXIF, XMP)", "all")
+        self.metadataCombo.setCurrentIndex(max(self.metadataCombo.findData(current_metadata), 0))
+        self.metadataCombo.setStyleSheet(f"""
+            background-color: {MEDIUM_GRAY};
+            color: {WHITE};
+            border: 1px solid {CORNFLOWER_BLUE};
+            border-radius: 4px;
+            padding: 5px;
+            font-family: 'Arial';
+            font-size: 12px;
+        """)
+        workersLayout.addRow(self.metadataLabel, self.metadataCombo)
+
+        contentLayout.addWidget(workersGroup)
+
+        # Conversion cache settings
+        cacheGroup = QtWidgets.QGroupBox("변환 캐시")
+        cacheGroup.setStyleSheet(f"""
+            QGroupBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 20px;
+                padding-bottom: 10px;
+            }}
+            QGroupBox::title {{
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }}
+        """)
+
+        cacheLayout = QtWidgets.QVBoxLayout(cacheGroup)
+        cacheRowLayout = QtWidgets.QHBoxLayout()
+
+        self.cacheCheckBox = QtWidgets.QCheckBox("변경되지 않은 파일은 건너뛰기")
+        self.cacheCheckBox.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.cacheCheckBox.setChecked(current_use_cache)
+        self.cacheCheckBox.setStyleSheet(f"""
+            QCheckBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-size: 12px;
+                padding: 3px 0;
+            }}
+        """)
+        cacheRowLayout.addWidget(self.cacheCheckBox)
+        cacheRowLayout.addStretch()
+
+        self.clearCacheButton = QtWidgets.QPushButton("캐시 비우기")
+        self.clearCacheButton.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.clearCacheButton.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {ROYAL_BLUE};
+                color: {WHITE};
+                border: none;
+                border-radius: 4px;
+                padding: 5px 10px;
+                font-family: 'Arial';
+                font-weight: bold;
+                font-size: 12px;
+            }}
+            QPushButton:hover {{
+                background-color: {CORNFLOWER_BLUE};
+            }}
+        """)
+        self.clearCacheButton.clicked.connect(self.clearCache)
+        cacheRowLayout.addWidget(self.clearCacheButton)
+        cacheLayout.addLayout(cacheRowLayout)
+
+        self.dedupeCheckBox = QtWidgets.QCheckBox("내용이 같은 파일은 한 번만 변환")
+        self.dedupeCheckBox.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.dedupeCheckBox.setChecked(current_dedupe)
+        self.dedupeCheckBox.setStyleSheet(f"""
+            QCheckBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-size: 12px;
+                padding: 3px 0;
+            }}
+        """)
+        cacheLayout.addWidget(self.dedupeCheckBox)
+
+        contentLayout.addWidget(cacheGroup)
+
+        # Folder scan settings
+        scanGroup = QtWidgets.QGroupBox("폴더 검색")
+        scanGroup.setStyleSheet(f"""
+            QGroupBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 20px;
+                padding-bottom: 10px;
+            }}
+            QGroupBox::title {{
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }}
+        """)
+
+        scanLayout = QtWidgets.QFormLayout(scanGroup)
+
+        # 쉼표로 구분한 패턴 (예: *.png, 원본/*)
+        self.includeInput = QtWidgets.QLineEdit(current_include)
+        self.includeInput.setPlaceholderText("예: *.png, 제품/*")
+        self.excludeInput = QtWidgets.QLineEdit(current_exclude)
+        self.excludeInput.setPlaceholderText("예: 썸네일*, .git")
+        for patternInput in (self.includeInput, self.excludeInput):
+            patternInput.setStyleSheet(f"""
+                QLineEdit {{
+                    background-color: {MEDIUM_GRAY};
+                    color: {WHITE};
+                    border: 1px solid {CORNFLOWER_BLUE};
+                    border-radius: 4px;
+                    padding: 5px;
+                    font-family: 'Arial';
+                    font-size: 12px;
+                }}
+                QLineEdit:focus {{
+                    border: 1px solid {ROYAL_BLUE};
+                }}
+            """)
+
+        for text, widget in (("포함할 파일:", self.includeInput), ("제외할 파일:", self.excludeInput)):
+            label = QtWidgets.QLabel(text)
+            label.setStyleSheet(f"""
+                font-family: 'Arial';
+                font-size: 12px;
+                color: {WHITE};
+            """)
+            scanLayout.addRow(label, widget)
+
+        self.archivesCheckBox = QtWidgets.QCheckBox("zip/tar 압축 파일 안의 이미지도 변환")
+        self.archivesCheckBox.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.archivesCheckBox.setChecked(current_scan_archives)
+        self.archivesCheckBox.setStyleSheet(f"""
+            QCheckBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-size: 12px;
+                padding: 3px 0;
+            }}
+        """)
+        scanLayout.addRow(self.archivesCheckBox)
+
+        contentLayout.addWidget(scanGroup)
+
+        # Animated GIF settings
+        gifGroup = QtWidgets.QGroupBox("움직이는 GIF")
+        gifGroup.setStyleSheet(f"""
+            QGroupBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 20px;
+                padding-bottom: 10px;
+            }}
+            QGroupBox::title {{
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }}
+        """)
+
+        gifLayout = QtWidgets.QFormLayout(gifGroup)
+
+        self.gifModeCombo = QtWidgets.QComboBox()
+        self.gifModeCombo.addItem("손실 압축", "lossy")
+        self.gifModeCombo.addItem("혼합 (프레임별 선택)", "mixed")
+        self.gifModeCombo.addItem("무손실", "lossless")
+        self.gifModeCombo.setCurrentIndex(max(self.gifModeCombo.findData(current_gif_mode), 0))
+
+        # 0 은 gif2webp 기본값
+        self.gifKmaxSpinBox = QtWidgets.QSpinBox()
+        self.gifKmaxSpinBox.setMinimum(0)
+        self.gifKmaxSpinBox.setMaximum(1000)
+        self.gifKmaxSpinBox.setSpecialValueText("기본값")
+        self.gifKmaxSpinBox.setValue(current_gif_kmax)
+
+        for widget in (self.gifModeCombo, self.gifKmaxSpinBox):
+            widget.setStyleSheet(f"""
+                background-color: {MEDIUM_GRAY};
+                color: {WHITE};
+                border: 1px solid {CORNFLOWER_BLUE};
+                border-radius: 4px;
+                padding: 5px;
+                font-family: 'Arial';
+                font-size: 12px;
+            """)
+
+        for text, widget in (("변환 방식:", self.gifModeCombo), ("키프레임 최대 간격:", self.gifKmaxSpinBox)):
+            label = QtWidgets.QLabel(text)
+            label.setStyleSheet(f"""
+                font-family: 'Arial';
+                font-size: 12px;
+                color: {WHITE};
+            """)
+            gifLayout.addRow(label, widget)
+
+        self.gifMinSizeCheckBox = QtWidgets.QCheckBox("용량 최소화 (느림)")
+        self.gifMinSizeCheckBox.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.gifMinSizeCheckBox.setChecked(current_gif_min_size)
+        self.gifMinSizeCheckBox.setStyleSheet(f"""
+            QCheckBox {{
+                color: {WHITE};
+                font-family: 'Arial';
+                font-size: 12px;
+                padding: 3px 0;
+            }}
+        """)
+        gifLayout.addRow(self.gifMinSizeCheckBox)
+
+        contentLayout.addWidget(gifGroup)
+
         # Save location settings
         locationGroup = QtWidgets.QGroupBox("저장 위치")
         locationGroup.setStyleSheet(f"""
@@ -420,6 +906,32 @@ class SettingsDialog(QtWidgets.QDialog):
 
         locationLayout.addLayout(customFolderLayout)
 
+        # 출력 파일 이름이 같을 때 (a.png 와 a.jpg, 다른 폴더의 같은 이름 파일을 한 폴더에 저장하는 경우 등)
+        collisionLayout = QtWidgets.QHBoxLayout()
+        self.collisionLabel = QtWidgets.QLabel("이름이 같을 때:")
+        self.collisionLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {WHITE};
+        """)
+        collisionLayout.addWidget(self.collisionLabel)
+        self.collisionCombo = QtWidgets.QComboBox()
+        self.collisionCombo.addItem("이름 뒤에 번호 붙이기", "suffix")
+        self.collisionCombo.addItem("건너뛰기 (덮어쓰지 않음)", "skip")
+        self.collisionCombo.addItem("원본이 더 새로울 때만 덮어쓰기", "newer")
+        self.collisionCombo.setCurrentIndex(max(self.collisionCombo.findData(current_collision_policy), 0))
+        self.collisionCombo.setStyleSheet(f"""
+            background-color: {MEDIUM_GRAY};
+            color: {WHITE};
+            border: 1px solid {CORNFLOWER_BLUE};
+            border-radius: 4px;
+            padding: 5px;
+            font-family: 'Arial';
+            font-size: 12px;
+        """)
+        collisionLayout.addWidget(self.collisionCombo, 1)
+        locationLayout.addLayout(collisionLayout)
+
         # Set default save option
         if current_location_type == "original":
             self.originalFolderRadio.setChecked(True)
@@ -458,9 +970,24 @@ class SettingsDialog(QtWidgets.QDialog):
         """)
         # 저장 버튼에 명시적으로 accept() 메서드 연결
         self.saveButton.clicked.connect(self.accept)
-        contentLayout.addWidget(self.saveButton)
 
-        layout.addWidget(contentWidget)
+        # 설정 항목이 화면보다 길어질 수 있으므로 스크롤 영역에 넣음 (저장 버튼은 항상 보이게 아래에 고정)
+        scrollArea = QtWidgets.QScrollArea()
+        scrollArea.setWidgetResizable(True)
+        scrollArea.setFrameShape(QtWidgets.QFrame.NoFrame)
+        scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        scrollArea.setStyleSheet(f"background-color: {DARK_GRAY};")
+        scrollArea.setWidget(contentWidget)
+        scrollArea.setMinimumWidth(contentWidget.sizeHint().width() + scrollArea.verticalScrollBar().sizeHint().width())
+        scrollArea.setMinimumHeight(min(contentWidget.sizeHint().height(), 560))
+        layout.addWidget(scrollArea)
+
+        footerWidget = QtWidgets.QWidget()
+        footerWidget.setStyleSheet(f"background-color: {DARK_GRAY};")
+        footerLayout = QtWidgets.QVBoxLayout(footerWidget)
+        footerLayout.setContentsMargins(20, 0, 20, 20)
+        footerLayout.addWidget(self.saveButton)
+        layout.addWidget(footerWidget)
 
         # Enable dragging of titlebar
         self.dragPos = None
@@ -484,12 +1011,56 @@ class SettingsDialog(QtWidgets.QDialog):
     def updateQualityLabel(self, value):
         self.qualityLabel.setText(f"품질: {value}%")
 
+    # 선택한 품질 결정 방식에 필요한 입력만 활성화
+    def updateQualityMode(self):
+        mode = self.qualityModeCombo.currentData()
+        self.targetSizeSpinBox.setEnabled(mode == "target_size")
+        self.metricCombo.setEnabled(mode == "perceptual")
+        self.floorSpinBox.setEnabled(mode == "perceptual")
+        self.maxAttemptsSpinBox.setEnabled(mode != "fixed")
+        self.losslessCombo.setEnabled(mode == "fixed")
+        self.losslessLevelSpinBox.setEnabled(mode == "fixed")
+
+    # 선택한 인코더로 측정한 프로필별 초당 변환 수와 압축률을 프로필 이름 옆에 표시
+    def updateProfileNames(self):
+        summary = load_profile_summary(self.encoderCombo.currentData())
+        for index in range(self.profileCombo.count()):
+            profile = self.profileCombo.itemData(index)
+            text = PROFILE_NAMES.get(profile, profile)
+            if profile in summary:
+                measured = summary[profile]
+                text += (f" - {measured['images_per_sec']:.1f}개/초, {measured['compression_ratio']:.2f}배 압축 "
+                         f"(동시 {measured['workers']}개)")
+            self.profileCombo.setItemText(index, text)
+
+    # 화질 지표에 맞게 기준값 범위 변경 (SSIM: 0~1, PSNR: dB)
+    def updateFloorRange(self):
+        if self.metricCombo.currentData() == "psnr":
+            self.floorSpinBox.setDecimals(1)
+            self.floorSpinBox.setRange(10.0, 100.0)
+            self.floorSpinBox.setSingleStep(0.5)
+        else:
+            self.floorSpinBox.setDecimals(3)
+            self.floorSpinBox.setRange(0.5, 1.0)
+            self.floorSpinBox.setSingleStep(0.005)
+
+    # 화질 지표를 바꾸면 그 지표의 기본 기준값으로 변경
+    def updateMetric(self):
+        self.updateFloorRange()
+        self.floorSpinBox.setValue(DEFAULT_FLOORS[self.metricCombo.currentData()])
+
     def browseSaveFolder(self):
         folder = QtWidgets.QFileDialog.getExistingDirectory(self, "저장 폴더 선택")
         if folder:
             self.customFolderPath.setText(folder)
             self.customFolderRadio.setChecked(True)
 
+    def clearCache(self):
+        manifest = ConversionManifest()
+        manifest.clear()
+        manifest.save()
+        self.clearCacheButton.setText("비움")
+
     def getSettings(self):
         # Return the settings as a dictionary
         quality = self.qualitySlider.value()
@@ -508,8 +1079,33 @@ class SettingsDialog(QtWidgets.QDialog):
 
         return {
             "quality": quality,
+            "quality_mode": self.qualityModeCombo.currentData(),
+            "target_size_kb": self.targetSizeSpinBox.value(),
+            "max_attempts": self.maxAttemptsSpinBox.value(),
+            "perceptual_metric": self.metricCombo.currentData(),
+            "perceptual_floor": self.floorSpinBox.value(),
+            "max_width": self.maxWidthSpinBox.value(),
+            "max_height": self.maxHeightSpinBox.value(),
+            "max_megapixels": self.maxMegapixelsSpinBox.value(),
+            "variants": self.variantsInput.text(),
+            "lossless_mode": self.losslessCombo.currentData(),
+            "lossless_level": self.losslessLevelSpinBox.value(),
             "save_location_type": save_location_type,
-            "save_location_path": save_location_path
+            "save_location_path": save_location_path,
+            "collision_policy": self.collisionCombo.currentData(),
+            "workers": self.workersSpinBox.value(),
+            "use_cache": self.cacheCheckBox.isChecked(),
+            "dedupe": self.dedupeCheckBox.isChecked(),
+            "include_patterns": self.includeInput.text(),
+            "exclude_patterns": self.excludeInput.text(),
+            "scan_archives": self.archivesCheckBox.isChecked(),
+            "gif_mode": self.gifModeCombo.currentData(),
+            "gif_kmax": self.gifKmaxSpinBox.value(),
+            "gif_min_size": self.gifMinSizeCheckBox.isChecked(),
+            "encoder": self.encoderCombo.currentData(),
+            "profile": self.profileCombo.currentData(),
+            "metadata": self.metadataCombo.currentData(),
+            "order": self.orderCombo.currentData()
         }
 
 
@@ -558,6 +1154,48 @@ class GradientProgressBar(QtWidgets.QProgressBar):
         """)
 
 
+# 백그라운드 스레드에서 변환 엔진을 실행하고 결과를 시그널로 전달하는 작업 객체
+class ConversionWorker(QtCore.QObject):
+    fileConverted = QtCore.pyqtSignal(object)  # 파일 하나의 ConversionResult
+    progress = QtCore.pyqtSignal(object)  # ProgressSnapshot (UPDATE_INTERVAL 마다 한 번)
+    finished = QtCore.pyqtSignal(list, bool)  # 전체 결과 목록, 취소 여부
+
+    def __init__(self, engine, walker):
+        super().__init__()
+        self.engine = engine
+        self.walker = walker
+
+    def run(self):
+        results = []
+        tracker = ProgressTracker(self.walker, engine=self.engine)
+        # 폴더 탐색과 변환이 동시에 진행되므로 전체 파일 수와 크기는 다른 스레드에서 미리 셈
+        threading.Thread(target=self.walker.measure, daemon=True).start()
+        try:
+            for result in self.engine.run(self.walker):
+                results.append(result)
+                self.fileConverted.emit(result)
+                if tracker.add(result):
+                    self.progress.emit(tracker.snapshot())
+            self.progress.emit(tracker.snapshot())
+        except Exception as e:
+            print(f"변환 작업 오류: {str(e)}")
+            traceback.print_exc()
+        finally:
+            self.walker.cleanup()
+            if self.engine.journal is not None:
+                self.engine.journal.close()
+        for directory, error in self.engine.planner.errors:
+            print(f"폴더 생성 오류: {directory} ({error}) - 원본 폴더에 저장했습니다.")
+        # 단계별 시간 측정 결과 출력 및 trace 저장 (설정 파일에 trace_path 가 있을 때만)
+        if self.engine.tracer.enabled:
+            self.engine.tracer.finish()
+        self.finished.emit(results, self.engine.cancelled)
+
+    # 다른 스레드(GUI)에서 호출해도 안전함
+    def cancel(self):
+        self.engine.cancel()
+
+
 class Ui_Dialog(object):
     def setupUi(self, Dialog):
         self.Dialog = Dialog  # 다이얼로그 객체 저장
@@ -567,12 +1205,49 @@ class Ui_Dialog(object):
 
         # 기본 설정값 초기화 (저장된 설정이 있으면 사용)
         self.conversion_quality = settings.get("quality", 75)
+        self.quality_mode = settings.get("quality_mode", "fixed")
+        self.target_size_kb = settings.get("target_size_kb", 100)
+        self.max_attempts = settings.get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+        self.perceptual_metric = settings.get("perceptual_metric", "ssim")
+        self.perceptual_floor = settings.get("perceptual_floor", DEFAULT_FLOORS["ssim"])
+        self.max_width = settings.get("max_width", 0)
+        self.max_height = settings.get("max_height", 0)
+        self.max_megapixels = settings.get("max_megapixels", 0.0)
+        self.variants = settings.get("variants", "")
         self.save_location_type = settings.get("save_location_type", "subfolder")
         self.save_location_path = settings.get("save_location_path", "변환된 이미지")
+        self.collision_policy = settings.get("collision_policy", "suffix")
+        self.conversion_workers = settings.get("workers", 0)
+        self.use_cache = settings.get("use_cache", True)
+        self.cache_hash = settings.get("cache_hash", False)
+        self.cache_max_entries = settings.get("cache_max_entries", DEFAULT_MAX_ENTRIES)
+        self.dedupe = settings.get("dedupe", True)
+        self.dedupe_link = settings.get("dedupe_link", "copy")
+        self.include_patterns = settings.get("include_patterns", "")
+        self.exclude_patterns = settings.get("exclude_patterns", "")
+        self.follow_symlinks = settings.get("follow_symlinks", True)
+        self.scan_archives = settings.get("scan_archives", False)
+        self.gif_mode = settings.get("gif_mode", "lossy")
+        self.gif_kmax = settings.get("gif_kmax", 0)
+        self.gif_min_size = settings.get("gif_min_size", False)
+        self.encoder = settings.get("encoder", "cwebp")
+        self.order = settings.get("order", "input")
+        self.profile = settings.get("profile", DEFAULT_PROFILE)
+        self.metadata = settings.get("metadata", "none")
+        self.lossless_mode = settings.get("lossless_mode", "off")
+        self.lossless_level = settings.get("lossless_level", DEFAULT_LOSSLESS_LEVEL)
+        self.trace_path = settings.get("trace_path", "")
 
         # 저장 위치 경로 (클릭 시 열 폴더)
         self.current_save_folder = ""
 
+        # 백그라운드 변환 작업 (변환 중이 아니면 None)
+        self.conversionThread = None
+        self.conversionWorker = None
+
+        # 마지막 배치의 변환 결과 (결과 보기, 보고서 저장용)
+        self.last_results = []
+
         # 앱 전체 스타일 설정
         Dialog.setObjectName("Dialog")
 
@@ -743,7 +1418,7 @@ class Ui_Dialog(object):
         self.headerLayout.addWidget(self.settingsButton)
 
         # 설정 레이블
-        self.settingsLabel = QtWidgets.QLabel(f"변환 품질: {self.conversion_quality}%")
+        self.settingsLabel = QtWidgets.QLabel(self.quality_text())
         self.settingsLabel.setStyleSheet(f"""
             font-family: 'Arial';
             font-size: 12px;
@@ -846,6 +1521,79 @@ class Ui_Dialog(object):
         self.convertButton.clicked.connect(self.select_files)
         self.bottomLayout.addWidget(self.convertButton, 1)  # 비율 1
 
+        # 이어서 변환 버튼 (중간에 멈춘 배치가 있을 때만 표시)
+        self.resumeButton = QtWidgets.QPushButton("이어서 변환")
+        self.resumeButton.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.resumeButton.setMinimumHeight(36)
+        self.resumeButton.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {MEDIUM_GRAY};
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                font-size: 14px;
+                border: 1px solid {ROYAL_BLUE};
+                border-radius: 6px;
+                padding: 8px 20px;
+            }}
+            QPushButton:hover {{
+                background-color: {ROYAL_BLUE};
+            }}
+        """)
+        self.resumeButton.clicked.connect(self.resume_conversion)
+        self.bottomLayout.addWidget(self.resumeButton, 1)  # 비율 1
+        self.updateResumeButton()
+
+        # 결과 보기 버튼 (배치가 끝나면 표시 - 실패 목록, 보고서 저장, 실패한 파일 다시 변환)
+        self.reportButton = QtWidgets.QPushButton("결과 보기")
+        self.reportButton.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.reportButton.setMinimumHeight(36)
+        self.reportButton.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {MEDIUM_GRAY};
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                font-size: 14px;
+                border: 1px solid {ROYAL_BLUE};
+                border-radius: 6px;
+                padding: 8px 20px;
+            }}
+            QPushButton:hover {{
+                background-color: {ROYAL_BLUE};
+            }}
+        """)
+        self.reportButton.clicked.connect(self.showReport)
+        self.reportButton.hide()
+        self.bottomLayout.addWidget(self.reportButton, 1)  # 비율 1
+
+        # 취소 버튼 (변환 중에만 표시)
+        self.cancelButton = QtWidgets.QPushButton("취소")
+        self.cancelButton.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.cancelButton.setMinimumHeight(36)
+        self.cancelButton.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {MEDIUM_GRAY};
+                color: {WHITE};
+                font-family: 'Arial';
+                font-weight: bold;
+                font-size: 14px;
+                border: 1px solid #FF5252;
+                border-radius: 6px;
+                padding: 8px 20px;
+            }}
+            QPushButton:hover {{
+                background-color: #FF5252;
+            }}
+            QPushButton:disabled {{
+                color: {LIGHT_GRAY};
+                border: 1px solid {MEDIUM_GRAY};
+            }}
+        """)
+        self.cancelButton.clicked.connect(self.cancel_conversion)
+        self.cancelButton.hide()
+        self.bottomLayout.addWidget(self.cancelButton, 1)  # 비율 1
+
         self.contentLayout.addWidget(self.bottomWidget)
 
         # 프로그레스바
@@ -905,17 +1653,63 @@ class Ui_Dialog(object):
 
     # 앱 종료 시 설정 저장
     def on_close(self):
+        # 진행 중인 변환은 취소하고 작업 스레드가 끝날 때까지 대기
+        if self.conversionThread is not None:
+            self.conversionWorker.cancel()
+            self.conversionThread.quit()
+            self.conversionThread.wait()
         self.save_current_settings()
         self.Dialog.close()
 
-    # 현재 설정 저장
-    def save_current_settings(self):
-        settings = {
+    # 현재 설정값
+    def current_settings(self):
+        return {
             "quality": self.conversion_quality,
+            "quality_mode": self.quality_mode,
+            "target_size_kb": self.target_size_kb,
+            "max_attempts": self.max_attempts,
+            "perceptual_metric": self.perceptual_metric,
+            "perceptual_floor": self.perceptual_floor,
+            "max_width": self.max_width,
+            "max_height": self.max_height,
+            "max_megapixels": self.max_megapixels,
+            "variants": self.variants,
+            "lossless_mode": self.lossless_mode,
+            "lossless_level": self.lossless_level,
             "save_location_type": self.save_location_type,
-            "save_location_path": self.save_location_path
+            "save_location_path": self.save_location_path,
+            "collision_policy": self.collision_policy,
+            "workers": self.conversion_workers,
+            "use_cache": self.use_cache,
+            "cache_hash": self.cache_hash,
+            "cache_max_entries": self.cache_max_entries,
+            "dedupe": self.dedupe,
+            "dedupe_link": self.dedupe_link,
+            "include_patterns": self.include_patterns,
+            "exclude_patterns": self.exclude_patterns,
+            "follow_symlinks": self.follow_symlinks,
+            "scan_archives": self.scan_archives,
+            "gif_mode": self.gif_mode,
+            "gif_kmax": self.gif_kmax,
+            "gif_min_size": self.gif_min_size,
+            "encoder": self.encoder,
+            "order": self.order,
+            "profile": self.profile,
+            "metadata": self.metadata,
+            "trace_path": self.trace_path
         }
-        save_settings(settings)
+
+    # 메인 화면에 표시할 품질 설정
+    def quality_text(self):
+        if self.quality_mode == "target_size":
+            return f"목표 용량: {self.target_size_kb}KB"
+        if self.quality_mode == "perceptual":
+            return f"화질 기준: {self.perceptual_metric.upper()} ≥ {self.perceptual_floor:g}"
+        return f"변환 품질: {self.conversion_quality}%"
+
+    # 현재 설정 저장
+    def save_current_settings(self):
+        save_settings(self.current_settings())
 
     # 저장 위치 표시 레이블 업데이트
     def updateSaveLocationLabel(self):
@@ -947,6 +1741,37 @@ class Ui_Dialog(object):
 
             # 설정 값 초기화
             settings_dialog.qualitySlider.setValue(self.conversion_quality)
+            settings_dialog.qualityModeCombo.setCurrentIndex(
+                max(settings_dialog.qualityModeCombo.findData(self.quality_mode), 0))
+            settings_dialog.targetSizeSpinBox.setValue(self.target_size_kb)
+            settings_dialog.maxAttemptsSpinBox.setValue(self.max_attempts)
+            settings_dialog.metricCombo.setCurrentIndex(
+                max(settings_dialog.metricCombo.findData(self.perceptual_metric), 0))
+            settings_dialog.floorSpinBox.setValue(self.perceptual_floor)
+            settings_dialog.maxWidthSpinBox.setValue(self.max_width)
+            settings_dialog.maxHeightSpinBox.setValue(self.max_height)
+            settings_dialog.maxMegapixelsSpinBox.setValue(self.max_megapixels)
+            settings_dialog.variantsInput.setText(self.variants)
+            settings_dialog.losslessCombo.setCurrentIndex(
+                max(settings_dialog.losslessCombo.findData(self.lossless_mode), 0))
+            settings_dialog.losslessLevelSpinBox.setValue(self.lossless_level)
+            settings_dialog.workersSpinBox.setValue(self.conversion_workers)
+            settings_dialog.cacheCheckBox.setChecked(self.use_cache)
+            settings_dialog.dedupeCheckBox.setChecked(self.dedupe)
+            settings_dialog.includeInput.setText(self.include_patterns)
+            settings_dialog.excludeInput.setText(self.exclude_patterns)
+            settings_dialog.archivesCheckBox.setChecked(self.scan_archives)
+            settings_dialog.gifModeCombo.setCurrentIndex(max(settings_dialog.gifModeCombo.findData(self.gif_mode), 0))
+            settings_dialog.gifKmaxSpinBox.setValue(self.gif_kmax)
+            settings_dialog.gifMinSizeCheckBox.setChecked(self.gif_min_size)
+            settings_dialog.encoderCombo.setCurrentIndex(max(settings_dialog.encoderCombo.findData(self.encoder), 0))
+            settings_dialog.orderCombo.setCurrentIndex(max(settings_dialog.orderCombo.findData(self.order), 0))
+            settings_dialog.profileCombo.setCurrentIndex(
+                max(settings_dialog.profileCombo.findData(self.profile), 0))
+            settings_dialog.collisionCombo.setCurrentIndex(
+                max(settings_dialog.collisionCombo.findData(self.collision_policy), 0))
+            settings_dialog.metadataCombo.setCurrentIndex(
+                max(settings_dialog.metadataCombo.findData(self.metadata), 0))
 
             if self.save_location_type == "original":
                 settings_dialog.originalFolderRadio.setChecked(True)
@@ -968,11 +1793,36 @@ class Ui_Dialog(object):
                 # 설정 가져오기
                 settings = settings_dialog.getSettings()
                 self.conversion_quality = settings["quality"]
+                self.quality_mode = settings["quality_mode"]
+                self.target_size_kb = settings["target_size_kb"]
+                self.max_attempts = settings["max_attempts"]
+                self.perceptual_metric = settings["perceptual_metric"]
+                self.perceptual_floor = settings["perceptual_floor"]
+                self.max_width = settings["max_width"]
+                self.max_height = settings["max_height"]
+                self.max_megapixels = settings["max_megapixels"]
+                self.variants = settings["variants"]
+                self.lossless_mode = settings["lossless_mode"]
+                self.lossless_level = settings["lossless_level"]
                 self.save_location_type = settings["save_location_type"]
                 self.save_location_path = settings["save_location_path"]
+                self.collision_policy = settings["collision_policy"]
+                self.conversion_workers = settings["workers"]
+                self.use_cache = settings["use_cache"]
+                self.dedupe = settings["dedupe"]
+                self.include_patterns = settings["include_patterns"]
+                self.exclude_patterns = settings["exclude_patterns"]
+                self.scan_archives = settings["scan_archives"]
+                self.gif_mode = settings["gif_mode"]
+                self.gif_kmax = settings["gif_kmax"]
+                self.gif_min_size = settings["gif_min_size"]
+                self.encoder = settings["encoder"]
+                self.order = settings["order"]
+                self.profile = settings["profile"]
+                self.metadata = settings["metadata"]
 
                 # UI 업데이트
-                self.settingsLabel.setText(f"변환 품질: {self.conversion_quality}%")
+                self.settingsLabel.setText(self.quality_text())
                 self.updateSaveLocationLabel()  # 저장 위치 레이블 업데이트
 
                 # 설정 저장
@@ -996,16 +1846,20 @@ class Ui_Dialog(object):
 
     # 이미지 파일을 WEBP로 변환하는 함수
     def convert_files(self, filenames):
-        # 변환 옵션 선택 - 설정값 사용
-        option = f" -q {self.conversion_quality}"
+        # 이미 변환 중이면 새 작업을 시작하지 않음
+        if self.is_converting():
+            self.statusLabel.setText("이전 변환이 진행 중입니다. 취소 후 다시 시도하세요.")
+            return
+
+        settings = self.current_settings()
         image_files = []
         unsupported_files = []
-        progressNum = 0  # 프로그레스 바의 진행도
 
-        # 이미지 확장자 확인
+        # 이미지 확장자 확인 (폴더와 압축 파일은 변환하면서 안의 이미지를 찾음)
         for filename in filenames:
             # 이미지 파일인 경우 이미지 파일 리스트에 추가
-            if os.path.splitext(filename)[1].lower() in ('.jpg', '.jpeg', '.png', '.gif'):
+            if is_image_file(filename) or os.path.isdir(filename) or \
+                    (settings["scan_archives"] and is_archive(filename)):
                 image_files.append(filename)
             else:
                 # 이미지 파일이 아닌 경우 지원하지 않는 파일 리스트에 추가
@@ -1013,38 +1867,12 @@ class Ui_Dialog(object):
 
         # 프로그레스바 초기화 및 표시
         self.progressBar.setValue(0)
-        self.progressBar.setMaximum(len(image_files))
+        self.progressBar.setMaximum(PROGRESS_SCALE)
         self.progressBar.show()
 
         # 이미지 파일이 없을 경우 경고 메시지 출력
         if not image_files:
-            self.statusIcon.setText("⚠️")
-            self.statusLabel.setText("선택된 파일에 이미지 파일이 없습니다.")
-            self.statusLabel.setStyleSheet("""
-                font-family: 'Arial';
-                font-size: 12px;
-                color: #FF5252;
-            """)
-            self.frame.setStyleSheet(f"""
-                border: 2px dashed #FF5252;
-                border-radius: 12px;
-                background-color: {MEDIUM_GRAY};
-            """)
-
-            # 3초 후 원래 스타일로 복원
-            QtCore.QTimer.singleShot(3000, lambda: self.frame.setStyleSheet(f"""
-                border: 2px dashed {DEEP_INDIGO};
-                border-radius: 12px;
-                background-color: {MEDIUM_GRAY};
-            """))
-            QtCore.QTimer.singleShot(3000, lambda: self.statusIcon.setText("🔄"))
-            QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setText("변환할 파일을 추가해 주세요"))
-            QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setStyleSheet(f"""
-                font-family: 'Arial';
-                font-size: 12px;
-                color: {CORNFLOWER_BLUE};
-            """))
-            QtCore.QTimer.singleShot(3000, lambda: self.progressBar.hide())
+            self.show_no_images_warning()
         else:  # 이미지 파일이 존재할 경우 변환을 시작함
             # UI 업데이트
             self.statusIcon.setText("⏳")
@@ -1061,107 +1889,295 @@ class Ui_Dialog(object):
                 background-color: {MEDIUM_GRAY};
             """)
 
-            # 마지막으로 처리한 파일 (결과 경로를 저장)
-            last_output_folder = None
-
-            # 변환 시작
-            for filename in image_files:
-                output_folder, output_filename = self.makeFolder(filename)
-                if os.path.splitext(filename)[1].lower() == '.gif':
-                    command = f'"{cwebp_path}" "{filename}" {option} -o {output_filename}'
-                else:
-                    command = f'"{cwebp_path}" "{filename}" {option} -o {output_filename}'
+            self.start_conversion(image_files, settings, BatchJournal(image_files, settings))
 
-                # 변환 실행
-                subprocess.call(command, shell=True)
+    # 백그라운드 스레드에서 변환 시작 (journal 에 파일마다 상태를 기록해서 중간에 멈춰도 이어서 변환할 수 있음)
+    def start_conversion(self, image_files, settings, journal):
+        # 변환 중에는 취소 버튼 표시
+        self.convertButton.hide()
+        self.resumeButton.hide()
+        self.reportButton.hide()
+        self.cancelButton.setEnabled(True)
+        self.cancelButton.show()
 
-                # 마지막 출력 폴더 저장
-                last_output_folder = output_folder
-
-                # 변환 완료 후 프로그레스바 수치 + 1
-                progressNum += 1
-                self.progressBar.setValue(progressNum)
-
-            # 저장 폴더 업데이트 (결과를 볼 수 있게)
-            if last_output_folder:
-                self.current_save_folder = last_output_folder
+        # 변환 시작 - 설정값으로 엔진 생성 후 백그라운드 스레드에서 실행
+        try:
+            engine = ConversionEngine.from_settings(settings)
+        except ValueError as e:
+            # 선택한 인코더, 품질 결정 방식, 무손실 자동 선택을 사용할 수 없으면 cwebp, 고정 품질, 손실 압축으로 변환
+            print(f"변환 설정 오류: {str(e)}")
+            engine = ConversionEngine.from_settings(settings, encoder="cwebp", quality_mode="fixed",
+                                                    lossless_mode="off")
+        try:
+            journal.open()
+            engine.journal = journal
+        except OSError as e:
+            # 기록 파일을 만들 수 없어도 변환은 진행 (이어서 변환만 할 수 없음)
+            print(f"배치 기록 오류: {str(e)}")
+        walker = FileWalker.from_settings(image_files, settings)
+        self.conversionThread = QtCore.QThread()
+        self.conversionWorker = ConversionWorker(engine, walker)
+        self.conversionWorker.moveToThread(self.conversionThread)
+        self.conversionThread.started.connect(self.conversionWorker.run)
+        self.conversionWorker.progress.connect(self.on_conversion_progress)
+        self.conversionWorker.finished.connect(self.on_conversion_finished)
+        self.conversionWorker.finished.connect(self.conversionThread.quit)
+        self.conversionThread.finished.connect(self.on_conversion_thread_finished)
+        self.conversionThread.start()
+
+    # 중간에 멈춘 마지막 배치를 그때의 입력 경로와 설정으로 이어서 변환 (이미 끝난 파일은 건너뜀)
+    def resume_conversion(self):
+        if self.is_converting():
+            return
+        journal = BatchJournal.unfinished()
+        if journal is None:
+            self.updateResumeButton()
+            return
+        self.progressBar.setValue(0)
+        self.progressBar.setMaximum(PROGRESS_SCALE)
+        self.progressBar.show()
+        self.statusIcon.setText("⏳")
+        self.statusLabel.setText(f"이어서 변환 중... (이전에 {journal.count(DONE, FAILED)}개 완료)")
+        self.statusLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {ROYAL_BLUE};
+        """)
+        self.dropLabel.setText("변환 중...")
+        self.frame.setStyleSheet(f"""
+            border: 2px dashed {ROYAL_BLUE};
+            border-radius: 12px;
+            background-color: {MEDIUM_GRAY};
+        """)
+        self.start_conversion(journal.paths, journal.settings, journal)
+
+    # 마지막 배치에서 실패한 파일만 현재 설정으로 다시 변환 (압축 파일 안의 파일은 압축 파일을 다시 탐색)
+    def retry_failed(self):
+        if self.is_converting():
+            return
+        journal = BatchJournal.failed_batch(self.current_settings())
+        if journal is None:
+            self.statusLabel.setText("다시 변환할 실패한 파일이 없습니다.")
+            return
+        self.progressBar.setValue(0)
+        self.progressBar.setMaximum(PROGRESS_SCALE)
+        self.progressBar.show()
+        self.statusIcon.setText("⏳")
+        self.statusLabel.setText(f"실패한 파일을 다시 변환 중... ({len(journal.paths)}개)")
+        self.statusLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {ROYAL_BLUE};
+        """)
+        self.dropLabel.setText("변환 중...")
+        self.frame.setStyleSheet(f"""
+            border: 2px dashed {ROYAL_BLUE};
+            border-radius: 12px;
+            background-color: {MEDIUM_GRAY};
+        """)
+        self.start_conversion(journal.paths, journal.settings, journal)
+
+    # 마지막 배치의 결과 요약과 실패한 파일 목록 (파일마다 인코더 오류 메시지) 표시
+    def showReport(self):
+        results = self.last_results
+        if not results:
+            return
+        summary = report_summary(results)
+        failures = failed_results(results)
+        box = QtWidgets.QMessageBox(self.Dialog)
+        box.setWindowTitle("변환 결과")
+        box.setText(f"변환 {summary['ok']}개, 건너뜀 {summary['skipped']}개, 실패 {len(failures)}개"
+                    + (f" (손상된 파일 {summary['rejected']}개)" if summary['rejected'] else ""))
+        if failures:
+            box.setInformativeText("실패한 파일과 이유는 자세히 보기에서 확인할 수 있습니다.")
+            box.setDetailedText("\n\n".join(f"{source_name(result.source)}\n{result.stderr.strip()}"
+                                              for result in failures))
+        saveButton = box.addButton("보고서 저장", QtWidgets.QMessageBox.ActionRole)
+        retryButton = box.addButton("실패한 파일 다시 변환", QtWidgets.QMessageBox.ActionRole) if failures else None
+        box.addButton("닫기", QtWidgets.QMessageBox.RejectRole)
+        box.exec_()
+        if box.clickedButton() is saveButton:
+            self.saveReport()
+        elif retryButton is not None and box.clickedButton() is retryButton:
+            self.retry_failed()
+
+    # 마지막 배치의 파일별 결과를 CSV 또는 JSON 보고서로 저장
+    def saveReport(self):
+        folder = self.current_save_folder if os.path.isdir(self.current_save_folder) else os.path.expanduser("~/Downloads")
+        path, selected_filter = QFileDialog.getSaveFileName(self.Dialog, "보고서 저장",
+                                                            os.path.join(folder, "변환_보고서.csv"),
+                                                            "CSV (*.csv);;JSON (*.json)")
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".json" if "json" in selected_filter else ".csv"
+        try:
+            write_report(self.last_results, path)
+            self.statusLabel.setText(f"보고서를 저장했습니다: {os.path.basename(path)}")
+        except OSError as e:
+            print(f"보고서 저장 오류: {str(e)}")
+            self.statusLabel.setText("보고서를 저장하지 못했습니다.")
+
+    # 끝나지 않은 배치가 있으면 이어서 변환 버튼 표시
+    def updateResumeButton(self):
+        journal = BatchJournal.unfinished()
+        if journal is None or self.is_converting():
+            self.resumeButton.hide()
+            return
+        remaining = len(journal.states) - journal.count(DONE, FAILED)
+        self.resumeButton.setToolTip(f"마지막 배치를 이어서 변환합니다. (완료 {journal.count(DONE)}개, "
+                                     f"실패 {journal.count(FAILED)}개, 남은 파일 {remaining}개 이상)")
+        self.resumeButton.show()
+
+    # 선택된 파일에 이미지 파일이 없을 때 경고 메시지 출력
+    def show_no_images_warning(self):
+        self.statusIcon.setText("⚠️")
+        self.statusLabel.setText("선택된 파일에 이미지 파일이 없습니다.")
+        self.statusLabel.setStyleSheet("""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: #FF5252;
+        """)
+        self.frame.setStyleSheet(f"""
+            border: 2px dashed #FF5252;
+            border-radius: 12px;
+            background-color: {MEDIUM_GRAY};
+        """)
 
-            # 변환 결과 출력
+        # 3초 후 원래 스타일로 복원
+        QtCore.QTimer.singleShot(3000, lambda: self.frame.setStyleSheet(f"""
+            border: 2px dashed {DEEP_INDIGO};
+            border-radius: 12px;
+            background-color: {MEDIUM_GRAY};
+        """))
+        QtCore.QTimer.singleShot(3000, lambda: self.statusIcon.setText("🔄"))
+        QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setText("변환할 파일을 추가해 주세요"))
+        QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {CORNFLOWER_BLUE};
+        """))
+        QtCore.QTimer.singleShot(3000, lambda: self.progressBar.hide())
+
+    # 변환 작업 진행 중인지 확인
+    def is_converting(self):
+        return self.conversionThread is not None
+
+    # 작업 스레드가 완전히 종료된 후 참조 해제
+    def on_conversion_thread_finished(self):
+        self.conversionThread.wait()
+        self.conversionWorker = None
+        self.conversionThread = None
+        self.updateResumeButton()
+
+    # 변환 취소 버튼 클릭
+    def cancel_conversion(self):
+        if self.conversionThread is not None:
+            self.cancelButton.setEnabled(False)
+            self.statusLabel.setText("변환 취소 중...")
+            self.conversionWorker.cancel()
+
+    # 진행 상황이 바뀌면 (최대 UPDATE_INTERVAL 마다) 프로그레스바와 상태 표시 갱신
+    # 프로그레스바는 파일 수가 아니라 원본 크기 기준 진행률 (천분율)
+    def on_conversion_progress(self, snapshot):
+        fraction = snapshot.fraction
+        if fraction is not None:
+            self.progressBar.setValue(round(fraction * PROGRESS_SCALE))
+        if self.cancelButton.isEnabled():
+            self.statusLabel.setText(snapshot.text())
+
+    # 변환 작업 종료 후 결과 출력
+    def on_conversion_finished(self, results, cancelled):
+        self.cancelButton.hide()
+        self.convertButton.show()
+
+        # 폴더 안에 이미지 파일이 하나도 없었던 경우
+        if not results and not cancelled:
+            self.dropLabel.setText("파일을 여기에 드래그하세요")
+            self.show_no_images_warning()
+            return
+
+        self.last_results = results
+        self.reportButton.show()
+
+        converted = [result for result in results if not result.cancelled]
+        # 상태별 파일 수 (결과 보기, 보고서와 같은 기준 - 변환됨은 실패와 건너뜀을 뺀 수)
+        summary = report_summary(converted)
+        skipped = summary["skipped"]
+        skipped_text = f" ({skipped}개 건너뜀)" if skipped else ""
+        # 실패한 파일 (헤더 검사에서 걸러낸 빈 파일, 이미지가 아닌 파일, 잘린 파일 포함) - 목록은 결과 보기에서 확인
+        failures = failed_results(converted)
+        if failures:
+            skipped_text += f" (실패 {len(failures)}개 - 결과 보기에서 확인)"
+        duplicates = [result for result in converted if result.duplicate_of and result.ok]
+        if duplicates:
+            saved_time = sum(result.saved_time for result in duplicates)
+            skipped_text += f" (중복 {len(duplicates)}개, {saved_time:.1f}초 절약)"
+        search_time = sum(result.search_time for result in converted)
+        if search_time:
+            missed = sum(1 for result in converted if result.target_missed and result.ok)
+            missed_text = f", 목표 미달성 {missed}개" if missed else ""
+            skipped_text += f" (품질 탐색 {search_time:.1f}초{missed_text})"
+        encoded = [result for result in converted if result.ok and not result.skipped]
+        bytes_in = sum(result.input_bytes for result in encoded)
+        if bytes_in:
+            bytes_out = sum(result.output_bytes for result in encoded)
+            skipped_text += f" ({format_bytes(bytes_in)} → {format_bytes(bytes_out)})"
+
+        # 저장 폴더 업데이트 (결과를 볼 수 있게)
+        if converted:
+            self.current_save_folder = converted[-1].output_folder
+
+        # 변환 결과 출력
+        if cancelled:
+            self.statusIcon.setText("⛔")
+            self.statusLabel.setText(f"변환이 취소되었습니다. ({summary['ok']}개 변환됨)")
+            self.dropLabel.setText("변환 취소됨")
+        else:
             self.statusIcon.setText("✅")
-            if len(image_files) == 1:
-                self.statusLabel.setText(f"{os.path.basename(output_filename)[:-1]}으로 변환되었습니다.")
+            if len(converted) == 1 and converted[0].variants:
+                self.statusLabel.setText(f"크기 변형 {len(converted[0].variants)}개로 변환되었습니다.{skipped_text}")
+                self.dropLabel.setText("변환 완료!")
+            elif len(converted) == 1 and failures:
+                reason = (converted[0].stderr.strip().splitlines() or ["알 수 없는 오류"])[-1]
+                self.statusLabel.setText(f"변환하지 못했습니다: {reason}")
+                self.dropLabel.setText("변환 실패")
+            elif len(converted) == 1:
+                self.statusLabel.setText(f"{os.path.basename(converted[0].output)}으로 변환되었습니다.{skipped_text}")
                 self.dropLabel.setText("변환 완료!")
             else:
-                self.statusLabel.setText(f"총 {len(image_files)}개의 파일이 변환되었습니다.")
-                self.dropLabel.setText(f"{len(image_files)}개 변환 완료!")
+                self.statusLabel.setText(f"총 {summary['ok']}개의 파일이 변환되었습니다.{skipped_text}")
+                counts = [f"{name} {count}개" for name, count in (("실패", len(failures)), ("건너뜀", skipped)) if count]
+                self.dropLabel.setText(f"{summary['ok']}개 변환 완료!" + (f" ({', '.join(counts)})" if counts else ""))
 
-            # 성공 스타일
-            self.statusLabel.setStyleSheet(f"""
-                font-family: 'Arial';
-                font-size: 12px;
-                color: {CORNFLOWER_BLUE};
-            """)
-
-            self.frame.setStyleSheet(f"""
-                border: 2px solid {CORNFLOWER_BLUE};
-                border-radius: 12px;
-                background-color: {MEDIUM_GRAY}; 
-            """)
-
-            # 3초 후 원래 스타일과 메시지로 복원
-            QtCore.QTimer.singleShot(3000, lambda: self.frame.setStyleSheet(f"""
-                border: 2px dashed {DEEP_INDIGO};
-                border-radius: 12px;
-                background-color: {MEDIUM_GRAY};
-            """))
-            QtCore.QTimer.singleShot(3000, lambda: self.dropLabel.setText("파일을 여기에 드래그하세요"))
-            QtCore.QTimer.singleShot(3000, lambda: self.statusIcon.setText("🔄"))
-            QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setText("변환할 파일을 추가해 주세요"))
-            QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setStyleSheet(f"""
-                font-family: 'Arial';
-                font-size: 12px;
-                color: {CORNFLOWER_BLUE};
-            """))
-            QtCore.QTimer.singleShot(3000, lambda: self.progressBar.hide())
+        # 성공 스타일
+        self.statusLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {CORNFLOWER_BLUE};
+        """)
 
-    def makeFolder(self, filename):
-        # 설정에 따라 저장 위치 결정
-        base_name = '변환된_' + os.path.basename(filename)
+        self.frame.setStyleSheet(f"""
+            border: 2px solid {CORNFLOWER_BLUE};
+            border-radius: 12px;
+            background-color: {MEDIUM_GRAY}; 
+        """)
 
-        if self.save_location_type == "original":
-            # 원본 폴더에 저장
-            output_directory = os.path.dirname(filename)
-        elif self.save_location_type == "subfolder":
-            # 원본 폴더의 하위 폴더에 저장
-            output_directory = os.path.join(os.path.dirname(filename), self.save_location_path)
-            try:
-                os.makedirs(output_directory, exist_ok=True)
-            except Exception as e:
-                print(f"하위 폴더 생성 오류: {e}")
-                # 실패 시 원본 폴더에 저장
-                output_directory = os.path.dirname(filename)
-        elif self.save_location_type == "custom":
-            # 사용자 지정 폴더에 저장
-            output_directory = self.save_location_path
-            try:
-                os.makedirs(output_directory, exist_ok=True)
-            except Exception as e:
-                print(f"폴더 생성 오류: {e}")
-                # 실패 시 원본 폴더에 저장
-                output_directory = os.path.dirname(filename)
-        else:
-            # 기본값: 하위 폴더에 저장
-            output_directory = os.path.join(os.path.dirname(filename), "변환된 이미지")
-            try:
-                os.makedirs(output_directory, exist_ok=True)
-            except Exception as e:
-                print(f"기본 폴더 생성 오류: {e}")
-                # 실패 시 원본 폴더에 저장
-                output_directory = os.path.dirname(filename)
-
-        output_filename = os.path.join(output_directory, base_name)
-        output_filename = '"' + os.path.splitext(output_filename)[0] + '.webp' + '"'
-        return output_directory, output_filename
+        # 3초 후 원래 스타일과 메시지로 복원
+        QtCore.QTimer.singleShot(3000, lambda: self.frame.setStyleSheet(f"""
+            border: 2px dashed {DEEP_INDIGO};
+            border-radius: 12px;
+            background-color: {MEDIUM_GRAY};
+        """))
+        QtCore.QTimer.singleShot(3000, lambda: self.dropLabel.setText("파일을 여기에 드래그하세요"))
+        QtCore.QTimer.singleShot(3000, lambda: self.statusIcon.setText("🔄"))
+        QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setText("변환할 파일을 추가해 주세요"))
+        QtCore.QTimer.singleShot(3000, lambda: self.statusLabel.setStyleSheet(f"""
+            font-family: 'Arial';
+            font-size: 12px;
+            color: {CORNFLOWER_BLUE};
+        """))
+        QtCore.QTimer.singleShot(3000, lambda: self.progressBar.hide())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,328 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from converter import ORDERS, ConversionEngine
+from encoders import DEFAULT_PROFILE, ENCODERS, PROFILES, available_encoders, create_encoder, is_macos
+
+# 변환 벤치마크 - 항상 같은 합성 이미지 묶음을 만들어 인코더/품질/동시 변환 수 조합별로 측정
+# 예: python benchmark.py --encoders cwebp pillow --qualities 50 75 90 --workers 1 4 --orders input largest --out 결과.json
+# 결과 JSON 을 --compare 로 넘기면 이전 실행과 비교해서 출력
+# 프로그램 폴더의 benchmark.json 에 저장하면 설정 창의 프로필 옆에 측정값이 표시됨
+# 예: python benchmark.py --profiles fastest balanced smallest quality --out benchmark.json
+
+# resource 는 유닉스에서만 사용 가능 (윈도우에서는 메모리 사용량을 기록하지 않음)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 합성 이미지 생성에는 NumPy 와 Pillow 가 필요
+try:
+    import numpy as np
+    from PIL import Image, ImageDraw
+except ImportError:
+    np = None
+    Image = None
+    ImageDraw = None
+
+# 합성 이미지 묶음 구성 (종류: 파일 수) - --scale 로 파일 수를 늘리거나 줄임
+CORPUS_SPEC = {
+    "photo": 16,  # 1600x1200 JPEG 사진
+    "alpha": 16,  # 단색 도형과 투명 배경의 PNG
+    "icon": 32,  # 32~64px 아이콘 PNG
+    "panorama": 2,  # 10000x2500 JPEG 파노라마
+    "animated": 4  # 12프레임 움직이는 GIF
+}
+
+# 합성 이미지 생성 규칙이 바뀌면 올려서 이전에 만든 묶음을 다시 생성
+CORPUS_VERSION = 1
+
+# 측정 조합을 구분하는 설정 항목 (이 항목이 없는 이전 결과 파일은 기본값으로 비교)
+MATRIX_KEYS = ("encoder", "quality", "workers", "order", "profile")
+MATRIX_DEFAULTS = {"order": "input", "profile": DEFAULT_PROFILE}
+
+# 기본 합성 이미지 폴더 (같은 시드와 구성이면 다시 만들지 않음)
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "imagetowebp-benchmark")
+
+
+# 부드러운 색 변화와 잡음이 섞인 사진 같은 이미지
+def make_photo(rng, width, height):
+    base = rng.integers(0, 256, (max(height // 64, 2), max(width // 64, 2), 3), dtype=np.uint8)
+    image = Image.fromarray(base).resize((width, height), Image.BICUBIC)
+    noise = rng.normal(0, 6, (height, width, 3))
+    pixels = np.clip(np.asarray(image, dtype=np.float32) + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels)
+
+
+# 투명 배경 위에 단색 도형을 그린 이미지
+def make_shapes(rng, width, height, count):
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for _ in range(count):
+        x0, y0 = int(rng.integers(0, width)), int(rng.integers(0, height))
+        x1, y1 = x0 + int(rng.integers(4, width // 2 + 5)), y0 + int(rng.integers(4, height // 2 + 5))
+        color = tuple(int(value) for value in rng.integers(0, 256, 4))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+    return image
+
+
+# 도형이 움직이는 GIF 프레임
+def make_animation(rng, size, frames):
+    background = tuple(int(value) for value in rng.integers(0, 256, 3))
+    color = tuple(int(value) for value in rng.integers(0, 256, 3))
+    step = size // frames
+    images = []
+    for index in range(frames):
+        frame = Image.new("RGB", (size, size), background)
+        ImageDraw.Draw(frame).ellipse((index * step, size // 3, index * step + size // 3, size * 2 // 3),
+                                      fill=color)
+        images.append(frame.convert("P", palette=Image.ADAPTIVE))
+    return images
+
+
+def write_corpus_file(kind, rng, path):
+    if kind == "photo":
+        make_photo(rng, 1600, 1200).save(path, quality=90)
+    elif kind == "alpha":
+        make_shapes(rng, 800, 600, 12).save(path)
+    elif kind == "icon":
+        size = int(rng.choice([32, 48, 64]))
+        make_shapes(rng, size, size, 4).save(path)
+    elif kind == "panorama":
+        make_photo(rng, 10000, 2500).save(path, quality=90)
+    elif kind == "animated":
+        frames = make_animation(rng, 240, 12)
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=80, loop=0)
+
+
+# 합성 이미지 묶음 생성 (시드와 구성이 같으면 항상 같은 파일이 만들어짐)
+# 이미 같은 구성으로 만든 폴더가 있으면 다시 만들지 않고 파일 목록만 반환
+def build_corpus(directory, seed=0, scale=1.0):
+    extensions = {"photo": ".jpg", "alpha": ".png", "icon": ".png", "panorama": ".jpg", "animated": ".gif"}
+    counts = {kind: max(int(round(count * scale)), 1) for kind, count in CORPUS_SPEC.items()}
+    spec = {"version": CORPUS_VERSION, "seed": seed, "counts": counts}
+    files = [os.path.join(directory, f"{kind}_{index:03d}{extensions[kind]}")
+             for kind, count in counts.items() for index in range(count)]
+
+    spec_path = os.path.join(directory, "corpus.json")
+    try:
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == spec and all(os.path.exists(path) for path in files):
+                return files
+    except (OSError, ValueError):
+        pass
+
+    if np is None:
+        raise RuntimeError("합성 이미지를 만들려면 NumPy 와 Pillow 가 필요합니다.")
+    os.makedirs(directory, exist_ok=True)
+    print(f"합성 이미지 생성 중... ({len(files)}개, {directory})")
+    for kind, count in counts.items():
+        # 종류별로 시드를 나눠서 한 종류의 개수가 바뀌어도 다른 종류의 파일은 그대로 유지
+        rng = np.random.default_rng([seed, list(CORPUS_SPEC).index(kind)])
+        for index in range(count):
+            write_corpus_file(kind, rng, os.path.join(directory, f"{kind}_{index:03d}{extensions[kind]}"))
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+    return files
+
+
+# 정렬된 값에서 백분위 값 (가까운 순위 방식)
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+# 최대 메모리 사용량 (MB) - 이 프로세스와, 종료된 자식 프로세스(cwebp) 중 가장 큰 값
+def peak_rss():
+    if resource is None:
+        return None, None
+    # 리눅스는 KB, macOS 는 바이트 단위
+    unit = 1024 * 1024 if is_macos() else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return round(own, 1), round(children, 1)
+
+
+# 조합 하나를 측정 (최대 메모리 사용량을 따로 재기 위해 별도 프로세스에서 실행됨)
+def run_config(config, files, cwebp=None):
+    with tempfile.TemporaryDirectory(prefix="imagetowebp-bench-") as output_dir:
+        engine = ConversionEngine(quality=config["quality"], save_location_type="custom",
+                                  save_location_path=output_dir, workers=config["workers"],
+                                  cwebp=cwebp, manifest=None, dedupe=False, encoder=config["encoder"],
+                                  order=config.get("order", "input"), profile=config.get("profile", DEFAULT_PROFILE))
+        start = time.perf_counter()
+        results = []
+        finished = []  # 파일마다 결과가 나온 시각 (시작 기준)
+        for result in engine.run(files):
+            results.append(result)
+            finished.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - start
+
+        succeeded = [result for result in results if result.ok]
+        input_bytes = sum(os.path.getsize(result.source) for result in succeeded)
+        output_bytes = sum(os.path.getsize(result.output) for result in succeeded)
+
+    latencies = sorted(result.duration for result in results)
+    own_rss, child_rss = peak_rss()
+    return dict(config,
+                images=len(results),
+                failed=len(results) - len(succeeded),
+                elapsed=round(elapsed, 3),
+                # 절반의 결과가 나온 시각 (작은 이미지부터 변환하면 짧아짐, 전체 시간은 큰 이미지부터 변환하면 짧아짐)
+                half_done_s=round(percentile(finished, 50), 3),
+                images_per_sec=round(len(results) / elapsed, 2) if elapsed else 0.0,
+                p50_ms=round(percentile(latencies, 50) * 1000, 1),
+                p95_ms=round(percentile(latencies, 95) * 1000, 1),
+                peak_rss_mb=own_rss,
+                peak_child_rss_mb=child_rss,
+                input_bytes=input_bytes,
+                output_bytes=output_bytes,
+                compression_ratio=round(input_bytes / output_bytes, 3) if output_bytes else 0.0)
+
+
+# 같은 합성 이미지 옵션으로 이 스크립트를 새 파이썬 프로세스에서 실행
+# 리눅스에서는 최대 메모리 사용량이 자식 프로세스에 이어지므로 합성 이미지 생성과 각 조합 측정을 따로 실행함
+def run_child(args, extra, capture=True):
+    command = [sys.executable, os.path.abspath(__file__), "--corpus", args.corpus, "--seed", str(args.seed),
+               "--scale", str(args.scale)] + extra
+    if args.cwebp:
+        command += ["--cwebp", args.cwebp]
+    return subprocess.run(command, capture_output=capture, text=True)
+
+
+# 조합 하나를 새 프로세스에서 측정하고 결과를 받아옴
+def run_config_process(args, config):
+    process = run_child(args, ["--run-config", json.dumps(config)])
+    if process.returncode != 0:
+        raise RuntimeError(f"벤치마크 실행 오류 ({config}):\n{process.stderr.strip()}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+# 측정 조합 목록 (인코더 x 품질 x 동시 변환 수 x 변환 순서 x 프로필)
+def build_matrix(args):
+    return [{"encoder": encoder, "quality": quality, "workers": workers, "order": order, "profile": profile}
+            for encoder in args.encoders for quality in args.qualities for workers in args.workers
+            for order in args.orders for profile in args.profiles]
+
+
+# 측정 환경 정보 (비교할 때 같은 환경인지 확인용)
+def environment(args):
+    versions = {}
+    for name in args.encoders:
+        try:
+            versions[name] = create_encoder(name, args.cwebp).version()
+        except ValueError:
+            versions[name] = None
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "encoders": versions,
+        "corpus": {"version": CORPUS_VERSION, "seed": args.seed, "scale": args.scale}
+    }
+
+
+# 조합을 구분하는 키
+def config_key(result):
+    return tuple(result.get(key, MATRIX_DEFAULTS.get(key)) for key in MATRIX_KEYS)
+
+
+def print_result(result):
+    rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.0f}/{result['peak_child_rss_mb']:.0f}MB"
+    print(f"{result['encoder']:>7} {result['profile']:<8} q{result['quality']:<3} j{result['workers']:<3} "
+          f"{result['order']:<8} 전체 {result['elapsed']:7.2f}s  절반 {result['half_done_s']:7.2f}s  "
+          f"{result['images_per_sec']:8.2f} img/s  p50 {result['p50_ms']:8.1f}ms  p95 {result['p95_ms']:8.1f}ms  "
+          f"RSS {rss:>11}  압축률 {result['compression_ratio']:6.2f}x"
+          f"{'  실패 ' + str(result['failed']) if result['failed'] else ''}")
+
+
+# 이전 결과와 같은 조합끼리 비교해서 변화율 출력
+def print_comparison(results, previous):
+    previous_results = {config_key(result): result for result in previous.get("results", [])}
+    print("\n이전 결과와 비교 (img/s, 절반, p95, 압축률):")
+    for result in results:
+        old = previous_results.get(config_key(result))
+        if old is None:
+            continue
+
+        def change(key):
+            return (result[key] - old[key]) / old[key] * 100 if old.get(key) else 0.0
+
+        print(f"{result['encoder']:>7} {result['profile']:<8} q{result['quality']:<3} j{result['workers']:<3} "
+              f"{result['order']:<8} {change('images_per_sec'):+7.1f}%  {change('half_done_s'):+7.1f}%  {change('p95_ms'):+7.1f}%  "
+              f"{change('compression_ratio'):+7.1f}%")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="WEBP 변환 처리량, 지연 시간, 출력 크기를 측정합니다.")
+    parser.add_argument("--encoders", nargs="+", choices=ENCODERS, help="측정할 인코더 (기본값: 사용 가능한 전부)")
+    parser.add_argument("--qualities", nargs="+", type=int, default=[75], metavar="Q", help="측정할 품질 (기본값: 75)")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, os.cpu_count() or 1], metavar="N",
+                        help="측정할 동시 변환 수 (기본값: 1, CPU 코어 수)")
+    parser.add_argument("--orders", nargs="+", choices=ORDERS, default=["input"], metavar="ORDER",
+                        help="측정할 변환 순서 (input, largest, smallest, 기본값: input)")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=[DEFAULT_PROFILE], metavar="PROFILE",
+                        help=f"측정할 속도/용량 프로필 ({', '.join(PROFILES)}, 기본값: {DEFAULT_PROFILE})")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, metavar="DIR", help="합성 이미지 폴더")
+    parser.add_argument("--seed", type=int, default=0, help="합성 이미지 시드 (기본값: 0)")
+    parser.add_argument("--scale", type=float, default=1.0, help="합성 이미지 수 배율 (기본값: 1.0)")
+    parser.add_argument("--cwebp", metavar="PATH", help="사용할 cwebp 실행 파일 경로")
+    parser.add_argument("--out", metavar="JSON", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--compare", metavar="JSON", help="비교할 이전 결과 JSON 파일")
+    # 자식 프로세스용 (내부 사용) - 합성 이미지 생성, 조합 하나 측정
+    parser.add_argument("--prepare", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--run-config", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.prepare:
+        build_corpus(args.corpus, args.seed, args.scale)
+        return 0
+    if args.run_config:
+        files = build_corpus(args.corpus, args.seed, args.scale)
+        print(json.dumps(run_config(json.loads(args.run_config), files, args.cwebp)))
+        return 0
+
+    if run_child(args, ["--prepare"], capture=False).returncode != 0:
+        return 1
+    files = build_corpus(args.corpus, args.seed, args.scale)
+    args.encoders = args.encoders or available_encoders()
+    results = []
+    for config in build_matrix(args):
+        try:
+            result = run_config_process(args, config)
+        except RuntimeError as e:
+            print(str(e), file=sys.stderr)
+            continue
+        print_result(result)
+        results.append(result)
+
+    report = {"environment": environment(args), "images": len(files), "results": results}
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"결과 저장: {args.out}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,11 @@ if os.path.exists(output_folder):
 # output 폴더 생성
 os.makedirs(output_folder)
 
+# 움직이는 GIF 변환용 gif2webp.exe 가 있으면 함께 포함
+extra_data = []
+if os.path.exists(os.path.join(project_folder, 'gif2webp.exe')):
+    extra_data = ['--add-data', 'gif2webp.exe;.']
+
 # PyInstaller 실행
 print("PyInstaller로 exe 빌드 중...")
 subprocess.call([
@@ -30,6 +35,7 @@ subprocess.call([
     '--clean',
     '--add-data', 'cwebp.exe;.',
     '--add-data', 'icon.ico;.',
+    *extra_data,
     'ImageToWebp.py'
 ])
 
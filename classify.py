@@ -0,0 +1,132 @@
+import os
+
+from probe import is_animated_gif
+
+# 이미지 내용 분류 - 축소한 영상의 색 수, 투명도, 평평한 영역과 경계의 비율로
+# 사진(손실 압축)과 그래픽(로고, 스크린샷, 아이콘 - 무손실 압축)을 구분
+# 그래픽은 손실 압축하면 경계 주변이 번지고 용량도 무손실보다 큰 경우가 많음
+
+# NumPy 와 Pillow 는 선택 사항 (없으면 모든 파일을 손실 압축)
+np = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 분류 결과
+CONTENT_CLASSES = ("lossy", "near_lossless", "lossless")
+
+# 분류할 확장자 (JPEG 은 이미 손실 압축된 사진이므로 항상 손실 압축)
+CLASSIFY_EXTENSIONS = ('.png', '.gif')
+
+# 분류 전에 긴 변을 이 크기 이하로 축소 (색이 섞이지 않도록 NEAREST 로 축소)
+CLASSIFY_SIZE = 128
+
+# 색 수를 셀 때 사용할 최대 화소 수 (이보다 큰 이미지는 이 화소 수로 축소해서 셈)
+# 128 로 줄인 영상에서 세면 부드러운 그러데이션의 색이 빠져서 적게 셀 수 있으므로 따로 둠
+COLOR_SAMPLE_PIXELS = 4000000
+
+# 변환 없이 바로 색 수를 셀 수 있는 모드 (RGBA 로 바꿔도 색 수가 같음)
+COLOR_COUNT_MODES = ("RGB", "RGBA", "L", "P")
+
+# 색 수가 이 이하면 팔레트 이미지로 보고 무손실
+PALETTE_LIMIT = 256
+
+# 이웃한 두 픽셀의 색이 완전히 같은 비율 (불투명한 부분만) - 이 이상이면 무손실, 그보다 낮지만
+# NEAR_LOSSLESS_FLAT 이상이고 경계 비율이 EDGE_MIN 이상이면 near-lossless (사진은 잡음 때문에 거의 0)
+LOSSLESS_FLAT = 0.7
+NEAR_LOSSLESS_FLAT = 0.4
+
+# 이웃 픽셀과의 밝기 차이가 EDGE_THRESHOLD 보다 크면 경계로 봄
+EDGE_THRESHOLD = 48
+EDGE_MIN = 0.02
+
+# 투명도가 0 과 255 뿐인 (잘라낸 아이콘, 로고) 이미지는 기준을 이만큼 낮춤
+HARD_ALPHA_BONUS = 0.1
+
+
+# NumPy 는 불러오는 데 오래 걸리므로 available() 를 처음 호출할 때 불러옴
+# (명령줄 모드에서 무손실 자동 선택을 쓰지 않으면 불러오지 않음, 없으면 False)
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+# 분류하는 함수는 이 함수로 NumPy 를 불러온 뒤에만 사용
+def available():
+    return Image is not None and _import_numpy()
+
+
+# NEAREST 로 scale 배 축소 (1 이하면 그대로)
+def _shrink(image, scale):
+    if scale <= 1:
+        return image
+    width, height = image.size
+    return image.resize((max(round(width / scale), 1), max(round(height / scale), 1)), Image.NEAREST)
+
+
+# 분류에 쓰는 특징 (색 수, 투명도 여부, 투명도가 0/255 뿐인지, 평평한 비율, 경계 비율)
+# 원본 크기의 RGBA 사본은 만들지 않음 - 색 수는 원본 모드 그대로 (최대 COLOR_SAMPLE_PIXELS 화소) 세고
+# 나머지 특징은 원본 모드에서 축소한 작은 영상만 RGBA 로 바꿔서 계산
+def analyze(path):
+    with Image.open(path) as image:
+        width, height = image.size
+        sample = _shrink(image, (width * height / COLOR_SAMPLE_PIXELS) ** 0.5)
+        if sample.mode not in COLOR_COUNT_MODES:
+            sample = sample.convert("RGBA")
+        # PALETTE_LIMIT 를 넘으면 바로 멈춤
+        colors = sample.getcolors(maxcolors=PALETTE_LIMIT + 1)
+        image = _shrink(image, max(width, height) / CLASSIFY_SIZE).convert("RGBA")
+    pixels = np.asarray(image, dtype=np.int32)
+    alpha = pixels[..., 3]
+    opaque = alpha > 0
+    luma = pixels[..., 0] * 299 + pixels[..., 1] * 587 + pixels[..., 2] * 114  # 밝기 x 1000
+
+    # 가로, 세로로 이웃한 픽셀 쌍 중 둘 다 불투명한 쌍만 비교
+    same = []
+    edges = []
+    for first, second in ((np.s_[:, 1:], np.s_[:, :-1]), (np.s_[1:], np.s_[:-1])):
+        both = opaque[first] & opaque[second]
+        same.append(np.all(pixels[first] == pixels[second], axis=-1)[both])
+        edges.append((np.abs(luma[first] - luma[second]) > EDGE_THRESHOLD * 1000)[both])
+    same = np.concatenate(same)
+    edges = np.concatenate(edges)
+    return {
+        "colors": PALETTE_LIMIT + 1 if colors is None else len(colors),
+        "alpha": bool((alpha < 255).any()),
+        "hard_alpha": bool(np.isin(alpha, (0, 255)).all()),
+        "flat": float(same.mean()) if same.size else 1.0,
+        "edges": float(edges.mean()) if edges.size else 0.0
+    }
+
+
+# 특징으로 압축 방식 결정
+def decide(features):
+    if features["colors"] <= PALETTE_LIMIT:
+        return "lossless"
+    bonus = HARD_ALPHA_BONUS if features["alpha"] and features["hard_alpha"] else 0.0
+    if features["flat"] >= LOSSLESS_FLAT - bonus:
+        return "lossless"
+    if features["flat"] >= NEAR_LOSSLESS_FLAT - bonus and features["edges"] >= EDGE_MIN:
+        return "near_lossless"
+    return "lossy"
+
+
+# 파일 하나의 압축 방식 (분류할 수 없거나 읽지 못하면 lossy, 움직이는 GIF 는 GIF 변환 방식을 따름)
+# animated 는 엔진이 이미 읽은 헤더 정보 (None 이면 GIF 헤더를 직접 읽음)
+def classify(path, animated=None):
+    if not available() or os.path.splitext(path)[1].lower() not in CLASSIFY_EXTENSIONS:
+        return "lossy"
+    if is_animated_gif(path) if animated is None else animated:
+        return "lossy"
+    try:
+        return decide(analyze(path))
+    except Exception:
+        return "lossy"
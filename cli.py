@@ -0,0 +1,503 @@
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+
+from converter import GIF_MODES, LOSSLESS_MODES, ORDERS, QUALITY_MODES, ConversionEngine, load_settings, source_name
+from encoders import ENCODERS, METADATA_POLICIES, PROFILES
+from journal import DONE, FAILED, IN_FLIGHT, BatchJournal
+from planner import COLLISION_POLICIES
+from progress import ProgressTracker, format_bytes
+from report import write_report
+from timing import Tracer
+from walker import FileWalker
+from watcher import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, FolderWatcher
+
+# 명령줄 모드 - PyQt5 없이 변환 엔진만 사용 (빌드 서버, cron 등)
+# 예: python ImageToWebp.py convert a.png b.jpg -q 80 -j 8 --out 변환결과
+#     python ImageToWebp.py watch 업로드 --out 변환결과 (Ctrl+C 로 종료)
+
+# 명령줄에서 사용할 수 있는 명령
+COMMANDS = ("convert", "resume", "retry", "watch")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ImageToWebp.py", description="이미지를 WEBP 형식으로 변환합니다.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="이미지 파일을 WEBP로 변환")
+    convert_parser.add_argument("paths", nargs="+", help="변환할 이미지 파일 또는 폴더")
+    add_conversion_options(convert_parser)
+    convert_parser.add_argument("--archives", action="store_true", help="zip/tar 압축 파일 안의 이미지도 변환")
+    convert_parser.add_argument("--no-journal", action="store_true",
+                                help="배치 기록을 남기지 않음 (중간에 멈추면 resume 으로 이어서 변환할 수 없고 "
+                                     "retry 로 실패한 파일만 다시 변환할 수 없음)")
+    add_report_option(convert_parser)
+
+    for command, help_text in (("resume", "중간에 멈춘 마지막 배치를 이어서 변환 (저장된 설정 사용)"),
+                               ("retry", "마지막 배치에서 실패한 파일만 다시 변환 (저장된 설정 사용)")):
+        batch_parser = subparsers.add_parser(command, help=help_text)
+        batch_parser.add_argument("-j", "--jobs", type=int, help="동시에 실행할 변환 수 (기본값: 마지막 배치의 값)")
+        batch_parser.add_argument("--timing", action="store_true",
+                                  help="단계별 시간(폴더 생성, 프로세스 실행, 인코딩 등)과 가장 오래 걸린 파일 출력")
+        batch_parser.add_argument("--quiet", action="store_true", help="파일별 결과를 출력하지 않음")
+        add_report_option(batch_parser)
+
+    watch_parser = subparsers.add_parser("watch", help="폴더를 감시하면서 새로 생기거나 바뀐 이미지를 WEBP로 변환")
+    watch_parser.add_argument("paths", nargs="+", help="감시할 폴더")
+    add_conversion_options(watch_parser)
+    watch_parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE, metavar="SEC",
+                              help="파일 크기와 수정 시각이 이 시간 동안 바뀌지 않으면 다 쓰인 것으로 보고 변환 "
+                                   f"(기본값: {DEFAULT_DEBOUNCE:g}초)")
+    watch_parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, metavar="SEC",
+                              help="inotify 를 쓸 수 없을 때 폴더를 다시 확인하는 간격 "
+                                   f"(기본값: {DEFAULT_POLL_INTERVAL:g}초)")
+    watch_parser.add_argument("--polling", action="store_true", help="inotify 대신 폴링으로 감시 (네트워크 드라이브 등)")
+    watch_parser.add_argument("--new-only", action="store_true", help="감시를 시작할 때 이미 있던 파일은 변환하지 않음")
+    return parser
+
+
+def add_report_option(command_parser):
+    command_parser.add_argument("--report", metavar="FILE",
+                                help="파일별 결과(상태, 종료 코드, 오류, 걸린 시간, 크기)를 저장할 보고서 "
+                                     "(.json 이면 JSON, 그 외에는 CSV)")
+
+
+# convert 와 watch 에서 함께 쓰는 변환 옵션
+def add_conversion_options(command_parser):
+    command_parser.add_argument("-q", "--quality", type=int, choices=range(0, 101), metavar="0-100",
+                                help="변환 품질 (기본값: 설정 파일의 값)")
+    command_parser.add_argument("--quality-mode", choices=QUALITY_MODES,
+                                help="품질 결정 방식 (fixed: 지정한 품질, target_size: 목표 용량에 맞춤, "
+                                     "perceptual: 화질 기준에 맞춤)")
+    command_parser.add_argument("--target-kb", type=int, metavar="KB",
+                                help="파일마다 이 용량 이하가 되는 가장 높은 품질로 변환 (target_size 모드)")
+    floor = command_parser.add_mutually_exclusive_group()
+    floor.add_argument("--ssim", type=float, metavar="X",
+                       help="파일마다 SSIM 이 X 이상인 가장 낮은 품질로 변환 (perceptual 모드, 예: 0.95)")
+    floor.add_argument("--psnr", type=float, metavar="DB",
+                       help="파일마다 PSNR 이 DB 이상인 가장 낮은 품질로 변환 (perceptual 모드, 예: 40)")
+    command_parser.add_argument("--max-attempts", type=int, metavar="N",
+                                help="목표 용량/화질 기준 모드에서 파일 하나당 최대 인코딩 횟수")
+    command_parser.add_argument("--lossless", choices=LOSSLESS_MODES,
+                                help="로고, 스크린샷 같은 그래픽 PNG/GIF 를 무손실로 변환 (auto: 내용으로 판단, "
+                                     "smallest: 작은 이미지는 손실 압축과 비교해서 더 작은 쪽, 고정 품질 모드에서만)")
+    command_parser.add_argument("--lossless-level", type=int, choices=range(0, 10), metavar="0-9",
+                                help="무손실 압축 노력 수준 (클수록 작고 느림, 기본값: 6)")
+    command_parser.add_argument("-j", "--jobs", type=int, help="동시에 실행할 변환 수 (기본값: CPU 코어 수)")
+    command_parser.add_argument("--order", choices=ORDERS,
+                                help="변환 순서 (input: 입력 순서, largest: 큰 이미지부터 - 전체 시간 단축, "
+                                     "smallest: 작은 이미지부터 - 결과가 빨리 나옴)")
+    location = command_parser.add_mutually_exclusive_group()
+    location.add_argument("--out", metavar="DIR", help="변환된 파일을 저장할 폴더")
+    location.add_argument("--subfolder", metavar="NAME", help="원본 폴더의 하위 폴더에 저장")
+    location.add_argument("--in-place", action="store_true", help="원본 폴더에 저장")
+    command_parser.add_argument("--on-collision", choices=COLLISION_POLICIES,
+                                help="출력 파일 이름이 같을 때 (suffix: 이름 뒤에 (2) 등을 붙임 - 기본값, "
+                                     "skip: 이미 있으면 건너뜀, newer: 원본이 출력 파일보다 새로울 때만 덮어씀)")
+    command_parser.add_argument("--max-width", type=int, metavar="PX", help="이보다 넓은 이미지는 줄여서 변환 (확대하지 않음)")
+    command_parser.add_argument("--max-height", type=int, metavar="PX", help="이보다 높은 이미지는 줄여서 변환 (확대하지 않음)")
+    command_parser.add_argument("--max-megapixels", type=float, metavar="MP",
+                                help="화소 수가 이보다 많은 이미지는 줄여서 변환 (예: 2.0)")
+    command_parser.add_argument("--variants", metavar="W[:Q],...",
+                                help="파일마다 여러 너비로 변환 (예: 320:60,640,1280:80 -> 이름@320w.webp 등, "
+                                     "목록은 이름.variants.json)")
+    command_parser.add_argument("--encoder", choices=ENCODERS,
+                                help="인코더 백엔드 (cwebp: 외부 프로그램, pillow: 프로세스 없이 내장 libwebp 사용)")
+    command_parser.add_argument("--profile", choices=PROFILES,
+                                help="속도/용량 프로필 (fastest: 가장 빠름, balanced: 균형, smallest: 가장 작음, "
+                                     "quality: 화질 우선, 측정값은 benchmark.py --profiles 로 확인)")
+    command_parser.add_argument("--metadata", choices=METADATA_POLICIES,
+                                help="출력 파일에 남길 메타데이터 (none: 모두 제거 - 가장 작음, 기본값, icc: ICC 색 프로필, "
+                                     "exif: 촬영 정보, all: 모두), EXIF 방향은 설정과 관계없이 회전해서 적용")
+    command_parser.add_argument("--cwebp", metavar="PATH", help="사용할 cwebp 실행 파일 경로")
+    command_parser.add_argument("--no-cache", action="store_true", help="변환 캐시를 사용하지 않고 모두 다시 변환")
+    command_parser.add_argument("--hash", action="store_true",
+                                help="수정 시각이 바뀐 파일은 내용 해시로 다시 확인 (변환 캐시)")
+    command_parser.add_argument("--no-dedupe", action="store_true", help="내용이 같은 파일도 각각 변환")
+    command_parser.add_argument("--hardlink", action="store_true",
+                                help="내용이 같은 파일의 출력을 복사 대신 하드링크로 생성")
+    command_parser.add_argument("--include", action="append", metavar="GLOB",
+                                help="폴더에서 이 패턴과 일치하는 파일만 변환 (여러 번 지정 가능)")
+    command_parser.add_argument("--exclude", action="append", metavar="GLOB",
+                                help="폴더에서 이 패턴과 일치하는 파일/폴더 제외 (여러 번 지정 가능)")
+    command_parser.add_argument("--no-follow-symlinks", action="store_true", help="심볼릭 링크를 따라가지 않음")
+    command_parser.add_argument("--gif-mode", choices=GIF_MODES, help="움직이는 GIF 변환 방식 (gif2webp)")
+    command_parser.add_argument("--gif-kmax", type=int, metavar="N", help="움직이는 GIF 의 최대 키프레임 간격")
+    command_parser.add_argument("--gif-min-size", action="store_true", help="움직이는 GIF 용량 최소화 (느림)")
+    command_parser.add_argument("--timing", action="store_true",
+                                help="단계별 시간(폴더 생성, 프로세스 실행, 인코딩 등)과 가장 오래 걸린 파일 출력")
+    command_parser.add_argument("--trace", metavar="JSON",
+                                help="단계별 시간을 크롬 trace 형식으로 저장 (chrome://tracing, Perfetto)")
+    command_parser.add_argument("--quiet", action="store_true", help="파일별 결과를 출력하지 않음")
+
+
+# 명령줄 옵션을 설정 파일 값 위에 덮어씀
+def settings_from_args(args):
+    settings = load_settings()
+    if args.quality is not None:
+        settings["quality"] = args.quality
+    if args.target_kb is not None:
+        settings["quality_mode"] = "target_size"
+        settings["target_size_kb"] = args.target_kb
+    for metric in ("ssim", "psnr"):
+        if getattr(args, metric) is not None:
+            settings["quality_mode"] = "perceptual"
+            settings["perceptual_metric"] = metric
+            settings["perceptual_floor"] = getattr(args, metric)
+    if args.quality_mode:
+        settings["quality_mode"] = args.quality_mode
+    if args.max_attempts is not None:
+        settings["max_attempts"] = args.max_attempts
+    if args.lossless:
+        settings["lossless_mode"] = args.lossless
+    if args.lossless_level is not None:
+        settings["lossless_level"] = args.lossless_level
+    if args.jobs is not None:
+        settings["workers"] = args.jobs
+    if args.order:
+        settings["order"] = args.order
+    if args.out:
+        settings["save_location_type"] = "custom"
+        settings["save_location_path"] = args.out
+    elif args.subfolder:
+        settings["save_location_type"] = "subfolder"
+        settings["save_location_path"] = args.subfolder
+    elif args.in_place:
+        settings["save_location_type"] = "original"
+    if args.on_collision:
+        settings["collision_policy"] = args.on_collision
+    if args.no_cache:
+        settings["use_cache"] = False
+    if args.hash:
+        settings["cache_hash"] = True
+    if args.no_dedupe:
+        settings["dedupe"] = False
+    if args.hardlink:
+        settings["dedupe_link"] = "hardlink"
+    if args.include:
+        settings["include_patterns"] = ",".join(args.include)
+    if args.exclude:
+        settings["exclude_patterns"] = ",".join(args.exclude)
+    if getattr(args, "archives", False):
+        settings["scan_archives"] = True
+    if args.no_follow_symlinks:
+        settings["follow_symlinks"] = False
+    if args.max_width is not None:
+        settings["max_width"] = args.max_width
+    if args.max_height is not None:
+        settings["max_height"] = args.max_height
+    if args.max_megapixels is not None:
+        settings["max_megapixels"] = args.max_megapixels
+    if args.variants is not None:
+        settings["variants"] = args.variants
+    if args.encoder:
+        settings["encoder"] = args.encoder
+    if args.profile:
+        settings["profile"] = args.profile
+    if args.metadata:
+        settings["metadata"] = args.metadata
+    if args.trace:
+        settings["trace_path"] = args.trace
+    if args.gif_mode:
+        settings["gif_mode"] = args.gif_mode
+    if args.gif_kmax is not None:
+        settings["gif_kmax"] = args.gif_kmax
+    if args.gif_min_size:
+        settings["gif_min_size"] = True
+    return settings
+
+
+# 인코딩 전에 줄인 크기 (크기 변형 모드에서는 만든 변형 수)
+def resize_text(result):
+    if result.variants:
+        return f" (크기 변형 {len(result.variants)}개)"
+    if not result.resized:
+        return ""
+    return f" ({result.resized[0]}x{result.resized[1]}로 축소)"
+
+
+# EXIF 방향대로 회전해서 변환한 경우
+def orientation_text(result):
+    return " (회전)" if result.orientation != 1 else ""
+
+
+# 무손실 자동 선택에서 그래픽으로 분류되어 손실 압축하지 않은 경우
+def content_text(result):
+    if result.content == "lossless":
+        return " (무손실)"
+    if result.content == "near_lossless":
+        return " (near-lossless)"
+    return ""
+
+
+# 목표 용량/화질 기준 모드에서 파일별로 선택한 품질과 탐색 횟수
+def search_text(engine, result):
+    if engine.quality_mode == "target_size":
+        detail = ", 목표 초과" if result.target_missed else ""
+    elif engine.quality_mode == "perceptual":
+        detail = f", {engine.perceptual_metric.upper()} {result.score:.3f}"
+        if result.target_missed:
+            detail += " 기준 미달"
+    else:
+        return ""
+    return f" (품질 {result.quality}, {result.attempts}회 시도, {result.search_time:.2f}초{detail})"
+
+
+def run_convert(args):
+    settings = settings_from_args(args)
+    journal = None if args.no_journal else BatchJournal(args.paths, settings, args.cwebp)
+    return convert_batch(args, args.paths, settings, args.cwebp, journal)
+
+
+# 마지막 배치를 저장된 입력 경로와 설정으로 다시 탐색해서 끝나지 않은 파일만 변환
+def run_resume(args):
+    journal = BatchJournal.unfinished()
+    if journal is None:
+        print("이어서 변환할 배치가 없습니다.", file=sys.stderr)
+        return 2
+    settings = dict(journal.settings)
+    if args.jobs is not None:
+        settings["workers"] = args.jobs
+    print(f"이전 배치를 이어서 변환합니다. (완료 {journal.count(DONE)}개, 실패 {journal.count(FAILED)}개, "
+          f"변환 중에 멈춘 파일 {journal.count(IN_FLIGHT)}개)")
+    return convert_batch(args, journal.paths, settings, journal.cwebp, journal)
+
+
+# 마지막 배치에서 실패한 파일만 그때의 설정으로 다시 변환 (압축 파일 안의 파일은 압축 파일을 다시 탐색)
+def run_retry(args):
+    journal = BatchJournal.failed_batch()
+    if journal is None:
+        print("마지막 배치에서 실패한 파일이 없습니다.", file=sys.stderr)
+        return 2
+    settings = dict(journal.settings)
+    if args.jobs is not None:
+        settings["workers"] = args.jobs
+    print(f"마지막 배치에서 실패한 파일을 다시 변환합니다. ({len(journal.paths)}개)")
+    return convert_batch(args, journal.paths, settings, journal.cwebp, journal)
+
+
+# paths 를 탐색하면서 변환 (journal 이 있으면 파일마다 상태를 기록해서 중간에 멈춰도 이어서 변환할 수 있음)
+def convert_batch(args, paths, settings, cwebp, journal):
+    walker = FileWalker.from_settings(paths, settings)
+    try:
+        overrides = {"cwebp": cwebp, "journal": journal}
+        if args.timing and not settings.get("trace_path"):
+            overrides["tracer"] = Tracer()
+        engine = ConversionEngine.from_settings(settings, **overrides)
+        if journal is not None:
+            journal.open()
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    except OSError as e:
+        print(f"배치 기록을 만들 수 없습니다: {e}", file=sys.stderr)
+        return 2
+    try:
+        return convert_files(args, engine, walker)
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def convert_files(args, engine, walker):
+    start = time.perf_counter()
+    tracker = ProgressTracker(walker, engine=engine)
+    # --quiet 이고 터미널이면 파일별 출력 대신 한 줄짜리 진행 상황을 덮어쓰며 표시
+    live = args.quiet and sys.stderr.isatty()
+    if live:
+        threading.Thread(target=walker.measure, daemon=True).start()
+    total = 0
+    failed = 0
+    skipped = 0
+    duplicates = 0
+    saved_time = 0.0
+    search_time = 0.0
+    target_missed = 0
+    lossless = 0
+    icc_stripped = 0
+    rejected = 0
+    # 보고서를 저장할 때만 결과를 모아 둠 (파일이 수십만 개여도 메모리를 쓰지 않도록)
+    results = [] if args.report else None
+    try:
+        # Ctrl+C 를 누르면 임시 파일을 지우기 전에 변환을 먼저 닫아서 대기 중인 파일을 버리고 작업이 끝나기를 기다림
+        with walker, contextlib.closing(engine.run(walker)) as conversions:
+            for index, result in enumerate(conversions, 1):
+                total = index
+                if results is not None:
+                    results.append(result)
+                if tracker.add(result) and live:
+                    print(f"\r{tracker.snapshot().text()}\033[K", end="", file=sys.stderr, flush=True)
+                # 폴더 탐색이 끝나기 전에는 지금까지 찾은 파일 수를 표시
+                counter = f"[{index}/{walker.found}{'' if walker.finished else '+'}]"
+                name = source_name(result.source)
+                if result.skipped:
+                    skipped += 1
+                    if not args.quiet:
+                        print(f"{counter} 건너뜀 ({result.skip_reason or '변경 없음'}): {name}")
+                elif not result.ok:
+                    failed += 1
+                    if result.rejected:
+                        rejected += 1
+                    print(f"{counter} 실패: {name}\n{result.stderr.strip()}", file=sys.stderr)
+                elif result.duplicate_of:
+                    duplicates += 1
+                    saved_time += result.saved_time
+                    if not args.quiet:
+                        print(f"{counter} {name} -> {result.output} (중복: {source_name(result.duplicate_of)})")
+                else:
+                    search_time += result.search_time
+                    if result.target_missed:
+                        target_missed += 1
+                    if result.content in ("lossless", "near_lossless"):
+                        lossless += 1
+                    if result.icc_stripped:
+                        icc_stripped += 1
+                    if not args.quiet:
+                        print(f"{counter} {name} -> {result.output}{resize_text(result)}{orientation_text(result)}{content_text(result)}"
+                              f"{search_text(engine, result)}")
+    except KeyboardInterrupt:
+        # Ctrl+C - 실행 중인 cwebp 프로세스 종료
+        engine.cancel()
+        if live:
+            print(file=sys.stderr)
+        print("변환이 취소되었습니다.", file=sys.stderr)
+        if engine.journal is not None:
+            print("남은 파일은 'resume' 명령으로 이어서 변환할 수 있습니다.", file=sys.stderr)
+        save_report(args, results, time.perf_counter() - start)
+        return 130
+
+    if live:
+        print(file=sys.stderr)
+    for path in walker.unsupported:
+        print(f"지원하지 않는 파일: {path}", file=sys.stderr)
+    for path, error in walker.errors:
+        print(f"읽기 오류: {path} ({error})", file=sys.stderr)
+    for directory, error in engine.planner.errors:
+        print(f"폴더 생성 오류: {directory} ({error}) - 이 폴더에 저장할 파일은 원본 폴더에 저장했습니다.", file=sys.stderr)
+    if not total:
+        print("선택된 파일에 이미지 파일이 없습니다.", file=sys.stderr)
+        return 2
+
+    elapsed = time.perf_counter() - start
+    if engine.tracer.enabled:
+        engine.tracer.finish()
+    print(f"총 {total - failed - skipped}개의 파일이 변환되었습니다. "
+          f"({skipped}개 건너뜀, 실패 {failed}개, {elapsed:.1f}초)")
+    snapshot = tracker.snapshot()
+    if snapshot.bytes_in:
+        print(f"초당 {snapshot.rate:.1f}개, {format_bytes(snapshot.bytes_in)} → {format_bytes(snapshot.bytes_out)} "
+              f"({snapshot.saved * 100:.0f}% 절약)")
+    if rejected:
+        print(f"실패한 파일 중 {rejected}개는 헤더 검사에서 손상된 파일로 판정되어 인코더를 실행하지 않았습니다.")
+    if failed and engine.journal is not None:
+        print("실패한 파일만 다시 변환하려면 'retry' 명령을 사용하세요.")
+    if duplicates:
+        print(f"중복 파일 {duplicates}개는 한 번만 변환하여 약 {saved_time:.1f}초를 절약했습니다.")
+    if engine.lossless_enabled:
+        print(f"그래픽으로 분류된 {lossless}개 파일을 무손실 또는 near-lossless 로 변환했습니다.")
+    if engine.quality_mode == "target_size":
+        print(f"목표 용량 {engine.target_size_kb}KB 품질 탐색에 총 {search_time:.1f}초를 사용했습니다. "
+              f"(목표 초과 {target_missed}개)")
+    elif engine.quality_mode == "perceptual":
+        print(f"화질 기준 {engine.perceptual_metric.upper()} {engine.perceptual_floor} 품질 탐색에 "
+              f"총 {search_time:.1f}초를 사용했습니다. (기준 미달 {target_missed}개)")
+    if icc_stripped:
+        print(f"{icc_stripped}개 파일의 ICC 색 프로필을 제거했습니다. "
+              f"색이 달라 보이면 --metadata icc 로 다시 변환하세요.")
+    save_report(args, results, elapsed)
+    return 1 if failed else 0
+
+
+# --report 로 지정한 파일에 파일별 결과 저장
+def save_report(args, results, elapsed):
+    if results is None:
+        return
+    try:
+        write_report(results, args.report, elapsed)
+        print(f"보고서를 저장했습니다: {args.report}")
+    except OSError as e:
+        print(f"보고서 저장 오류: {args.report} ({e})", file=sys.stderr)
+
+
+# 폴더 감시 - 새로 생기거나 바뀐 이미지가 다 쓰이면 묶어서 변환 엔진으로 변환 (Ctrl+C 로 종료)
+# 변환 캐시가 켜져 있으면 다시 시작해도 이미 변환한 파일은 건너뜀
+def run_watch(args):
+    for path in args.paths:
+        if not os.path.isdir(path):
+            print(f"폴더가 아닙니다: {path}", file=sys.stderr)
+            return 2
+    settings = settings_from_args(args)
+    try:
+        overrides = {"cwebp": args.cwebp}
+        if args.timing and not settings.get("trace_path"):
+            overrides["tracer"] = Tracer()
+        engine = ConversionEngine.from_settings(settings, **overrides)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    watcher = FolderWatcher.from_settings(args.paths, settings, debounce=args.debounce,
+                                          poll_interval=args.poll_interval, polling=args.polling,
+                                          initial=not args.new_only)
+    converted = 0
+    failed = 0
+    try:
+        watcher.start()
+        print(f"폴더 감시 중 ({watcher.backend}): {', '.join(watcher.paths)} - Ctrl+C 로 종료합니다.", flush=True)
+        for batch in watcher.batches():
+            # 계속 실행되는 동안 측정 기록이 쌓이지 않도록 묶음마다 비우고 새로 측정 (기다린 시간은 빼고 측정)
+            if engine.tracer.enabled:
+                engine.tracer.reset()
+            with contextlib.closing(engine.run(batch)) as conversions:
+                for result in conversions:
+                    name = source_name(result.source)
+                    if result.skipped:
+                        if not args.quiet:
+                            print(f"건너뜀 ({result.skip_reason or '변경 없음'}): {name}")
+                    elif not result.ok:
+                        failed += 1
+                        print(f"실패: {name}\n{result.stderr.strip()}", file=sys.stderr, flush=True)
+                    else:
+                        converted += 1
+                        if not args.quiet:
+                            duplicate = f" (중복: {source_name(result.duplicate_of)})" if result.duplicate_of else ""
+                            print(f"{name} -> {result.output}{resize_text(result)}{orientation_text(result)}{content_text(result)}"
+                                  f"{search_text(engine, result)}{duplicate}", flush=True)
+            for path, error in watcher.errors:
+                print(f"읽기 오류: {path} ({error})", file=sys.stderr)
+            for directory, error in engine.planner.errors:
+                print(f"폴더 생성 오류: {directory} ({error}) - 원본 폴더에 저장했습니다.", file=sys.stderr)
+            watcher.errors = []
+            # 측정 결과는 묶음마다 출력하고 비움 (trace 파일은 마지막 묶음)
+            if engine.tracer.enabled:
+                engine.tracer.finish()
+                engine.tracer.reset()
+    except KeyboardInterrupt:
+        # Ctrl+C - 실행 중인 cwebp 프로세스 종료
+        engine.cancel()
+    finally:
+        watcher.close()
+    # 변환 중에 멈춘 묶음의 측정 결과
+    if engine.tracer.enabled and engine.tracer.events:
+        engine.tracer.finish()
+    print(f"감시를 종료합니다. (변환 {converted}개, 실패 {failed}개)")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "convert":
+        return run_convert(args)
+    if args.command == "resume":
+        return run_resume(args)
+    if args.command == "retry":
+        return run_retry(args)
+    if args.command == "watch":
+        return run_watch(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
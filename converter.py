@@ -0,0 +1,877 @@
+import os
+import platform
+import shutil
+import threading
+import time
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field, replace
+
+import classify
+import metrics
+from encoders import DEFAULT_PROFILE, GIF_MODES, METADATA_POLICIES, PROFILES, EncodeOptions, create_encoder
+from manifest import ConversionManifest, DEFAULT_MAX_ENTRIES, file_hash
+from metrics import DEFAULT_FLOORS, METRICS
+from planner import COLLISION_POLICIES, OutputPlanner
+from probe import oriented_size, probe_image
+from timing import NULL_TRACER, Tracer
+
+# 변환 엔진 - UI와 분리된 병렬 변환 로직 (실제 인코딩은 encoders 의 백엔드가 담당)
+
+# 설정 파일 경로 (실행 파일과 같은 디렉토리에 저장)
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.json')
+
+# 변환 가능한 이미지 확장자
+SUPPORTED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+# 품질 결정 방식 (fixed: 설정한 품질 그대로, target_size: 목표 용량 이하가 되는 가장 높은 품질,
+# perceptual: 화질 지표(SSIM/PSNR)가 기준 이상인 가장 낮은 품질)
+QUALITY_MODES = ("fixed", "target_size", "perceptual")
+
+# 무손실 자동 선택 (off: 항상 손실 압축, auto: 그래픽으로 분류된 PNG/GIF 는 무손실 또는 near-lossless,
+# smallest: auto 와 같지만 작은 이미지는 손실 압축도 해 보고 더 작은 쪽을 사용)
+LOSSLESS_MODES = ("off", "auto", "smallest")
+
+# 무손실 압축 노력 수준 (cwebp -z, 0~9) 과 near-lossless 전처리 강도 (0~100, 작을수록 작고 원본과 달라짐)
+DEFAULT_LOSSLESS_LEVEL = 6
+NEAR_LOSSLESS_LEVEL = 60
+
+# smallest 모드에서 두 방식으로 모두 인코딩해 볼 최대 화소 수 (백만 화소, 이보다 크면 분류 결과만 따름)
+COMPARE_MAX_MEGAPIXELS = 4.0
+
+# 변환 순서 (input: 입력 순서 그대로, largest: 오래 걸릴 파일부터 - 마지막에 큰 파일 하나만 남아
+# 나머지 코어가 노는 일을 막아 전체 시간을 줄임, smallest: 빨리 끝날 파일부터 - 결과가 빨리 쌓임)
+ORDERS = ("input", "largest", "smallest")
+
+# 변환 비용을 추정할 때 셀 GIF 프레임 수 상한
+COST_FRAME_LIMIT = 1000
+
+# 목표 용량/화질 기준 모드에서 파일 하나당 최대 인코딩 횟수 (0~100 을 이분 탐색하면 7번이면 충분)
+DEFAULT_MAX_ATTEMPTS = 7
+
+# 기본 설정값 (workers 가 0 이면 CPU 코어 수만큼 동시 변환)
+DEFAULT_SETTINGS = {
+    "quality": 75,
+    "quality_mode": "fixed",
+    "target_size_kb": 100,
+    "max_attempts": DEFAULT_MAX_ATTEMPTS,
+    "perceptual_metric": "ssim",
+    "perceptual_floor": DEFAULT_FLOORS["ssim"],
+    "max_width": 0,
+    "max_height": 0,
+    "max_megapixels": 0.0,
+    "variants": "",
+    "profile": DEFAULT_PROFILE,
+    "metadata": "none",
+    "lossless_mode": "off",
+    "lossless_level": DEFAULT_LOSSLESS_LEVEL,
+    "order": "input",
+    "save_location_type": "subfolder",
+    "save_location_path": "변환된 이미지",
+    "collision_policy": "suffix",
+    "workers": 0,
+    "use_cache": True,
+    "cache_hash": False,
+    "cache_max_entries": DEFAULT_MAX_ENTRIES,
+    "dedupe": True,
+    "dedupe_link": "copy",
+    "include_patterns": "",
+    "exclude_patterns": "",
+    "follow_symlinks": True,
+    "scan_archives": False,
+    "gif_mode": "lossy",
+    "gif_kmax": 0,
+    "gif_min_size": False,
+    "encoder": "cwebp",
+    "trace_path": ""
+}
+
+# 설정 파일 로드 함수 (저장되지 않은 항목은 기본값으로 채움)
+def load_settings():
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f))
+    except Exception as e:
+        print(f"설정 로드 오류: {str(e)}")
+    return settings
+
+
+# 설정 파일 저장 함수
+def save_settings(settings):
+    try:
+        with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(settings, f, ensure_ascii=False, indent=4)
+        return True
+    except Exception as e:
+        print(f"설정 저장 오류: {str(e)}")
+        return False
+
+
+# 리눅스 FICLONE ioctl (btrfs, xfs 등에서 내용을 복사하지 않고 공유하는 reflink 복사)
+FICLONE = 0x40049409
+
+
+# 이미 변환된 출력 파일을 중복 파일의 출력 위치로 복사
+# mode 가 "hardlink" 이면 하드링크, "copy" 이면 reflink 를 먼저 시도하고 실패 시 일반 복사
+def link_or_copy(source, destination, mode="copy"):
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if mode == "hardlink":
+        try:
+            os.link(source, destination)
+            return "hardlink"
+        except OSError:
+            pass
+    if platform.system() == "Linux":
+        try:
+            import fcntl
+            with open(source, 'rb') as src, open(destination, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except (OSError, ImportError):
+            pass
+    shutil.copyfile(source, destination)
+    return "copy"
+
+
+# 설정에 따라 변환 캐시 생성 (사용하지 않으면 None)
+def manifest_from_settings(settings):
+    if not settings.get("use_cache", True):
+        return None
+    return ConversionManifest(max_entries=settings.get("cache_max_entries", DEFAULT_MAX_ENTRIES),
+                              use_hash=settings.get("cache_hash", False))
+
+
+# 기본 동시 변환 수 (CPU 코어 수)
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# 이미지 확장자 확인
+def is_image_file(filename):
+    return os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+# 저장 위치 계산에 쓸 원래 경로 (압축 파일에서 꺼낸 파일은 압축 파일 옆 경로)
+def source_origin(filename):
+    return getattr(filename, "origin", filename)
+
+
+# 화면에 표시할 원본 파일 이름
+def source_name(filename):
+    return getattr(filename, "display_name", filename)
+
+
+# 크기 변형 목록 JSON 파일 이름의 끝부분
+VARIANT_MANIFEST_SUFFIX = '.variants.json'
+
+
+# 반응형 크기 변형 설정 ("320:60, 640, 1280:80" - 너비:품질, 품질을 생략하면 기본 품질)을
+# 너비 순으로 정렬한 [[너비, 품질 또는 None]] 목록으로 변환 (잘못된 항목은 건너뜀)
+def parse_variants(text):
+    variants = {}
+    for item in text.split(',') if text else []:
+        if not item.strip():
+            continue
+        width, _, quality = item.partition(':')
+        try:
+            width = int(width)
+            quality = min(max(int(quality), 0), 100) if quality.strip() else None
+        except ValueError:
+            print(f"잘못된 크기 변형 설정: {item.strip()}")
+            continue
+        if width > 0:
+            variants.setdefault(width, quality)
+    return [[width, quality] for width, quality in sorted(variants.items())]
+
+
+# 크기 변형 목록 JSON 경로 (예: 변환된_사진.webp -> 변환된_사진.variants.json)
+def variant_manifest_path(output_filename):
+    return os.path.splitext(output_filename)[0] + VARIANT_MANIFEST_SUFFIX
+
+
+# 크기 변형 출력 파일 경로 (예: 변환된_사진.variants.json -> 변환된_사진@640w.webp)
+def variant_path(manifest_filename, width):
+    return f"{manifest_filename[:-len(VARIANT_MANIFEST_SUFFIX)]}@{width}w.webp"
+
+
+# 파일 하나의 변환 결과
+@dataclass
+class ConversionResult:
+    source: str
+    output: str
+    output_folder: str
+    returncode: int = 0
+    stderr: str = ""
+    duration: float = 0.0
+    cancelled: bool = False
+    skipped: bool = False  # 변환 캐시에 따라 건너뜀
+    skip_reason: str = ""  # 변환 캐시가 아닌 이유로 건너뛴 경우 그 이유 (출력 파일 이름 충돌 등)
+    duplicate_of: str = ""  # 내용이 같은 파일의 변환 결과를 복사한 경우 그 원본 경로
+    saved_time: float = 0.0  # 중복 제거로 절약한 변환 시간
+    quality: int = 0  # 실제로 적용한 품질
+    attempts: int = 0  # 인코딩 횟수 (목표 용량/화질 기준 모드에서는 품질 탐색 횟수)
+    search_time: float = 0.0  # 목표 용량/화질 기준 모드에서 품질 탐색에 걸린 시간
+    score: float = 0.0  # 품질 탐색에서 잰 값 (목표 용량 모드: 바이트, 화질 기준 모드: SSIM/PSNR)
+    resized: tuple = None  # 인코딩 전에 줄인 (너비, 높이)
+    content: str = ""  # 무손실 자동 선택에서 실제로 사용한 압축 방식 (lossy, near_lossless, lossless)
+    input_bytes: int = 0  # 원본 파일 크기 (진행률 계산용)
+    output_bytes: int = 0  # 변환된 파일 크기 (크기 변형 모드에서는 모든 변형의 합)
+    variants: list = field(default_factory=list)  # 크기 변형 모드에서 만든 파일 목록 (output 은 목록 JSON)
+    target_missed: bool = False  # 시도한 어떤 품질로도 목표 용량이나 화질 기준을 만족하지 못한 경우
+    orientation: int = 1  # 원본의 EXIF 방향 (1 이 아니면 똑바로 세워서 변환함)
+    cost: int = 0  # 헤더로 추정한 변환 비용 (진행률 가중치, estimate_cost)
+    rejected: bool = False  # 헤더 검사에서 빈 파일, 이미지가 아닌 파일, 잘린 파일로 판정되어 인코딩하지 않음
+    encodes: list = field(default_factory=list)  # 인코더 호출마다의 기록 (종료 코드, 걸린 시간, 출력 크기, 배치 보고서용)
+    icc_stripped: bool = False  # 원본의 ICC 색 프로필을 남기지 않음 (넓은 색역 사진은 색이 달라 보일 수 있음)
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.cancelled
+
+
+# 파일 하나의 변환 비용 추정값 - 헤더에서 읽은 화소 수 (움직이는 이미지는 x 프레임 수)
+# 크기를 읽을 수 없는 파일은 파일 크기를 사용 (info 는 이미 읽은 헤더 정보)
+def estimate_cost(filename, info=None):
+    if info is None:
+        info = probe_image(filename, frame_limit=COST_FRAME_LIMIT, check_truncation=False)
+    if not info.size:
+        try:
+            return os.path.getsize(filename)
+        except OSError:
+            return 0
+    return info.cost
+
+
+# 파일이 있으면 삭제 (임시 파일 정리용)
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# 한 배치 안에서 내용 해시별로 처음 변환하는 파일 (같은 내용의 파일은 이 결과를 기다렸다가 복사)
+class _EncodedContent:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+# 인코딩을 최대 workers 개까지 동시에 실행하는 변환 엔진
+class ConversionEngine:
+    def __init__(self, quality=75, save_location_type="subfolder", save_location_path="변환된 이미지",
+                 workers=None, cwebp=None, manifest=None, dedupe=True, dedupe_link="copy",
+                 gif_mode="lossy", gif_kmax=0, gif_min_size=False, gif2webp=None, encoder="cwebp",
+                 quality_mode="fixed", target_size_kb=100, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 perceptual_metric="ssim", perceptual_floor=DEFAULT_FLOORS["ssim"], max_width=0, max_height=0,
+                 max_megapixels=0.0, variants=None, profile=DEFAULT_PROFILE, lossless_mode="off", lossless_level=DEFAULT_LOSSLESS_LEVEL,
+                 order="input", collision_policy="suffix", tracer=None, journal=None, metadata="none"):
+        self.quality = quality
+        self.quality_mode = quality_mode if quality_mode in QUALITY_MODES else "fixed"
+        self.target_size_kb = target_size_kb
+        self.max_attempts = max(max_attempts, 1)
+        self.perceptual_metric = perceptual_metric if perceptual_metric in METRICS else "ssim"
+        self.perceptual_floor = perceptual_floor
+        # 크기 제한 (0 이면 제한 없음)
+        self.max_width = max_width
+        self.max_height = max_height
+        self.max_megapixels = max_megapixels
+        # 반응형 크기 변형 [[너비, 품질 또는 None]] (비어 있으면 파일마다 하나만 변환)
+        self.variants = variants or []
+        self.order = order if order in ORDERS else "input"
+        # 속도/용량 프로필 (인코더 옵션 묶음)
+        self.profile = profile if profile in PROFILES else DEFAULT_PROFILE
+        # 출력 파일에 남길 메타데이터 (기본값은 모두 제거 - 가장 작음)
+        self.metadata = metadata if metadata in METADATA_POLICIES else "none"
+        # 무손실 자동 선택 (고정 품질 모드에서만 사용)
+        self.lossless_mode = lossless_mode if lossless_mode in LOSSLESS_MODES else "off"
+        self.lossless_level = min(max(lossless_level, 0), 9)
+        if self.quality_mode == "perceptual" and not metrics.available():
+            raise ValueError("화질 기준 모드를 사용할 수 없습니다. (NumPy 와 Pillow 가 설치되어 있는지 확인하세요)")
+        if self.lossless_mode != "off" and not classify.available():
+            raise ValueError("무손실 자동 선택을 사용할 수 없습니다. (NumPy 와 Pillow 가 설치되어 있는지 확인하세요)")
+        self.save_location_type = save_location_type
+        self.save_location_path = save_location_path
+        # 출력 경로 계획 (배치 안의 이름 충돌 해결, 출력 폴더는 폴더마다 한 번만 만듦)
+        self.collision_policy = collision_policy if collision_policy in COLLISION_POLICIES else "suffix"
+        self.planner = OutputPlanner(save_location_type, save_location_path, self.collision_policy)
+        self.workers = workers if workers and workers > 0 else default_workers()
+        self.manifest = manifest
+        self.dedupe = dedupe
+        self.dedupe_link = dedupe_link
+        self.gif_mode = gif_mode if gif_mode in GIF_MODES else "lossy"
+        self.gif_kmax = gif_kmax
+        self.gif_min_size = gif_min_size
+        # 인코더 백엔드 (이름 또는 인코더 객체)
+        self.encoder = create_encoder(encoder, cwebp, gif2webp) if isinstance(encoder, str) else encoder
+        # 단계별 시간 측정 (None 이면 측정하지 않음)
+        self.tracer = tracer or NULL_TRACER
+        self.encoder.tracer = self.tracer
+        # 배치 작업 기록 (None 이면 기록하지 않음, 이어서 변환할 때는 이미 끝난 파일을 건너뜀)
+        self.journal = journal
+        self._params = None
+        self._encoded = {}
+        # 변환 순서를 정하면서 읽은 헤더 정보 (파일 -> ImageInfo, 변환할 때 다시 읽지 않음)
+        self._probes = {}
+        # 변환 순서를 정한 파일의 비용 합 (진행률 가중치, 순서를 정하지 않으면 0)
+        self.scheduled_cost = 0
+
+        # 취소 상태
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, **overrides):
+        options = {
+            "quality": settings.get("quality", 75),
+            "quality_mode": settings.get("quality_mode", "fixed"),
+            "target_size_kb": settings.get("target_size_kb", 100),
+            "max_attempts": settings.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+            "perceptual_metric": settings.get("perceptual_metric", "ssim"),
+            "perceptual_floor": settings.get("perceptual_floor", DEFAULT_FLOORS["ssim"]),
+            "max_width": settings.get("max_width", 0),
+            "max_height": settings.get("max_height", 0),
+            "max_megapixels": settings.get("max_megapixels", 0.0),
+            "variants": parse_variants(settings.get("variants", "")),
+            "profile": settings.get("profile", DEFAULT_PROFILE),
+            "metadata": settings.get("metadata", "none"),
+            "lossless_mode": settings.get("lossless_mode", "off"),
+            "lossless_level": settings.get("lossless_level", DEFAULT_LOSSLESS_LEVEL),
+            "order": settings.get("order", "input"),
+            "save_location_type": settings.get("save_location_type", "subfolder"),
+            "save_location_path": settings.get("save_location_path", "변환된 이미지"),
+            "collision_policy": settings.get("collision_policy", "suffix"),
+            "workers": settings.get("workers", 0),
+            "manifest": manifest_from_settings(settings),
+            "dedupe": settings.get("dedupe", True),
+            "dedupe_link": settings.get("dedupe_link", "copy"),
+            "gif_mode": settings.get("gif_mode", "lossy"),
+            "gif_kmax": settings.get("gif_kmax", 0),
+            "gif_min_size": settings.get("gif_min_size", False),
+            "encoder": settings.get("encoder", "cwebp"),
+            # trace 파일 경로가 있으면 단계별 시간을 측정하고 배치가 끝나면 저장
+            "tracer": Tracer(settings["trace_path"]) if settings.get("trace_path") else None,
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    # 파일 하나의 출력 경로를 정함 (작업 스레드에 넘기기 전에 run() 에서 순서대로 호출)
+    def plan(self, filename):
+        with self.tracer.span("plan", filename):
+            return self.planner.plan(source_origin(filename), filename,
+                                     variant_manifest_path if self.variants else None)
+
+    # 파일 하나에 적용할 인코딩 옵션 (filename 이 None 이면 파일과 관계없는 공통 옵션)
+    # info 는 probe() 로 읽은 헤더 정보 (EXIF 방향과 크기)
+    def encode_options(self, filename, info=None):
+        return EncodeOptions(quality=self.quality, gif_mode=self.gif_mode, gif_kmax=self.gif_kmax,
+                             gif_min_size=self.gif_min_size, **PROFILES[self.profile],
+                             metadata=self.metadata, orientation=info.orientation if info is not None else 1,
+                             animated=info.animated if info is not None else None,
+                             resize=self.resize_target(filename, info) if filename is not None else None)
+
+    # 헤더만 읽어서 형식, 크기, 프레임 수, EXIF 방향 등을 확인하고 손상된 파일을 걸러냄
+    # (회전할 수 없는 인코더나 파일은 EXIF 방향을 1 로 봄)
+    def probe(self, filename, frame_limit=2):
+        with self.tracer.span("probe", filename):
+            info = probe_image(filename, frame_limit)
+        if info.orientation != 1 and not self.encoder.can_rotate(filename, info.animated):
+            info.orientation = 1
+        return info
+
+    # 최대 너비/높이/화소 수를 넘는 이미지를 줄일 크기 (비율 유지, 확대하지 않음, 줄일 필요가 없으면 None)
+    # 크기는 EXIF 방향대로 세운 뒤의 크기
+    def resize_target(self, filename, info=None):
+        if not (self.max_width or self.max_height or self.max_megapixels):
+            return None
+        if info is None:
+            info = self.probe(filename)
+        size = oriented_size(info.size, info.orientation)
+        if size is None or not size[0] or not size[1]:
+            return None
+        if not self.encoder.can_resize(filename, info.animated):
+            return None
+        width, height = size
+        scale = 1.0
+        if self.max_width:
+            scale = min(scale, self.max_width / width)
+        if self.max_height:
+            scale = min(scale, self.max_height / height)
+        if self.max_megapixels:
+            scale = min(scale, (self.max_megapixels * 1000000 / (width * height)) ** 0.5)
+        if scale >= 1.0:
+            return None
+        return max(int(width * scale), 1), max(int(height * scale), 1)
+
+    # 출력 결과에 영향을 주는 변환 옵션 (변환 캐시 키)
+    def encoder_params(self):
+        params = {
+            "encoder": self.encoder.name,
+            "version": self.encoder.version(),
+            "options": self.encode_options(None).as_params()
+        }
+        if self.max_width or self.max_height or self.max_megapixels:
+            params["resize"] = {"max_width": self.max_width, "max_height": self.max_height,
+                                "max_megapixels": self.max_megapixels}
+        if self.variants:
+            params["variants"] = self.variants
+        if self.lossless_enabled:
+            params["lossless"] = {"mode": self.lossless_mode, "level": self.lossless_level,
+                                  "near_lossless": NEAR_LOSSLESS_LEVEL}
+        if self.quality_mode == "target_size":
+            params["target_size"] = {"kb": self.target_size_kb, "max_attempts": self.max_attempts}
+        elif self.quality_mode == "perceptual":
+            params["perceptual"] = {"metric": self.perceptual_metric, "floor": self.perceptual_floor,
+                                    "max_attempts": self.max_attempts}
+        return params
+
+    # 무손실 자동 선택은 파일마다 하나만 만드는 고정 품질 모드에서만 적용
+    @property
+    def lossless_enabled(self):
+        return self.lossless_mode != "off" and self.quality_mode == "fixed" and not self.variants
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    # 변환 취소 - 새 작업을 시작하지 않고 실행 중인 인코딩을 중단함
+    def cancel(self):
+        self._cancel_event.set()
+        self.encoder.cancel()
+
+    # 파일 하나를 변환 (작업 스레드에서 실행됨, planned 는 plan() 으로 정한 출력 경로)
+    # 크기 변형 모드에서는 변형 목록 JSON 을 이 파일의 출력으로 봄 (변환 캐시도 이 파일로 확인)
+    def convert_one(self, filename, planned=None):
+        tracer = self.tracer
+        if planned is None:
+            planned = self.plan(filename)
+        output_filename = planned.filename
+        result = ConversionResult(filename, output_filename, planned.folder)
+        info = self._probes.pop(filename, None)
+        if info is not None:
+            result.cost = estimate_cost(filename, info)
+        try:
+            result.input_bytes = os.path.getsize(filename)
+        except OSError:
+            pass
+        if self.cancelled:
+            result.cancelled = True
+            return result
+        if planned.skip_reason:
+            result.skipped = True
+            result.skip_reason = planned.skip_reason
+            return result
+        if self.journal is not None:
+            if self.journal.completed(filename):
+                result.skipped = True
+                result.skip_reason = "이미 변환됨"
+                return result
+            self.journal.start(filename, output_filename)
+        # 압축 파일에서 꺼낸 임시 파일은 매번 경로가 바뀌므로 변환 캐시를 쓰지 않음
+        cacheable = self.manifest is not None and source_origin(filename) is filename
+        if cacheable:
+            with tracer.span("cache", filename):
+                up_to_date = self.manifest.is_up_to_date(filename, output_filename, self._params)
+            if up_to_date:
+                result.skipped = True
+                return result
+
+        # 헤더만 읽어서 빈 파일, 이미지가 아닌 파일, 잘린 파일은 인코더를 실행하기 전에 실패로 처리
+        if info is None:
+            info = self.probe(filename)
+            result.cost = estimate_cost(filename, info)
+        if not info.ok:
+            result.returncode = -1
+            result.rejected = True
+            result.stderr = f"변환할 수 없는 파일: {info.error}"
+            return result
+
+        # 같은 내용의 파일이 이미 변환 중이거나 변환되었으면 그 결과를 복사
+        content_hash = None
+        encoded = None
+        if self.dedupe and not self.variants:
+            try:
+                with tracer.span("hash", filename):
+                    content_hash = file_hash(filename)
+            except OSError:
+                pass
+        if content_hash is not None:
+            with self._lock:
+                primary = self._encoded.get(content_hash)
+                if primary is None:
+                    encoded = self._encoded[content_hash] = _EncodedContent()
+            if primary is not None:
+                return self.copy_duplicate(primary, result, content_hash)
+
+        try:
+            self.encode(filename, output_filename, result, info)
+
+            # 강제 종료된 경우 (출력 파일은 임시 파일에 쓴 뒤 이름을 바꾸므로 덜 쓰인 파일은 남지 않음)
+            if self.cancelled and result.returncode != 0:
+                result.cancelled = True
+            elif result.ok and cacheable:
+                with tracer.span("record", filename):
+                    self.manifest.record(filename, output_filename, self._params, content_hash)
+        finally:
+            if encoded is not None:
+                encoded.result = result
+                encoded.done.set()
+        return result
+
+    # 같은 내용의 파일이 변환되기를 기다렸다가 그 출력 파일을 복사
+    def copy_duplicate(self, primary, result, content_hash):
+        primary.done.wait()
+        source_result = primary.result
+        if source_result.cancelled or self.cancelled:
+            result.cancelled = True
+            return result
+        result.duplicate_of = source_result.source
+        if not source_result.ok:
+            result.returncode = source_result.returncode
+            result.stderr = source_result.stderr
+            return result
+
+        start = time.perf_counter()
+        temp_filename = result.output + '.tmp'
+        try:
+            if os.path.abspath(source_result.output) != os.path.abspath(result.output):
+                with self.tracer.span("copy", result.source):
+                    link_or_copy(source_result.output, temp_filename, self.dedupe_link)
+                    os.replace(temp_filename, result.output)
+        except OSError as e:
+            _remove_file(temp_filename)
+            result.returncode = -1
+            result.stderr = f"중복 파일 복사 오류: {e}"
+            return result
+        result.duration = time.perf_counter() - start
+        result.saved_time = source_result.duration
+        result.quality = source_result.quality
+        result.score = source_result.score
+        result.resized = source_result.resized
+        result.content = source_result.content
+        result.output_bytes = source_result.output_bytes
+        result.target_missed = source_result.target_missed
+        result.orientation = source_result.orientation
+        result.icc_stripped = source_result.icc_stripped
+        if self.manifest is not None and source_origin(result.source) is result.source:
+            self.manifest.record(result.source, result.output, self._params, content_hash)
+        return result
+
+    # 인코더로 파일 하나를 인코딩하고 종료 코드와 오류 메시지를 result 에 기록 (info 는 probe() 결과)
+    def encode(self, filename, output_filename, result, info=None):
+        start = time.perf_counter()
+        if info is None:
+            info = self.probe(filename)
+        result.orientation = info.orientation
+        result.icc_stripped = info.icc and self.metadata not in ("icc", "all")
+        if self.variants:
+            self.encode_variants(filename, output_filename, result, info)
+            result.duration = time.perf_counter() - start
+            return result
+        options = self.encode_options(filename, info)
+        result.resized = options.resize
+        if self.quality_mode == "target_size":
+            limit = self.target_size_kb * 1024
+            self.search_quality(filename, output_filename, result, options, os.path.getsize,
+                                lambda size: size <= limit, highest=True)
+            result.search_time = time.perf_counter() - start
+        elif self.quality_mode == "perceptual":
+            self.encode_perceptual(filename, output_filename, result, options)
+            result.search_time = time.perf_counter() - start
+        elif self.lossless_enabled:
+            self.encode_classified(filename, output_filename, result, options, info)
+        else:
+            self.encode_fixed(filename, output_filename, result, options)
+        result.duration = time.perf_counter() - start
+        if result.returncode == 0:
+            try:
+                result.output_bytes = os.path.getsize(output_filename)
+            except OSError:
+                pass
+        return result
+
+    # 인코더를 한 번 호출해서 targets ([(출력 파일, 인코딩 옵션)]) 를 만들고 (종료 코드, 오류 메시지) 반환
+    # 호출마다 종료 코드, 걸린 시간, 출력 크기, 실패 시 오류 메시지를 result.encodes 에 기록
+    def call_encoder(self, filename, targets, result):
+        start = time.perf_counter()
+        if len(targets) == 1:
+            returncode, stderr = self.encoder.encode(filename, *targets[0])
+        else:
+            returncode, stderr = self.encoder.encode_variants(filename, targets)
+        record = {"returncode": returncode, "duration": round(time.perf_counter() - start, 4),
+                  "qualities": [options.quality for _, options in targets], "output_bytes": 0}
+        if returncode == 0:
+            for output, _ in targets:
+                try:
+                    record["output_bytes"] += os.path.getsize(output)
+                except OSError:
+                    pass
+        else:
+            record["stderr"] = stderr.strip()
+        result.encodes.append(record)
+        return returncode, stderr
+
+    # 설정한 품질로 한 번 인코딩 (임시 파일에 쓴 뒤 이름을 바꿔서 중간에 종료되어도 덜 쓰인 출력 파일이 남지 않음)
+    def encode_fixed(self, filename, output_filename, result, options):
+        temp_filename = output_filename + '.tmp'
+        result.returncode, result.stderr = self.call_encoder(filename, [(temp_filename, options)], result)
+        result.quality = options.quality
+        result.attempts = 1
+        try:
+            if result.returncode == 0:
+                os.replace(temp_filename, output_filename)
+        except OSError as e:
+            result.returncode = -1
+            result.stderr = f"출력 파일 저장 오류: {e}"
+        finally:
+            _remove_file(temp_filename)
+        return result
+
+    # 내용을 분류해서 사진은 손실 압축, 그래픽은 무손실 또는 near-lossless 로 인코딩
+    # smallest 모드에서는 그래픽으로 분류된 작은 이미지를 손실 압축으로도 인코딩해서 더 작은 쪽을 사용
+    # (Pillow 백엔드는 원본을 한 번만 디코딩해서 두 방식으로 인코딩함)
+    # 비교할지는 실제로 인코딩할 크기 (EXIF 방향대로 세우고 줄인 뒤의 크기) 로 판단 (info 는 probe() 결과)
+    def encode_classified(self, filename, output_filename, result, options, info):
+        with self.tracer.span("classify", filename):
+            content = classify.classify(filename, options.animated)
+        result.content = content
+        if content == "lossy":
+            return self.encode_fixed(filename, output_filename, result, options)
+
+        lossless = replace(options, lossless=True, lossless_level=self.lossless_level,
+                           near_lossless=NEAR_LOSSLESS_LEVEL if content == "near_lossless" else 100)
+        size = options.resize or oriented_size(info.size, info.orientation)
+        if self.lossless_mode != "smallest" or size is None or \
+                size[0] * size[1] > COMPARE_MAX_MEGAPIXELS * 1000000:
+            return self.encode_fixed(filename, output_filename, result, lossless)
+
+        candidates = [(content, f"{output_filename}.{content}.tmp", lossless),
+                      ("lossy", f"{output_filename}.lossy.tmp", options)]
+        result.returncode, result.stderr = self.call_encoder(
+            filename, [(temp_filename, candidate_options) for _, temp_filename, candidate_options in candidates],
+            result)
+        result.quality = options.quality
+        result.attempts = len(candidates)
+        try:
+            if result.returncode == 0:
+                chosen, temp_filename, _ = min(candidates, key=lambda candidate: os.path.getsize(candidate[1]))
+                os.replace(temp_filename, output_filename)
+                result.content = chosen
+        except OSError as e:
+            result.returncode = -1
+            result.stderr = f"무손실/손실 비교 오류: {e}"
+        finally:
+            for _, temp_filename, _ in candidates:
+                _remove_file(temp_filename)
+        return result
+
+    # 화질 지표가 기준 이상인 가장 낮은 품질을 찾음 (원본은 한 번만 읽어서 축소해 둠)
+    # 크기를 줄여서 변환하는 경우에도 지표는 같은 크기로 축소한 영상끼리 비교함
+    def encode_perceptual(self, filename, output_filename, result, options):
+        try:
+            reference = metrics.load_luma(filename, orientation=options.orientation)
+        except Exception:
+            # 원본을 읽을 수 없으면 설정한 품질로 변환 (읽기 오류는 인코더가 알려줌)
+            return self.encode_fixed(filename, output_filename, result, options)
+        return self.search_quality(filename, output_filename, result, options,
+                                   lambda path: metrics.score(reference, path, self.perceptual_metric),
+                                   lambda value: value >= self.perceptual_floor, highest=False)
+
+    # 원본 하나를 여러 너비로 변환하고 (확대하지 않음) 변형 목록 JSON 저장
+    # 크기 변형 모드에서는 변형마다 지정한 품질(또는 기본 품질)을 그대로 사용하고 크기 제한은 적용하지 않음
+    def encode_variants(self, filename, manifest_filename, result, info):
+        size = oriented_size(info.size, info.orientation)
+        if size is None or not size[0] or not size[1]:
+            result.returncode = -1
+            result.stderr = "이미지 크기를 읽을 수 없습니다."
+            return result
+        width, height = size
+
+        targets = []
+        entries = []
+        for variant_width, quality in self.variants:
+            # 원본보다 큰 변형은 원본 크기 하나로 합침 (크기를 바꿀 수 없는 파일은 원본 크기 하나만 만듦)
+            target_width = min(variant_width, width) if self.encoder.can_resize(filename, info.animated) else width
+            if any(entry["width"] == target_width for entry in entries):
+                continue
+            target_height = max(round(height * target_width / width), 1)
+            quality = self.quality if quality is None else quality
+            output = variant_path(manifest_filename, target_width)
+            resize = (target_width, target_height) if target_width != width else None
+            targets.append((output + '.tmp', replace(self.encode_options(None, info), quality=quality,
+                                                     resize=resize)))
+            entries.append({"file": os.path.basename(output), "width": target_width, "height": target_height,
+                            "quality": quality})
+
+        # 변형도 임시 파일에 모두 쓴 뒤 이름을 바꿈 (목록 JSON 은 마지막에 저장하므로 목록이 있으면 변형도 모두 있음)
+        result.returncode, result.stderr = self.call_encoder(filename, targets, result)
+        result.attempts = len(targets)
+        outputs = [temp_filename[:-len('.tmp')] for temp_filename, _ in targets]
+        try:
+            if result.returncode == 0:
+                for (temp_filename, _), output in zip(targets, outputs):
+                    os.replace(temp_filename, output)
+        except OSError as e:
+            result.returncode = -1
+            result.stderr = f"크기 변형 저장 오류: {e}"
+        finally:
+            for temp_filename, _ in targets:
+                _remove_file(temp_filename)
+        if result.returncode != 0:
+            return result
+
+        manifest = {
+            "source": os.path.basename(source_origin(filename)),
+            "width": width,
+            "height": height,
+            "variants": entries,
+            "srcset": ", ".join(f"{entry['file']} {entry['width']}w" for entry in entries)
+        }
+        temp_filename = manifest_filename + '.tmp'
+        try:
+            for output, entry in zip(outputs, entries):
+                entry["bytes"] = os.path.getsize(output)
+            with open(temp_filename, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=4)
+            os.replace(temp_filename, manifest_filename)
+        except OSError as e:
+            _remove_file(temp_filename)
+            result.returncode = -1
+            result.stderr = f"크기 변형 목록 저장 오류: {e}"
+            return result
+        result.variants = outputs
+        result.output_bytes = sum(entry["bytes"] for entry in entries)
+        return result
+
+    # 품질을 이분 탐색하며 조건(accept)을 만족하는 품질을 찾음 (인코딩은 max_attempts 번까지)
+    # highest 이면 조건을 만족하는 가장 높은 품질, 아니면 가장 낮은 품질을 찾음
+    # 시도마다 임시 파일에 인코딩하고 measure 로 잰 값을 확인한 뒤, 고른 파일만 출력 파일로 옮김
+    # 모든 시도가 조건을 만족하지 못하면 조건에 가장 가까웠던 (마지막으로 실패한) 파일을 사용
+    def search_quality(self, filename, output_filename, result, options, measure, accept, highest):
+        low, high = 0, 100
+        quality = min(max(self.quality, low), high)  # 첫 시도는 설정한 품질
+        best = None  # 조건을 만족한 (품질, 임시 파일, 측정값)
+        fallback = None  # 조건을 만족하지 못한 것 중 가장 가까운 (품질, 임시 파일, 측정값)
+        try:
+            while low <= high and result.attempts < self.max_attempts:
+                if self.cancelled:
+                    result.returncode = -1
+                    return result
+                temp_filename = f"{output_filename}.q{quality}.tmp"
+                result.returncode, result.stderr = self.call_encoder(
+                    filename, [(temp_filename, replace(options, quality=quality))], result)
+                result.attempts += 1
+                if result.returncode != 0:
+                    _remove_file(temp_filename)
+                    return result
+
+                with self.tracer.span("measure", filename):
+                    value = measure(temp_filename)
+                if accept(value):
+                    if best is not None:
+                        _remove_file(best[1])
+                    best = (quality, temp_filename, value)
+                    if highest:
+                        low = quality + 1
+                    else:
+                        high = quality - 1
+                else:
+                    if fallback is not None:
+                        _remove_file(fallback[1])
+                    fallback = (quality, temp_filename, value)
+                    if highest:
+                        high = quality - 1
+                    else:
+                        low = quality + 1
+                quality = (low + high) // 2
+
+            chosen = best or fallback
+            result.quality = chosen[0]
+            result.score = chosen[2]
+            result.target_missed = best is None
+            os.replace(chosen[1], output_filename)
+        except (OSError, ValueError) as e:
+            result.returncode = -1
+            result.stderr = f"품질 탐색 오류: {e}"
+        finally:
+            for candidate in (best, fallback):
+                if candidate is not None:
+                    _remove_file(candidate[1])
+        return result
+
+    # 변환 순서에 맞게 파일 목록을 정렬 (정렬하려면 목록 전체가 필요하므로 폴더 탐색이 끝난 뒤 변환이 시작됨)
+    # 비용을 추정하려고 읽은 헤더 정보는 변환할 때 그대로 사용하고, 비용 합은 진행률 가중치로 사용
+    def schedule(self, filenames):
+        if self.order == "input":
+            return filenames
+        with self.tracer.span("schedule"):
+            files = []
+            for filename in filenames:
+                if self.cancelled:
+                    break
+                info = self._probes[filename] = self.probe(filename, COST_FRAME_LIMIT)
+                cost = estimate_cost(filename, info)
+                self.scheduled_cost += cost
+                files.append((cost, filename))
+            # 비용이 같으면 입력 순서 유지
+            files.sort(key=lambda item: item[0], reverse=self.order == "largest")
+        return [filename for _, filename in files]
+
+    # 파일 목록을 병렬로 변환하고 완료된 순서대로 결과를 반환
+    # filenames 는 제너레이터여도 되며, 대기 중인 작업은 workers 의 2배까지만 유지함
+    def run(self, filenames):
+        pending = set()
+        exhausted = False
+        self._encoded = {}
+        self._probes = {}
+        self.scheduled_cost = 0
+        source = iter(self.schedule(filenames))
+        self.planner.reset()
+        if self.journal is not None:
+            for output, owner in self.journal.reserved.items():
+                self.planner.reserve(output, owner)
+        if self.manifest is not None:
+            self._params = self.encoder_params()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                while not exhausted and not self.cancelled and len(pending) < self.workers * 2:
+                    try:
+                        with self.tracer.span("walk"):
+                            filename = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if self.journal is not None:
+                        self.journal.pending(filename)
+                    pending.add(executor.submit(self.convert_one, filename, self.plan(filename)))
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if self.journal is not None:
+                        self.journal.record(result)
+                    # 압축 파일에서 꺼낸 임시 파일 삭제
+                    release = getattr(result.source, "release", None)
+                    if release is not None:
+                        release()
+                    yield result
+            executor.shutdown(wait=True)
+            # 취소되지 않고 끝까지 변환함 - 이어서 변환할 것이 없음
+            if self.journal is not None and not self.cancelled:
+                self.journal.finish()
+        except BaseException:
+            # Ctrl+C 나 결과를 다 읽기 전에 닫힌 경우 - 대기 중인 작업은 버리고 실행 중인 인코딩을 중단한 뒤
+            # 작업 스레드가 끝날 때까지 기다림 (with 문의 shutdown 은 대기 중인 작업까지 모두 변환함)
+            self.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            if self.manifest is not None:
+                self.manifest.save()
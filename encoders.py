@@ -0,0 +1,435 @@
+import functools
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass, asdict
+
+from probe import EXIF_ORIENTATION, ORIENTATION_TRANSPOSE, is_animated_gif, oriented_size
+from timing import NULL_TRACER
+
+# Pillow 는 선택 사항 (설치되어 있으면 프로세스를 띄우지 않고 메모리에서 바로 변환 가능)
+try:
+    from PIL import Image, ImageSequence, PngImagePlugin, features
+except ImportError:
+    Image = None
+    ImageSequence = None
+    PngImagePlugin = None
+    features = None
+
+# 인코더 백엔드 - 실제 WEBP 인코딩 방식 (cwebp 프로세스 또는 Pillow 의 libwebp)
+
+# 움직이는 GIF 변환 방식 (gif2webp 옵션)
+GIF_MODES = {
+    "lossy": ["-lossy"],  # 손실 압축
+    "mixed": ["-mixed"],  # 프레임마다 손실/무손실 중 작은 쪽 선택
+    "lossless": []  # 무손실 (gif2webp 기본값)
+}
+
+# 속도/용량 프로필 - 이름별 인코더 옵션 (method: 0 빠름 ~ 6 가장 작음, multithread: 여러 스레드로 인코딩,
+# autofilter: 필터 강도 자동 조정, sharp_yuv: 색 경계를 선명하게 변환, 느림)
+# 프로필별 실제 속도와 압축률은 benchmark.py --profiles 로 측정 (설정 창에 표시됨)
+PROFILES = {
+    "fastest": {"method": 0, "multithread": True, "autofilter": False, "sharp_yuv": False},
+    "balanced": {"method": 4, "multithread": True, "autofilter": False, "sharp_yuv": False},  # cwebp 기본값 + -mt
+    "smallest": {"method": 6, "multithread": True, "autofilter": True, "sharp_yuv": False},
+    "quality": {"method": 6, "multithread": True, "autofilter": True, "sharp_yuv": True}
+}
+DEFAULT_PROFILE = "balanced"
+
+# 프로필별 측정값을 읽어올 벤치마크 결과 파일 (benchmark.py --out 으로 저장, 실행 파일과 같은 디렉토리)
+BENCHMARK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark.json')
+
+# 출력 파일에 남길 메타데이터 (cwebp -metadata 와 같은 이름, none: 모두 제거 - 가장 작음, icc: ICC 색 프로필,
+# exif: 촬영 정보, all: ICC + EXIF + XMP)
+METADATA_POLICIES = ("none", "icc", "exif", "all")
+
+# 무손실 압축 노력 수준 (cwebp -z, 0: 빠름 ~ 9: 가장 작음) 에 해당하는 libwebp 의 (method, quality)
+# Pillow 에는 -z 옵션이 없으므로 libwebp 의 WebPConfigLosslessPreset 과 같은 값으로 직접 지정
+LOSSLESS_PRESETS = {0: (0, 0), 1: (1, 20), 2: (2, 25), 3: (3, 30), 4: (3, 50),
+                    5: (4, 50), 6: (4, 75), 7: (4, 90), 8: (5, 90), 9: (6, 100)}
+
+# 윈도우에서 cwebp 실행 시 콘솔 창이 뜨지 않도록 설정
+POPEN_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+
+def is_macos():
+    system_info = platform.system()
+    return system_info == "Darwin"
+
+
+# exe 파일에서 실행될 경우의 상대경로로 설정
+if is_macos():
+    cwebp_path = os.path.join(os.path.dirname(__file__), 'cwebp')
+    gif2webp_path = os.path.join(os.path.dirname(__file__), 'gif2webp')
+else:
+    cwebp_path = os.path.join(os.path.dirname(__file__), 'cwebp.exe')
+    gif2webp_path = os.path.join(os.path.dirname(__file__), 'gif2webp.exe')
+
+
+# cwebp 버전 (변환 캐시 키에 사용, 실행 파일별로 한 번만 확인)
+@functools.lru_cache(maxsize=None)
+def encoder_version(cwebp):
+    try:
+        process = subprocess.run([cwebp, "-version"], capture_output=True, timeout=10, creationflags=POPEN_FLAGS)
+        return process.stdout.decode(errors="replace").strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+# 사용할 gif2webp 경로 (cwebp 와 같은 폴더 또는 PATH 에서 찾고, 없으면 None)
+def find_gif2webp(cwebp=None):
+    candidates = [gif2webp_path]
+    if cwebp:
+        name = os.path.basename(gif2webp_path)
+        candidates.insert(0, os.path.join(os.path.dirname(os.path.abspath(cwebp)), name))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which("gif2webp")
+
+
+# 파일 하나를 인코딩할 때의 옵션 (두 백엔드가 같은 의미로 해석함)
+@dataclass
+class EncodeOptions:
+    quality: int = 75
+    gif_mode: str = "lossy"
+    gif_kmax: int = 0
+    gif_min_size: bool = False
+    resize: tuple = None  # 인코딩 전에 줄일 (너비, 높이), None 이면 원본 크기
+    lossless: bool = False  # 무손실 압축 (quality 대신 lossless_level 사용)
+    lossless_level: int = 6  # 무손실 압축 노력 수준 (0~9)
+    near_lossless: int = 100  # near-lossless 전처리 강도 (0~100, 100 이면 사용 안 함)
+    method: int = 4  # 압축 노력 수준 (0~6, 프로필에서 결정)
+    multithread: bool = False
+    autofilter: bool = False
+    sharp_yuv: bool = False
+    metadata: str = "none"  # 남길 메타데이터 (METADATA_POLICIES)
+    orientation: int = 1  # 원본의 EXIF 방향 (1 이 아니면 똑바로 세워서 인코딩, resize 는 세운 뒤의 크기)
+    animated: bool = None  # 원본이 움직이는 이미지인지 (엔진이 헤더 검사 결과로 채움, None 이면 인코더가 파일을 직접 확인)
+
+    def as_params(self):
+        return asdict(self)
+
+
+# 원본 이미지에서 policy 에 맞게 남길 메타데이터 (Pillow 저장 옵션 이름 -> 값)
+# 출력 이미지는 똑바로 세워서 저장하므로 EXIF 방향은 1 로 바꿈 (뷰어가 한 번 더 회전하지 않도록)
+def keep_metadata(image, policy):
+    kept = {}
+    if policy in ("icc", "all") and image.info.get("icc_profile"):
+        kept["icc_profile"] = image.info["icc_profile"]
+    if policy in ("exif", "all"):
+        exif = image.getexif()
+        if exif:
+            if EXIF_ORIENTATION in exif:
+                exif[EXIF_ORIENTATION] = 1
+            kept["exif"] = exif.tobytes()
+    xmp = image.info.get("xmp")
+    if policy == "all" and xmp:
+        kept["xmp"] = xmp.encode() if isinstance(xmp, str) else xmp
+    return kept
+
+
+# cwebp / gif2webp 프로세스로 인코딩
+class CwebpEncoder:
+    name = "cwebp"
+    tracer = NULL_TRACER  # 단계별 시간 측정 (엔진이 설정)
+
+    def __init__(self, cwebp=None, gif2webp=None):
+        self.cwebp = cwebp or cwebp_path
+        self.gif2webp = gif2webp or find_gif2webp(self.cwebp)
+
+        # 취소 상태와 실행 중인 프로세스 (취소 시 강제 종료)
+        self._cancel_event = threading.Event()
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def version(self):
+        versions = {"cwebp": encoder_version(self.cwebp)}
+        if self.gif2webp:
+            versions["gif2webp"] = encoder_version(self.gif2webp)
+        return versions
+
+    # 움직이는 GIF 는 모든 프레임을 유지하도록 gif2webp 로 변환 (정지 GIF 는 cwebp 로 빠르게 변환)
+    # animated 는 엔진이 이미 읽은 헤더 정보 (None 이면 GIF 헤더를 직접 읽음)
+    def uses_gif2webp(self, filename, animated=None):
+        if not self.gif2webp or os.path.splitext(filename)[1].lower() != '.gif':
+            return False
+        return is_animated_gif(filename) if animated is None else animated
+
+    # gif2webp 는 크기 조정 옵션이 없음
+    def can_resize(self, filename, animated=None):
+        return not self.uses_gif2webp(filename, animated)
+
+    # cwebp 는 EXIF 방향을 적용하지 않으므로 Pillow 로 미리 회전해서 넘김 (Pillow 가 없으면 회전하지 않음)
+    def can_rotate(self, filename, animated=None):
+        return Image is not None and not self.uses_gif2webp(filename, animated)
+
+    def build_command(self, filename, output_filename, options):
+        if self.uses_gif2webp(filename, options.animated):
+            return self.build_gif_command(filename, output_filename, options)
+        if options.lossless:
+            command = [self.cwebp, filename, "-z", str(options.lossless_level)]
+            if options.near_lossless < 100:
+                command += ["-near_lossless", str(options.near_lossless)]
+        else:
+            command = [self.cwebp, filename, "-q", str(options.quality), "-m", str(options.method)]
+            if options.autofilter:
+                command.append("-af")
+            if options.sharp_yuv:
+                command.append("-sharp_yuv")
+        if options.multithread:
+            command.append("-mt")
+        if options.resize:
+            command += ["-resize", str(options.resize[0]), str(options.resize[1])]
+        if options.metadata != "none":
+            command += ["-metadata", options.metadata]
+        return command + ["-o", output_filename]
+
+    def build_gif_command(self, filename, output_filename, options):
+        command = [self.gif2webp, filename, "-q", str(options.quality), "-m", str(options.method),
+                   "-mt"] + GIF_MODES[options.gif_mode]
+        if options.gif_kmax > 0:
+            # 최대 키프레임 간격 (kmin 은 gif2webp 가 kmax 에 맞게 자동 조정)
+            command += ["-kmax", str(options.gif_kmax)]
+        if options.gif_min_size:
+            command.append("-min_size")
+        if options.metadata in ("icc", "all"):
+            # GIF 에는 EXIF 가 없음
+            command += ["-metadata", options.metadata]
+        return command + ["-o", output_filename]
+
+    # (종료 코드, 오류 메시지) 반환
+    # 회전해야 하는 이미지는 똑바로 세운 임시 PNG 를 만들어서 cwebp 에 넘기고 끝나면 삭제
+    def encode(self, filename, output_filename, options):
+        if options.orientation == 1 or not self.can_rotate(filename, options.animated):
+            return self.run(filename, output_filename, options)
+        oriented_filename = output_filename + ".orient.tmp"
+        try:
+            try:
+                with self.tracer.span("orient", filename):
+                    self.write_oriented(filename, oriented_filename, options)
+            except Exception as e:
+                return 1, f"{type(e).__name__}: {e}"
+            return self.run(oriented_filename, output_filename, options)
+        finally:
+            try:
+                os.remove(oriented_filename)
+            except OSError:
+                pass
+
+    # 원본을 EXIF 방향대로 세워서 PNG 로 저장 (빨리 쓰도록 압축 수준 1)
+    # 남길 메타데이터도 PNG 에 넣어서 cwebp -metadata 가 읽도록 함
+    @staticmethod
+    def write_oriented(filename, oriented_filename, options):
+        with Image.open(filename) as image:
+            kept = keep_metadata(image, options.metadata)
+            image = image.transpose(ORIENTATION_TRANSPOSE[options.orientation])
+        if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        if "xmp" in kept:
+            info = PngImagePlugin.PngInfo()
+            info.add_itxt("XML:com.adobe.xmp", kept.pop("xmp").decode("utf-8", "replace"))
+            kept["pnginfo"] = info
+        image.save(oriented_filename, format="PNG", compress_level=1, **kept)
+
+    # cwebp 프로세스 실행
+    # 디코딩, 인코딩, 파일 쓰기는 모두 cwebp 프로세스 안에서 일어나므로 "encode" 단계로 함께 측정
+    def run(self, filename, output_filename, options):
+        try:
+            with self.tracer.span("spawn", filename):
+                process = subprocess.Popen(self.build_command(filename, output_filename, options),
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                           creationflags=POPEN_FLAGS)
+        except OSError as e:
+            return -1, str(e)
+
+        with self._lock:
+            self._processes.add(process)
+        # 프로세스 등록 직전에 취소된 경우도 종료
+        if self._cancel_event.is_set():
+            process.kill()
+        try:
+            with self.tracer.span("encode", filename):
+                _, stderr = process.communicate()
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+        return process.returncode, stderr.decode(errors="replace")
+
+    # 여러 출력 파일로 인코딩 (프로세스마다 원본을 다시 디코딩함, 처음 실패한 결과를 반환)
+    def encode_variants(self, filename, targets):
+        for output_filename, options in targets:
+            returncode, stderr = self.encode(filename, output_filename, options)
+            if returncode != 0:
+                return returncode, stderr
+        return 0, ""
+
+    # 실행 중인 프로세스를 모두 종료
+    def cancel(self):
+        self._cancel_event.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+
+# Pillow (libwebp) 로 프로세스 없이 메모리에서 바로 인코딩
+class PillowEncoder:
+    name = "pillow"
+    tracer = NULL_TRACER  # 단계별 시간 측정 (엔진이 설정)
+
+    @classmethod
+    def available(cls):
+        return Image is not None and features.check("webp")
+
+    def version(self):
+        return {"pillow": Image.__version__, "libwebp": features.version_module("webp")}
+
+    def can_resize(self, filename, animated=None):
+        return True
+
+    def can_rotate(self, filename, animated=None):
+        return True
+
+    def encode(self, filename, output_filename, options):
+        return self.encode_variants(filename, [(output_filename, options)])
+
+    # 원본을 한 번만 읽고 디코딩해서 여러 출력 파일로 인코딩 (targets: [(출력 파일, 인코딩 옵션)])
+    def encode_variants(self, filename, targets):
+        try:
+            with self.tracer.span("read", filename), open(filename, 'rb') as f:
+                data = f.read()
+            with Image.open(io.BytesIO(data)) as image:
+                animated = getattr(image, "is_animated", False)
+                orientation = 1 if animated else targets[0][1].orientation
+                # 움직이는 이미지는 첫 프레임만 디코딩되고 나머지는 인코딩하면서 디코딩됨
+                with self.tracer.span("decode", filename):
+                    # 출력 크기는 세운 뒤의 크기이므로 원본 방향으로 되돌려서 비교
+                    sizes = [oriented_size(options.resize, orientation) for _, options in targets]
+                    if all(sizes) and not animated:
+                        # JPEG 은 가장 큰 출력 크기 이상이 되는 범위에서 미리 줄여서 (1/2, 1/4, 1/8) 디코딩
+                        image.draft("RGB", max(sizes))
+                    image.load()
+                metadata = {policy: keep_metadata(image, policy) for policy in
+                            {options.metadata for _, options in targets if options.metadata != "none"}}
+                if orientation != 1:
+                    with self.tracer.span("orient", filename):
+                        image = image.transpose(ORIENTATION_TRANSPOSE[orientation])
+                for output_filename, options in targets:
+                    self.save(filename, image, output_filename, options, animated,
+                              metadata.get(options.metadata, {}))
+        except Exception as e:
+            return 1, f"{type(e).__name__}: {e}"
+        return 0, ""
+
+    # 디코딩한 이미지를 옵션에 맞게 줄이고 인코딩해서 저장
+    # metadata 는 출력 파일에 남길 메타데이터 (없으면 모두 제거)
+    def save(self, filename, image, output_filename, options, animated, metadata=None):
+        # Pillow 는 -mt, -af, -sharp_yuv 에 해당하는 옵션이 없으므로 method 만 적용
+        save_options = {"format": "WEBP", "quality": options.quality, "method": options.method}
+        save_options.update(metadata or {})
+        if options.lossless and not animated:
+            # Pillow 는 near-lossless 옵션이 없으므로 무손실로 인코딩
+            method, quality = LOSSLESS_PRESETS[options.lossless_level]
+            save_options.update(lossless=True, method=method, quality=quality)
+        if animated:
+            # 움직이는 GIF - gif2webp 와 같은 옵션으로 모든 프레임 인코딩
+            save_options.update(save_all=True,
+                                lossless=options.gif_mode == "lossless",
+                                allow_mixed=options.gif_mode == "mixed",
+                                minimize_size=options.gif_min_size)
+            if options.gif_kmax > 0:
+                kmax = options.gif_kmax
+                save_options.update(kmax=kmax, kmin=kmax // 2 + 1 if kmax > 2 else kmax - 1)
+        if options.resize:
+            with self.tracer.span("resize", filename):
+                image, save_options = self.resize(image, options.resize, save_options)
+        buffer = io.BytesIO()
+        with self.tracer.span("encode", filename):
+            image.save(buffer, **save_options)
+        with self.tracer.span("write", filename), open(output_filename, 'wb') as f:
+            f.write(buffer.getvalue())
+
+    # 이미지를 size 로 줄임 (움직이는 이미지는 모든 프레임을 줄이고 프레임 시간을 유지)
+    @staticmethod
+    def resize(image, size, save_options):
+        if not getattr(image, "is_animated", False):
+            if image.mode not in ("RGB", "RGBA", "L", "LA"):
+                image = image.convert("RGBA")
+            return image.resize(size, Image.LANCZOS, reducing_gap=3.0), save_options
+
+        frames = []
+        durations = []
+        for frame in ImageSequence.Iterator(image):
+            frames.append(frame.convert("RGBA").resize(size, Image.LANCZOS))
+            durations.append(frame.info.get("duration", 100))
+        save_options = dict(save_options, append_images=frames[1:], duration=durations,
+                            loop=image.info.get("loop", 0))
+        return frames[0], save_options
+
+    # 메모리 안에서 진행 중인 인코딩은 중단할 수 없으므로 현재 파일이 끝나면 멈춤
+    def cancel(self):
+        pass
+
+
+# 사용할 수 있는 인코더 백엔드 (설정 값 -> 클래스)
+ENCODERS = {
+    CwebpEncoder.name: CwebpEncoder,
+    PillowEncoder.name: PillowEncoder
+}
+
+
+def available_encoders():
+    return [name for name, encoder in ENCODERS.items() if encoder.available()]
+
+
+# 설정 값에 맞는 인코더 생성 (사용할 수 없으면 ValueError)
+def create_encoder(name="cwebp", cwebp=None, gif2webp=None):
+    encoder = ENCODERS.get(name)
+    if encoder is None:
+        raise ValueError(f"알 수 없는 인코더: {name}")
+    if not encoder.available():
+        raise ValueError(f"{name} 인코더를 사용할 수 없습니다. (Pillow 가 설치되어 있는지 확인하세요)")
+    if encoder is CwebpEncoder:
+        return CwebpEncoder(cwebp, gif2webp)
+    return encoder()
+
+
+# 결과 파일에서 인코더별, 프로필별 대표 측정값 (초당 변환 수, 압축률)
+# 입력 순서로 측정한 결과 중 동시 변환 수가 가장 큰 것을 사용하고, 품질이 여러 개면 평균
+def profile_summary(report, encoder):
+    rows = {}
+    for result in report.get("results", []):
+        if result.get("encoder") != encoder or result.get("order", "input") != "input":
+            continue
+        rows.setdefault(result.get("profile", DEFAULT_PROFILE), []).append(result)
+    summary = {}
+    for profile, results in rows.items():
+        workers = max(result["workers"] for result in results)
+        results = [result for result in results if result["workers"] == workers]
+        summary[profile] = {
+            "workers": workers,
+            "images_per_sec": sum(result["images_per_sec"] for result in results) / len(results),
+            "compression_ratio": sum(result["compression_ratio"] for result in results) / len(results)
+        }
+    return summary
+
+
+# 결과 파일이 없거나 읽을 수 없으면 빈 dict
+def load_profile_summary(encoder, path=BENCHMARK_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return profile_summary(json.load(f), encoder)
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
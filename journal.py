@@ -0,0 +1,210 @@
+import glob
+import json
+import os
+import threading
+import time
+
+# 배치 작업 기록 (write-ahead journal) - 변환 중에 프로그램이 종료되거나 강제 종료되어도
+# 마지막 배치를 멈춘 곳부터 이어서 변환할 수 있도록 파일마다 상태를 JSON 한 줄씩 덧붙여 기록
+# 첫 줄은 배치 정보 (입력 경로, 설정), 그 뒤로 파일마다 pending(대기) -> start(변환 중) -> done/failed
+# 한 줄씩 바로 flush 하므로 프로그램이 죽어도 그 전까지의 기록은 남음 (마지막 줄이 잘려 있으면 무시)
+
+# 기록 파일 경로 (설정 파일과 같은 디렉토리에 저장, 새 배치를 시작하면 덮어씀)
+JOURNAL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'batch_journal.jsonl')
+
+# 파일 상태
+PENDING = "pending"
+IN_FLIGHT = "start"
+DONE = "done"
+FAILED = "failed"
+
+
+# 기록에 쓸 원본 파일 이름 (절대 경로, 압축 파일에서 꺼낸 파일은 "압축 파일:안의 경로")
+# 압축 파일은 이어서 변환할 때 다른 임시 폴더에 다시 꺼내므로 임시 파일 경로를 쓰지 않음
+def journal_key(filename):
+    archive = getattr(filename, "archive", None)
+    if archive is not None:
+        return f"{os.path.abspath(archive)}:{filename.member_name}"
+    return os.path.abspath(filename)
+
+
+# 기록에 쓴 이름이 압축 파일 안의 파일이면 그 압축 파일 경로 (일반 파일이면 None)
+def _archive_of(key):
+    if os.path.exists(key):
+        return None
+    index = key.find(':')
+    while index != -1:
+        if os.path.isfile(key[:index]):
+            return key[:index]
+        index = key.find(':', index + 1)
+    return None
+
+
+class BatchJournal:
+    def __init__(self, paths, settings, cwebp=None, path=JOURNAL_FILE):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.settings = settings
+        self.cwebp = cwebp
+        self.path = path
+        self.states = {}  # 파일 -> [상태, 출력 파일]
+        # 출력 파일 -> 원본 (실패한 파일만 다시 변환할 때 이전 배치에서 변환된 파일의 출력, 덮어쓰지 않도록 미리 차지함)
+        self.reserved = {}
+        self.finished = False  # 배치가 끝까지 변환되었는지 여부
+        self._resumed = False
+        self._file = None
+        self._lock = threading.Lock()
+
+    # 마지막 배치 기록을 읽음 (기록이 없거나 읽을 수 없으면 None)
+    @classmethod
+    def load(cls, path=JOURNAL_FILE):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            header = json.loads(lines[0])
+        except (OSError, ValueError, IndexError) as e:
+            if os.path.exists(path):
+                print(f"배치 기록 로드 오류: {str(e)}")
+            return None
+        journal = cls(header.get("paths", []), header.get("settings", {}), header.get("cwebp"), path)
+        journal.reserved = header.get("reserved", {})
+        journal._resumed = True
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 기록하는 도중에 종료되어 잘린 줄
+                continue
+            event = record.get("event")
+            if event == "end":
+                journal.finished = True
+            elif event in (PENDING, IN_FLIGHT, DONE, FAILED):
+                state = journal.states.setdefault(record["file"], [PENDING, None])
+                state[0] = event
+                if record.get("output"):
+                    state[1] = record["output"]
+        return journal
+
+    # 이어서 변환할 배치가 남아 있는지 (끝나지 않은 배치)
+    @classmethod
+    def unfinished(cls, path=JOURNAL_FILE):
+        journal = cls.load(path)
+        return journal if journal is not None and not journal.finished else None
+
+    # 마지막 배치에서 실패한 파일만 다시 변환할 새 배치 (기록이 없거나 실패한 파일이 없으면 None)
+    # 압축 파일에서 꺼낸 파일이 실패했으면 압축 파일을 다시 탐색하되 그 안에서 이미 변환된 파일은 건너뜀
+    # 다시 탐색하지 않는 변환된 파일의 출력은 reserved 에 넣어서 이름이 같은 실패한 파일이 덮어쓰지 않게 함
+    # settings 를 주면 그 설정으로 (화면에서 설정을 바꾼 뒤 다시 변환), 없으면 마지막 배치의 설정으로 변환
+    @classmethod
+    def failed_batch(cls, settings=None, path=JOURNAL_FILE):
+        previous = cls.load(path)
+        if previous is None:
+            return None
+        paths = []
+        archives = set()
+        for key, (state, _) in previous.states.items():
+            if state != FAILED:
+                continue
+            archive = _archive_of(key)
+            if archive is None:
+                paths.append(key)
+            elif archive not in archives:
+                archives.add(archive)
+                paths.append(archive)
+        if not paths:
+            return None
+        settings = dict(previous.settings if settings is None else settings)
+        if archives:
+            settings["scan_archives"] = True
+        journal = cls(paths, settings, previous.cwebp, path)
+        journal.reserved = dict(previous.reserved)
+        for key, (state, output) in previous.states.items():
+            if state != DONE:
+                continue
+            if archives and _archive_of(key) in archives:
+                journal.states[key] = [DONE, output]
+            elif output:
+                journal.reserved[output] = key
+        return journal
+
+    def count(self, *states):
+        return sum(1 for state, _ in self.states.values() if state in states)
+
+    # 기록 시작 - 새 배치는 파일을 새로 만들고, 불러온 배치는 이어서 덧붙임
+    # 이어서 변환할 때는 변환 중에 멈춘 파일의 임시 출력 파일을 먼저 정리
+    def open(self):
+        if self._resumed:
+            self.cleanup()
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._write({"event": "resume", "time": time.time()})
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._write({"event": "batch", "time": time.time(), "paths": self.paths,
+                         "settings": self.settings, "cwebp": self.cwebp, "reserved": self.reserved})
+            # 실패한 파일만 다시 변환할 때 미리 끝난 것으로 표시한 파일
+            for key, (state, output) in list(self.states.items()):
+                self._write({"event": state, "file": key, "output": output})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, record):
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self._file.flush()
+            except (OSError, ValueError) as e:
+                print(f"배치 기록 저장 오류: {str(e)}")
+
+    def _set(self, filename, state, output=None):
+        key = journal_key(filename)
+        with self._lock:
+            self.states[key] = [state, output or self.states.get(key, [None, None])[1]]
+        record = {"event": state, "file": key}
+        if output:
+            record["output"] = output
+        self._write(record)
+
+    # 변환할 파일로 넘겨받음 (이전 실행에서 끝난 파일은 상태를 그대로 둠)
+    def pending(self, filename):
+        if not self.completed(filename):
+            self._set(filename, PENDING)
+
+    # 변환 시작 (출력 파일을 기록해 두고 이어서 변환할 때 이 파일의 임시 파일을 정리함)
+    def start(self, filename, output):
+        self._set(filename, IN_FLIGHT, output)
+
+    # 변환 결과 기록 (취소된 파일은 기록하지 않아서 이어서 변환할 때 다시 변환됨)
+    def record(self, result):
+        if result.cancelled or (result.skipped and self.completed(result.source)):
+            return
+        self._set(result.source, DONE if result.ok else FAILED)
+
+    # 이전 실행에서 이미 끝난 파일인지 (실패한 파일도 다시 변환하지 않음)
+    def completed(self, filename):
+        with self._lock:
+            state = self.states.get(journal_key(filename))
+        return state is not None and state[0] in (DONE, FAILED)
+
+    # 배치를 끝까지 변환함 - 이어서 변환할 것이 없다고 기록
+    def finish(self):
+        self.finished = True
+        self._write({"event": "end", "time": time.time()})
+
+    # 변환 중에 멈춘 파일의 임시 출력 파일 삭제 (출력 파일은 임시 파일에 쓴 뒤 이름을 바꾸므로
+    # 덜 쓰인 파일은 .tmp 로 끝나는 이름으로만 남음)
+    def cleanup(self):
+        for state, output in self.states.values():
+            if state != IN_FLIGHT or not output:
+                continue
+            stem = glob.escape(os.path.splitext(output)[0])
+            for pattern in (f"{stem}.*tmp", f"{stem}@*w.webp*.tmp"):
+                for temp_filename in glob.glob(pattern):
+                    try:
+                        os.remove(temp_filename)
+                    except OSError:
+                        pass
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# 변환 캐시 - 원본이 바뀌지 않았고 출력 파일이 그대로 있으면 다시 변환하지 않음
+
+# 캐시 파일 경로 (설정 파일과 같은 디렉토리에 저장)
+MANIFEST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversion_cache.json')
+
+# 캐시에 보관할 최대 파일 수 (오래 사용하지 않은 항목부터 삭제)
+DEFAULT_MAX_ENTRIES = 50000
+
+# 해시 계산 시 한 번에 읽을 크기
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+# 파일 내용을 조금씩 읽어 해시 계산 (파일 전체를 메모리에 올리지 않음)
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionManifest:
+    def __init__(self, path=MANIFEST_FILE, max_entries=DEFAULT_MAX_ENTRIES, use_hash=False):
+        self.path = path
+        self.max_entries = max_entries
+        self.use_hash = use_hash
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = OrderedDict(json.load(f))
+        except Exception as e:
+            print(f"변환 캐시 로드 오류: {str(e)}")
+            self._entries = OrderedDict()
+
+    # 임시 파일에 쓴 뒤 교체하여 저장 중 종료되어도 캐시가 깨지지 않게 함
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return True
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            entries = dict(self._entries)
+            self._dirty = False
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"변환 캐시 저장 오류: {str(e)}")
+            return False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    @staticmethod
+    def _key(source):
+        return os.path.normcase(os.path.abspath(source))
+
+    # 원본, 변환 옵션, 출력 파일이 모두 기록과 같으면 True
+    def is_up_to_date(self, source, output, params):
+        key = self._key(source)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry["params"] != params or entry["output"] != output:
+            return False
+
+        try:
+            source_stat = os.stat(source)
+            output_stat = os.stat(output)
+        except OSError:
+            return False
+
+        if output_stat.st_size != entry["output_size"] or output_stat.st_mtime_ns != entry["output_mtime_ns"]:
+            return False
+        if source_stat.st_size != entry["size"]:
+            return False
+        if source_stat.st_mtime_ns != entry["mtime_ns"]:
+            # 수정 시각만 바뀐 경우 (복사 등) 내용 해시가 같으면 유효한 것으로 봄
+            if not (self.use_hash and entry.get("hash") and file_hash(source) == entry["hash"]):
+                return False
+            with self._lock:
+                entry["mtime_ns"] = source_stat.st_mtime_ns
+                self._dirty = True
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return True
+
+    # 변환에 성공한 파일 기록
+    def record(self, source, output, params, content_hash=None):
+        try:
+            source_stat = os.stat(source)
+            output_stat = os.stat(output)
+        except OSError:
+            return
+        if content_hash is None and self.use_hash:
+            content_hash = file_hash(source)
+
+        entry = {
+            "size": source_stat.st_size,
+            "mtime_ns": source_stat.st_mtime_ns,
+            "hash": content_hash,
+            "params": params,
+            "output": output,
+            "output_size": output_stat.st_size,
+            "output_mtime_ns": output_stat.st_mtime_ns
+        }
+        key = self._key(source)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
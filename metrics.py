@@ -0,0 +1,107 @@
+# 화질 지표 - 원본과 변환 결과를 축소한 밝기(luma) 영상으로 비교
+# 픽셀마다 파이썬 반복문을 돌지 않고 NumPy 배열 연산으로 계산하므로 인코딩 시간에 비해 가벼움
+
+from probe import ORIENTATION_TRANSPOSE
+
+# NumPy 와 Pillow 는 선택 사항 (화질 기준 모드에서만 필요)
+np = None
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+    features = None
+
+# 사용할 수 있는 지표와 기본 기준값 (SSIM: 0~1, PSNR: dB)
+METRICS = ("ssim", "psnr")
+DEFAULT_FLOORS = {"ssim": 0.95, "psnr": 40.0}
+
+# 비교 전에 긴 변을 이 크기 이하로 축소
+METRIC_SIZE = 256
+
+# SSIM 창 크기와 안정화 상수 (픽셀 값 범위 255 기준)
+SSIM_WINDOW = 8
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+# 두 영상이 같을 때의 PSNR (무한대 대신 사용)
+MAX_PSNR = 100.0
+
+
+# NumPy 는 불러오는 데 오래 걸리므로 available() 를 처음 호출할 때 불러옴
+# (명령줄 모드에서 화질 기준 모드를 쓰지 않으면 불러오지 않음, 없으면 False)
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+# 화질 지표를 계산할 수 있는지 확인 (변환된 WEBP 를 읽으려면 Pillow 의 webp 지원도 필요)
+# 지표를 계산하는 함수는 이 함수로 NumPy 를 불러온 뒤에만 사용
+def available():
+    return Image is not None and features.check("webp") and _import_numpy()
+
+
+# 이미지를 축소한 밝기 영상으로 읽음 (shape 를 주면 그 크기로 맞춤, 움직이는 이미지는 첫 프레임)
+# 투명한 부분은 인코더가 색을 바꿀 수 있으므로 흰 배경에 합성한 뒤 비교
+# orientation 이 1 이 아니면 변환 결과처럼 EXIF 방향대로 세운 영상 (축소한 뒤에 회전)
+def load_luma(path, shape=None, orientation=1):
+    with Image.open(path) as image:
+        width, height = image.size
+        if shape is None:
+            scale = max(width, height) / METRIC_SIZE
+            size = (max(round(width / scale), 1), max(round(height / scale), 1)) if scale > 1 else (width, height)
+        else:
+            size = (shape[1], shape[0])
+        # JPEG 은 디코딩 단계에서 미리 축소 (전체 해상도로 디코딩하지 않음)
+        image.draft("RGB", size)
+        image = image.convert("RGBA")
+        if image.size != size:
+            image = image.resize(size, Image.BOX)
+    background = Image.new("RGBA", size, (255, 255, 255, 255))
+    luma = Image.alpha_composite(background, image).convert("L")
+    if orientation in ORIENTATION_TRANSPOSE:
+        luma = luma.transpose(ORIENTATION_TRANSPOSE[orientation])
+    return np.asarray(luma, dtype=np.float64)
+
+
+# 적분 영상(누적 합)으로 계산한 size x size 창의 평균 (창이 이미지 안에 완전히 들어가는 위치만)
+def _box_mean(values, size):
+    total = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    window_sum = total[size:, size:] - total[:-size, size:] - total[size:, :-size] + total[:-size, :-size]
+    return window_sum / (size * size)
+
+
+# 구조적 유사도 (1 이면 같은 영상)
+def ssim(reference, distorted):
+    size = min(SSIM_WINDOW, *reference.shape)
+    mean_ref = _box_mean(reference, size)
+    mean_dist = _box_mean(distorted, size)
+    var_ref = _box_mean(reference * reference, size) - mean_ref * mean_ref
+    var_dist = _box_mean(distorted * distorted, size) - mean_dist * mean_dist
+    covariance = _box_mean(reference * distorted, size) - mean_ref * mean_dist
+
+    numerator = (2 * mean_ref * mean_dist + SSIM_C1) * (2 * covariance + SSIM_C2)
+    denominator = (mean_ref * mean_ref + mean_dist * mean_dist + SSIM_C1) * (var_ref + var_dist + SSIM_C2)
+    return float(np.mean(numerator / denominator))
+
+
+# 최대 신호 대 잡음비 (dB, 클수록 원본에 가까움)
+def psnr(reference, distorted):
+    mse = float(np.mean((reference - distorted) ** 2))
+    if mse == 0:
+        return MAX_PSNR
+    return min(10 * np.log10(255 * 255 / mse), MAX_PSNR)
+
+
+# 원본 밝기 영상과 변환된 파일을 비교한 지표 값
+def score(reference, path, metric="ssim"):
+    distorted = load_luma(path, reference.shape)
+    if metric == "psnr":
+        return psnr(reference, distorted)
+    return ssim(reference, distorted)
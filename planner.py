@@ -0,0 +1,137 @@
+import os
+import platform
+
+# 출력 경로 계획 - 변환을 시작하기 전에 파일마다 출력 경로를 정하고 배치 안의 이름 충돌을 해결
+# a.png 와 a.jpg, 다른 폴더의 같은 이름 파일을 한 폴더에 저장하면 출력 이름이 같아져서 서로 덮어쓰므로
+# 이미 정한 출력 경로를 메모리에 기록해 두고 (작업 스레드에 넘기기 전에 한 스레드에서만 호출) 충돌 방식을 적용
+# 출력 폴더는 배치에서 처음 나올 때 한 번만 확인하고 만듦 (네트워크 드라이브에서 파일마다 os.makedirs 를 호출하면
+# 같은 폴더 몇 개에 대한 시스템 호출이 수만 번 반복됨), 만들지 못한 폴더도 폴더마다 한 번만 errors 에 기록
+
+# 출력 파일 이름이 같을 때 (suffix: 나중 파일 이름에 " (2)" 등을 붙임,
+# skip: 이미 있거나 배치 안에서 먼저 정해진 이름이면 건너뜀, newer: 기존 출력 파일보다 원본이 새로울 때만 덮어씀)
+COLLISION_POLICIES = ("suffix", "skip", "newer")
+
+# 출력 파일 이름 앞에 붙이는 말
+OUTPUT_PREFIX = '변환된_'
+
+
+# 설정에 따른 출력 폴더 (폴더를 만들지 않음)
+def output_directory(filename, save_location_type, save_location_path):
+    if save_location_type == "original":
+        # 원본 폴더에 저장
+        return os.path.dirname(filename)
+    if save_location_type == "subfolder":
+        # 원본 폴더의 하위 폴더에 저장
+        return os.path.join(os.path.dirname(filename), save_location_path)
+    if save_location_type == "custom":
+        # 사용자 지정 폴더에 저장
+        return save_location_path
+    # 기본값: 하위 폴더에 저장
+    return os.path.join(os.path.dirname(filename), "변환된 이미지")
+
+
+# 출력 파일 이름 (예: 사진.png -> 변환된_사진.webp)
+def output_name(filename):
+    return OUTPUT_PREFIX + os.path.splitext(os.path.basename(filename))[0] + '.webp'
+
+
+# 충돌 확인용 경로 (대소문자를 구분하지 않는 Windows, macOS 에서는 소문자로 비교)
+def _path_key(path):
+    key = os.path.normcase(os.path.abspath(path))
+    return key.lower() if platform.system() == "Darwin" else key
+
+
+# 계획한 출력 경로 (skip_reason 이 있으면 변환하지 않음)
+class PlannedOutput:
+    def __init__(self, folder, filename, skip_reason=""):
+        self.folder = folder
+        self.filename = filename
+        self.skip_reason = skip_reason
+
+
+class OutputPlanner:
+    def __init__(self, save_location_type="subfolder", save_location_path="변환된 이미지", policy="suffix"):
+        self.save_location_type = save_location_type
+        self.save_location_path = save_location_path
+        self.policy = policy if policy in COLLISION_POLICIES else "suffix"
+        self._claimed = {}  # 출력 경로 (target 을 적용한 실제 출력 파일) -> 그 경로로 정해진 원본
+        self._directories = {}  # 출력 폴더 -> 폴더를 만들 수 있었는지 여부
+        self.errors = []  # 만들지 못한 출력 폴더 (폴더, 오류) - 그 폴더로 갈 파일은 원본 폴더에 저장함
+
+    # 배치를 새로 시작할 때 호출 (이전 배치에서 정한 이름은 충돌로 보지 않고, 폴더가 그 사이에 지워졌을 수 있으므로 다시 확인)
+    def reset(self):
+        self._claimed.clear()
+        self._directories.clear()
+        self.errors = []
+
+    # 출력 폴더를 만들고 (폴더마다 한 번만) 실제로 사용할 폴더를 반환
+    def directory(self, filename):
+        directory = output_directory(filename, self.save_location_type, self.save_location_path)
+        created = self._directories.get(directory)
+        if created is None:
+            created = self._make_directory(directory)
+            self._directories[directory] = created
+        # 실패 시 원본 폴더에 저장
+        return directory if created else os.path.dirname(filename)
+
+    def _make_directory(self, directory):
+        if self.save_location_type == "original":
+            return True
+        try:
+            # 이미 있는 폴더는 stat 한 번으로 확인 (makedirs 는 mkdir 을 먼저 시도함)
+            if not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
+            return True
+        except OSError as e:
+            self.errors.append((directory, e.strerror or str(e)))
+            return False
+
+    # 이 배치에서 변환하지 않는 다른 원본이 이미 쓴 출력 경로를 미리 차지함 (reset() 뒤에 호출)
+    # 실패한 파일만 다시 변환할 때 이전 배치에서 변환된 파일의 출력을 덮어쓰지 않고 그때와 같은 이름을 정하도록 함
+    def reserve(self, filename, owner):
+        self._claimed.setdefault(_path_key(filename), owner)
+
+    # 원본 하나의 출력 경로를 정함 (origin 은 저장 위치 계산에 쓸 경로, source 는 실제로 읽을 원본 파일)
+    # target 은 출력 파일 이름을 실제로 만들 파일 경로로 바꾸는 함수 (크기 변형 모드의 목록 JSON 등)
+    def plan(self, origin, source=None, target=None):
+        source = origin if source is None else source
+        folder = self.directory(origin)
+        base, extension = os.path.splitext(output_name(origin))
+        filename = os.path.join(folder, base + extension)
+        owner = self._claimed.get(self._key(filename, target))
+
+        if owner is not None:
+            if self.policy != "suffix":
+                return PlannedOutput(folder, self._target(filename, target),
+                                     f"출력 파일 이름 충돌: {getattr(owner, 'display_name', owner)}")
+            number = 2
+            while self._key(filename, target) in self._claimed:
+                filename = os.path.join(folder, f"{base} ({number}){extension}")
+                number += 1
+
+        # 기존 출력 파일 때문에 건너뛰더라도 이름은 이 원본의 것으로 기록 (같은 이름의 다른 원본이 덮어쓰지 않도록)
+        filename = self._target(filename, target)
+        self._claimed[_path_key(filename)] = source
+        if self.policy == "skip" and os.path.exists(filename):
+            return PlannedOutput(folder, filename, "출력 파일이 이미 있음")
+        if self.policy == "newer" and not self._source_is_newer(source, filename):
+            return PlannedOutput(folder, filename, "출력 파일이 원본보다 최신")
+        return PlannedOutput(folder, filename)
+
+    @staticmethod
+    def _target(filename, target):
+        return filename if target is None else target(filename)
+
+    def _key(self, filename, target):
+        return _path_key(self._target(filename, target))
+
+    @staticmethod
+    def _source_is_newer(source, output):
+        try:
+            output_mtime = os.stat(output).st_mtime_ns
+        except OSError:
+            return True
+        try:
+            return os.stat(source).st_mtime_ns > output_mtime
+        except OSError:
+            return True
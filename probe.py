@@ -0,0 +1,366 @@
+# 이미지 헤더 분석 - 파일 전체를 디코딩하지 않고 필요한 부분만 읽음
+import os
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# JPEG 의 크기 정보가 들어있는 SOF 마커 (C4: 허프만 표, C8: 예약, CC: 산술 부호 표 제외)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# EXIF 방향 (Orientation 태그, 1: 그대로) 별로 똑바로 세우는 Pillow Image.transpose 방법 번호
+# (0: 좌우 뒤집기, 1: 상하 뒤집기, 2: 90도, 3: 180도, 4: 270도, 5: transpose, 6: transverse)
+ORIENTATION_TRANSPOSE = {2: 0, 3: 3, 4: 1, 5: 5, 6: 4, 7: 6, 8: 2}
+
+# EXIF Orientation 태그 번호
+EXIF_ORIENTATION = 0x0112
+
+JPEG_EXIF_HEADER = b'Exif\x00\x00'
+JPEG_ICC_HEADER = b'ICC_PROFILE\x00'
+XMP_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+PNG_XMP_KEYWORD = b'XML:com.adobe.xmp'
+
+# 잘린 파일인지 확인할 때 먼저 읽는 파일 끝부분 크기
+# 여기에 끝 표시가 없으면 (모션 포토처럼 끝 표시 뒤에 큰 데이터를 덧붙인 파일) 파일 구조를 따라가며 다시 확인
+TAIL_SIZE = 4096
+
+# JPEG 의 압축된 이미지 데이터를 훑을 때 한 번에 읽는 크기
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+
+# 헤더에서 읽은 이미지 정보 (error 가 있으면 변환할 수 없는 파일)
+class ImageInfo:
+    def __init__(self):
+        self.format = None  # 실제 형식 ("jpeg", "png", "gif", 확장자와 다를 수 있음)
+        self.width = 0
+        self.height = 0
+        self.frames = 1  # 프레임 수 (GIF 는 frame_limit 개까지만 셈, APNG 는 acTL 의 값)
+        self.alpha = False  # 투명한 부분이 있을 수 있는지 (PNG 알파 채널/tRNS, GIF 투명색)
+        self.orientation = 1  # EXIF 방향
+        self.icc = False  # ICC 색 프로필 포함 여부
+        self.exif = False
+        self.xmp = False
+        self.error = ""
+
+    @property
+    def ok(self):
+        return not self.error
+
+    @property
+    def size(self):
+        return (self.width, self.height) if self.width and self.height else None
+
+    # 움직이는 이미지 (GIF, APNG) 인지
+    @property
+    def animated(self):
+        return self.frames > 1
+
+    # 변환 비용 추정값 (화소 수 x 프레임 수)
+    @property
+    def cost(self):
+        return self.width * self.height * max(self.frames, 1)
+
+
+# 헤더만 읽어서 형식, 크기, 프레임 수, 투명도, EXIF 방향, 메타데이터 포함 여부를 확인
+# 앞부분의 헤더와 (check_truncation 이면) 끝부분 TAIL_SIZE 바이트만 읽고 이미지 데이터는 건너뜀
+# (끝부분에 끝 표시가 없는 파일만 구조를 따라가며 끝까지 확인)
+# 빈 파일, 이미지가 아닌 파일, 크기를 읽을 수 없거나 끝이 잘린 파일은 error 에 이유를 기록
+def probe_image(path, frame_limit=2, check_truncation=True):
+    info = ImageInfo()
+    try:
+        with open(path, 'rb') as f:
+            length = os.fstat(f.fileno()).st_size
+            if not length:
+                info.error = "빈 파일"
+                return info
+            header = f.read(8)
+            if header[:2] == b'\xff\xd8':
+                info.format = "jpeg"
+                f.seek(2)
+                _probe_jpeg(f, info)
+            elif header == PNG_SIGNATURE:
+                info.format = "png"
+                _probe_png(f, info)
+            elif header[:6] in (b'GIF87a', b'GIF89a'):
+                info.format = "gif"
+                f.seek(6)
+                _probe_gif(f, info, frame_limit)
+            else:
+                info.error = "이미지 파일이 아니거나 지원하지 않는 형식"
+                return info
+            if not info.error and not info.size:
+                info.error = "이미지 크기를 읽을 수 없음"
+            if not info.error and check_truncation and _truncated(f, info.format, length):
+                info.error = "파일 끝이 잘림"
+    except OSError as e:
+        info.error = e.strerror or str(e)
+    return info
+
+
+# GIF 프레임 수를 limit 개까지만 셈 (움직이는 GIF 인지 확인하는 용도, GIF 가 아니면 0)
+# 이미지 데이터는 읽지 않고 블록 크기만큼 건너뜀
+def gif_frame_count(path, limit=2):
+    info = probe_image(path, frame_limit=limit, check_truncation=False)
+    return info.frames if info.format == "gif" else 0
+
+
+# 프레임이 두 개 이상인 GIF 인지 확인
+def is_animated_gif(path):
+    return gif_frame_count(path, limit=2) > 1
+
+
+# 헤더만 읽어서 (너비, 높이)를 반환 (알 수 없으면 None)
+def image_size(path):
+    return probe_image(path, frame_limit=0, check_truncation=False).size
+
+
+# 90도 회전하는 방향이면 가로, 세로가 바뀜
+def oriented_size(size, orientation):
+    if size is not None and orientation in (5, 6, 7, 8):
+        return size[1], size[0]
+    return size
+
+
+# 파일 끝 표시 (JPEG: EOI 마커, PNG: IEND 청크, GIF: trailer) 에 닿기 전에 파일이 끝나면 잘린 파일
+# 대부분의 파일은 끝부분만 읽어서 확인하고, 끝부분에 없을 때만 처음부터 구조를 따라가며 끝 표시를 찾음
+def _truncated(f, kind, length):
+    f.seek(max(length - TAIL_SIZE, 0))
+    tail = f.read()
+    if kind == "jpeg":
+        return b'\xff\xd9' not in tail and not _jpeg_reaches_eoi(f)
+    if kind == "png":
+        return b'IEND' not in tail and not _png_reaches_iend(f)
+    if tail.rstrip(b'\x00').endswith(b'\x3b'):
+        return False
+    info = ImageInfo()
+    f.seek(6)
+    _probe_gif(f, info, length)
+    return bool(info.error)
+
+
+# JPEG 세그먼트와 압축된 이미지 데이터를 따라가며 EOI 마커에 닿는지 확인
+# (EXIF 썸네일 등 세그먼트 안에 있는 EOI 는 건너뛰므로 잘린 파일을 완전한 파일로 보지 않음)
+def _jpeg_reaches_eoi(f):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return False
+        while marker[1] == 0xFF:  # 채움 바이트
+            marker = marker[1:] + f.read(1)
+            if len(marker) < 2:
+                return False
+        if marker[1] == 0xD9:
+            return True
+        if marker[1] == 0x01 or 0xD0 <= marker[1] <= 0xD7:  # 길이가 없는 마커
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return False
+        f.seek(int.from_bytes(length, 'big') - 2, 1)
+        if marker[1] == 0xDA and not _skip_entropy_data(f):
+            return False
+
+
+# 압축된 이미지 데이터를 건너뛰고 다음 마커 위치로 이동 (마커 전에 파일이 끝나면 False)
+# 이미지 데이터 안의 0xFF 는 0xFF00 으로 저장되며 RST 마커 (0xFFD0~D7) 도 데이터의 일부로 봄
+def _skip_entropy_data(f):
+    while True:
+        start = f.tell()
+        chunk = f.read(SCAN_CHUNK_SIZE)
+        if len(chunk) < 2:
+            return False
+        index = chunk.find(b'\xff')
+        while index != -1 and index + 1 < len(chunk):
+            following = chunk[index + 1]
+            if following not in (0x00, 0xFF) and not 0xD0 <= following <= 0xD7:
+                f.seek(start + index)
+                return True
+            index = chunk.find(b'\xff', index + 1)
+        if index != -1:
+            # 읽은 부분의 마지막 바이트가 0xFF 이면 다음 바이트와 함께 다시 확인
+            f.seek(start + index)
+
+
+# PNG 청크를 따라가며 IEND 청크에 닿는지 확인 (청크 데이터는 읽지 않고 건너뜀)
+def _png_reaches_iend(f):
+    f.seek(len(PNG_SIGNATURE))
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return False
+        if chunk[4:8] == b'IEND':
+            return True
+        f.seek(int.from_bytes(chunk[:4], 'big') + 4, 1)
+
+
+# JPEG 마커를 따라가며 SOF 세그먼트의 크기와 그 앞의 APP 세그먼트 (APP1: EXIF, XMP, APP2: ICC) 를 읽음
+# 압축된 이미지 데이터(SOS) 는 읽지 않음
+def _probe_jpeg(f, info):
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            info.error = "JPEG 마커가 잘못됨"
+            return
+        while marker[1] == 0xFF:  # 채움 바이트
+            marker = marker[1:] + f.read(1)
+            if len(marker) < 2:
+                info.error = "JPEG 마커가 잘못됨"
+                return
+        if marker[1] in (0x01, 0xD8) or 0xD0 <= marker[1] <= 0xD7:  # 길이가 없는 마커
+            continue
+        length = f.read(2)
+        if len(length) < 2 or marker[1] in (0xDA, 0xD9):  # 이미지 데이터 시작 전에 SOF 가 없으면 실패
+            return
+        size = int.from_bytes(length, 'big') - 2
+        if marker[1] in JPEG_SOF_MARKERS:
+            segment = f.read(5)
+            if len(segment) == 5:
+                info.height = int.from_bytes(segment[1:3], 'big')
+                info.width = int.from_bytes(segment[3:5], 'big')
+            return
+        if marker[1] == 0xE1:
+            segment = f.read(size)
+            if segment.startswith(JPEG_EXIF_HEADER):
+                info.exif = True
+                info.orientation = _exif_orientation(segment[len(JPEG_EXIF_HEADER):])
+            elif segment.startswith(XMP_HEADER):
+                info.xmp = True
+        elif marker[1] == 0xE2:
+            segment = f.read(len(JPEG_ICC_HEADER))
+            info.icc = info.icc or segment == JPEG_ICC_HEADER
+            f.seek(size - len(segment), 1)
+        else:
+            f.seek(size, 1)
+
+
+# PNG 는 IHDR 과 IDAT 앞의 청크만 확인
+# (tRNS: 투명색, acTL: APNG 프레임 수, iCCP: ICC, eXIf: EXIF, iTXt XML:com.adobe.xmp: XMP)
+def _probe_png(f, info):
+    first = True
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            info.error = "이미지 데이터(IDAT) 가 없음"
+            return
+        size = int.from_bytes(chunk[:4], 'big')
+        kind = chunk[4:8]
+        if first:
+            first = False
+            if kind != b'IHDR' or size < 13:
+                info.error = "PNG 헤더(IHDR) 가 잘못됨"
+                return
+            header = f.read(size)
+            info.width = int.from_bytes(header[0:4], 'big')
+            info.height = int.from_bytes(header[4:8], 'big')
+            info.alpha = header[9] in (4, 6)  # 회색+알파, RGBA
+            f.seek(4, 1)  # CRC
+            continue
+        if kind == b'IDAT':
+            return
+        if kind == b'IEND':
+            info.error = "이미지 데이터(IDAT) 가 없음"
+            return
+        if kind in (b'eXIf', b'acTL'):
+            data = f.read(size)
+            if kind == b'eXIf':
+                info.exif = True
+                info.orientation = _exif_orientation(data)
+            else:
+                info.frames = max(int.from_bytes(data[:4], 'big'), 1)
+            f.seek(4, 1)  # CRC
+            continue
+        if kind == b'tRNS':
+            info.alpha = True
+        elif kind == b'iCCP':
+            info.icc = True
+        elif kind == b'iTXt':
+            keyword = f.read(min(size, len(PNG_XMP_KEYWORD) + 1))
+            info.xmp = info.xmp or keyword == PNG_XMP_KEYWORD + b'\x00'
+            f.seek(size - len(keyword) + 4, 1)
+            continue
+        f.seek(size + 4, 1)
+
+
+# GIF 는 논리 화면 크기를 읽고 프레임을 frame_limit 개까지 셈 (그래픽 제어 확장의 투명색 사용 여부도 확인)
+def _probe_gif(f, info, frame_limit):
+    header = f.read(7)
+    if len(header) < 7:
+        info.error = "GIF 헤더가 잘림"
+        return
+    info.width = int.from_bytes(header[0:2], 'little')
+    info.height = int.from_bytes(header[2:4], 'little')
+    if frame_limit <= 0:
+        return
+    flags = header[4]
+    if flags & 0x80:
+        # 전역 색상표 건너뜀
+        f.seek(3 * (2 << (flags & 0x07)), 1)
+
+    frames = 0
+    while frames < frame_limit:
+        block = f.read(1)
+        if block == b'\x3b':  # 파일 끝 (trailer)
+            break
+        if block == b'\x21':  # 확장 블록
+            label = f.read(1)
+            if label == b'\xf9':  # 그래픽 제어 확장 (투명색 플래그)
+                control = f.read(2)
+                info.alpha = info.alpha or (len(control) == 2 and bool(control[1] & 0x01))
+                f.seek(-2, 1)
+            if not _skip_sub_blocks(f):
+                info.error = "GIF 데이터가 잘림"
+                break
+        elif block == b'\x2c':  # 이미지 (프레임)
+            descriptor = f.read(9)
+            if len(descriptor) < 9:
+                info.error = "GIF 데이터가 잘림"
+                break
+            frames += 1
+            local_flags = descriptor[8]
+            if local_flags & 0x80:
+                f.seek(3 * (2 << (local_flags & 0x07)), 1)
+            f.read(1)  # LZW 최소 코드 크기
+            if not _skip_sub_blocks(f):
+                info.error = "GIF 데이터가 잘림"
+                break
+        elif not block:
+            info.error = "GIF 데이터가 잘림"
+            break
+        else:
+            info.error = "GIF 블록이 잘못됨"
+            break
+    info.frames = frames
+    if not frames and not info.error:
+        info.error = "GIF 에 프레임이 없음"
+
+
+# 하위 블록을 끝(크기 0 블록)까지 건너뜀 (끝에 닿기 전에 파일이 끝나면 False)
+def _skip_sub_blocks(f):
+    while True:
+        size = f.read(1)
+        if not size:
+            return False
+        if size == b'\x00':
+            return True
+        f.seek(size[0], 1)
+
+
+# TIFF 형식 EXIF 의 첫 번째 IFD 에서 Orientation 값을 읽음 (없거나 잘못된 값이면 1)
+def _exif_orientation(tiff):
+    if tiff[:2] == b'II':
+        order = 'little'
+    elif tiff[:2] == b'MM':
+        order = 'big'
+    else:
+        return 1
+    offset = int.from_bytes(tiff[4:8], order)
+    if offset + 2 > len(tiff):
+        return 1
+    count = int.from_bytes(tiff[offset:offset + 2], order)
+    for index in range(count):
+        entry = offset + 2 + index * 12
+        if entry + 12 > len(tiff):
+            break
+        if int.from_bytes(tiff[entry:entry + 2], order) == EXIF_ORIENTATION:
+            value = int.from_bytes(tiff[entry + 8:entry + 10], order)
+            return value if 1 <= value <= 8 else 1
+    return 1
@@ -0,0 +1,136 @@
+import time
+from dataclasses import dataclass
+
+# 진행 상황 - 끝난 파일의 원본 크기(바이트)로 진행률을 계산하고 남은 시간, 초당 이미지 수, 줄어든 용량을 구함
+# 파일 수로만 세면 작은 아이콘과 큰 파노라마가 섞인 배치에서 진행률이 실제로 남은 시간과 맞지 않음
+# 변환 순서를 정하느라 모든 파일의 헤더를 미리 읽은 경우에는 원본 크기 대신 헤더로 추정한 변환 비용
+# (화소 수 x 프레임 수) 으로 계산 (압축이 잘 된 큰 JPEG 과 압축이 안 된 작은 PNG 의 차이를 반영)
+
+# 화면 갱신 최소 간격 (초) - 파일이 수만 개여도 화면 갱신이 변환 시간을 잡아먹지 않도록 제한
+UPDATE_INTERVAL = 0.2
+
+# 남은 시간은 이 시간(초)이 지난 뒤부터 표시 (시작 직후의 들쭉날쭉한 속도로 계산하지 않음)
+MIN_ETA_ELAPSED = 1.0
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}시간 {seconds % 3600 // 60}분"
+    if seconds >= 60:
+        return f"{seconds // 60}분 {seconds % 60}초"
+    return f"{seconds}초"
+
+
+# 어느 한 시점의 진행 상황 (작업 스레드에서 만들어 GUI 로 넘김)
+@dataclass
+class ProgressSnapshot:
+    files: int = 0  # 끝난 파일 수
+    found: int = 0  # 지금까지 찾은 파일 수 (폴더 탐색이 끝나기 전에는 계속 늘어남)
+    total_files: int = 0  # 미리 센 전체 파일 수 (아직 모르면 0)
+    bytes_done: int = 0  # 끝난 파일의 원본 크기 합
+    total_bytes: int = 0  # 미리 센 전체 원본 크기 (아직 모르면 0)
+    cost_done: int = 0  # 끝난 파일의 변환 비용 합
+    total_cost: int = 0  # 전체 변환 비용 (헤더를 미리 읽지 않았으면 0)
+    bytes_in: int = 0  # 새로 변환한 파일의 원본 크기 합
+    bytes_out: int = 0  # 새로 변환한 파일의 출력 크기 합
+    elapsed: float = 0.0
+
+    # 0~1 진행률 (전체 크기를 아직 모르면 None)
+    @property
+    def fraction(self):
+        if self.total_cost:
+            return min(self.cost_done / self.total_cost, 1.0)
+        if self.total_bytes:
+            return min(self.bytes_done / self.total_bytes, 1.0)
+        if self.total_files:
+            return min(self.files / self.total_files, 1.0)
+        return None
+
+    # 초당 처리한 이미지 수
+    @property
+    def rate(self):
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    # 지금까지의 바이트 처리 속도로 계산한 남은 시간 (초, 계산할 수 없으면 None)
+    @property
+    def eta(self):
+        fraction = self.fraction
+        if not fraction or self.elapsed < MIN_ETA_ELAPSED:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+    # 원본 대비 줄어든 비율 (0~1)
+    @property
+    def saved(self):
+        return 1 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+
+    def text(self):
+        total = self.total_files or self.found
+        parts = [f"{self.files}/{total}개"]
+        fraction = self.fraction
+        if fraction is None:
+            parts.append("전체 크기 계산 중")
+        else:
+            parts.append(f"{fraction * 100:.0f}%")
+            if self.eta is not None:
+                parts.append(f"남은 시간 약 {format_duration(self.eta)}")
+        parts.append(f"{self.rate:.1f}개/초")
+        if self.bytes_in:
+            parts.append(f"{format_bytes(self.bytes_in)} → {format_bytes(self.bytes_out)} "
+                         f"({self.saved * 100:.0f}% 절약)")
+        return " · ".join(parts)
+
+
+# 변환 결과를 받을 때마다 누적하고, 화면을 갱신할 때가 되었는지 알려줌
+# 전체 파일 수와 크기는 walker.measure() 가 다른 스레드에서 세어 둔 값을 사용
+# engine 을 주면 변환 순서를 정하면서 구한 전체 변환 비용 (engine.scheduled_cost) 을 사용
+class ProgressTracker:
+    def __init__(self, walker, interval=UPDATE_INTERVAL, engine=None):
+        self.walker = walker
+        self.interval = interval
+        self.engine = engine
+        self.start = time.perf_counter()
+        self.files = 0
+        self.bytes_done = 0
+        self.cost_done = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._last_update = 0.0
+
+    # 결과 하나를 누적하고 마지막 갱신 후 interval 이 지났으면 True
+    def add(self, result):
+        self.files += 1
+        self.bytes_done += result.input_bytes
+        self.cost_done += result.cost
+        if result.ok and not result.skipped:
+            self.bytes_in += result.input_bytes
+            self.bytes_out += result.output_bytes
+        now = time.perf_counter()
+        if now - self._last_update < self.interval:
+            return False
+        self._last_update = now
+        return True
+
+    def snapshot(self):
+        walker = self.walker
+        snapshot = ProgressSnapshot(files=self.files, found=walker.found, bytes_done=self.bytes_done,
+                                    bytes_in=self.bytes_in, bytes_out=self.bytes_out,
+                                    elapsed=time.perf_counter() - self.start)
+        if self.engine is not None and self.engine.scheduled_cost:
+            snapshot.cost_done = self.cost_done
+            snapshot.total_cost = self.engine.scheduled_cost
+        if walker.measured:
+            snapshot.total_files = walker.total_files
+            snapshot.total_bytes = walker.total_bytes
+        elif walker.finished:
+            # 미리 세기 전에 탐색이 끝난 경우 - 파일 수로 진행률 계산
+            snapshot.total_files = walker.found
+        return snapshot
@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+import time
+
+from converter import source_name
+
+# 배치 보고서 - 파일마다 변환 결과(상태, 종료 코드, 오류 메시지, 걸린 시간, 원본/출력 크기)를 CSV 나 JSON 으로 저장
+# 화면에는 "총 N개 변환" 한 줄만 나오므로 실패한 파일과 이유를 나중에 확인하거나 다른 도구로 집계할 때 사용
+# JSON 에는 배치 요약과 인코더 호출마다의 기록(품질 탐색 시도 등)도 들어감
+
+# CSV 열 순서 (JSON 의 파일별 항목도 같은 이름 사용)
+REPORT_FIELDS = ("source", "status", "output", "returncode", "error", "duration", "input_bytes", "output_bytes",
+                 "quality", "attempts", "duplicate_of")
+
+# 파일별 상태
+STATUS_OK = "ok"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_REJECTED = "rejected"  # 헤더 검사에서 걸러져 인코더를 실행하지 않음
+STATUS_CANCELLED = "cancelled"
+
+
+def result_status(result):
+    if result.cancelled:
+        return STATUS_CANCELLED
+    if result.skipped:
+        return STATUS_SKIPPED
+    if result.rejected:
+        return STATUS_REJECTED
+    if not result.ok:
+        return STATUS_FAILED
+    return STATUS_OK
+
+
+# 실패한 결과 (헤더 검사에서 걸러진 파일 포함, 취소된 파일 제외)
+def failed_results(results):
+    return [result for result in results if result_status(result) in (STATUS_FAILED, STATUS_REJECTED)]
+
+
+# 결과 하나를 보고서 항목으로 (오류 메시지는 실패한 파일만 - 성공한 cwebp 의 통계 출력은 넣지 않음)
+def report_row(result):
+    status = result_status(result)
+    return {
+        "source": source_name(result.source),
+        "status": status,
+        "output": result.output if status == STATUS_OK else "",
+        "returncode": result.returncode,
+        "error": result.stderr.strip() if status in (STATUS_FAILED, STATUS_REJECTED) else result.skip_reason,
+        "duration": round(result.duration, 4),
+        "input_bytes": result.input_bytes,
+        "output_bytes": result.output_bytes,
+        "quality": result.quality,
+        "attempts": result.attempts,
+        "duplicate_of": source_name(result.duplicate_of) if result.duplicate_of else ""
+    }
+
+
+# 배치 요약 (상태별 파일 수, 전체 크기, 걸린 시간)
+def report_summary(results, elapsed=None):
+    counts = {status: 0 for status in (STATUS_OK, STATUS_SKIPPED, STATUS_FAILED, STATUS_REJECTED, STATUS_CANCELLED)}
+    for result in results:
+        counts[result_status(result)] += 1
+    converted = [result for result in results if result_status(result) == STATUS_OK]
+    summary = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "files": len(results),
+        **counts,
+        "input_bytes": sum(result.input_bytes for result in converted),
+        "output_bytes": sum(result.output_bytes for result in converted)
+    }
+    if elapsed is not None:
+        summary["elapsed"] = round(elapsed, 3)
+    return summary
+
+
+# 보고서 저장 (확장자가 .json 이면 JSON, 그 외에는 CSV), 저장하지 못하면 OSError
+# 임시 파일에 쓴 뒤 이름을 바꾸므로 중간에 종료되어도 덜 쓰인 보고서가 남지 않음
+def write_report(results, path, elapsed=None):
+    temp_filename = path + '.tmp'
+    try:
+        if os.path.splitext(path)[1].lower() == '.json':
+            files = []
+            for result in results:
+                row = report_row(result)
+                row["encodes"] = result.encodes
+                files.append(row)
+            with open(temp_filename, 'w', encoding='utf-8') as f:
+                json.dump({"summary": report_summary(results, elapsed), "files": files}, f,
+                          ensure_ascii=False, indent=4)
+        else:
+            # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+            with open(temp_filename, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                for result in results:
+                    writer.writerow(report_row(result))
+        os.replace(temp_filename, path)
+    except OSError:
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,46 @@
+import io
+import os
+
+import pytest
+
+from probe import probe_image
+
+Image = pytest.importorskip("PIL.Image")
+
+# 모션 포토 등에서 EOI 뒤에 덧붙이는 데이터 (끝부분 검사 범위보다 큼)
+TRAILER = os.urandom(20 * 1024)
+
+
+def image_bytes(format, size=(64, 48), **params):
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 64).convert("RGB").save(buffer, format, **params)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("format, params", [("JPEG", {}), ("JPEG", {"progressive": True}), ("PNG", {}), ("GIF", {})])
+def test_trailer_after_end_marker_is_accepted(tmp_path, format, params):
+    path = tmp_path / f"photo.{format.lower()}"
+    path.write_bytes(image_bytes(format, **params) + TRAILER)
+    info = probe_image(str(path))
+    assert info.ok, info.error
+    assert info.size == (64, 48)
+
+
+@pytest.mark.parametrize("format", ["JPEG", "PNG", "GIF"])
+def test_cut_file_is_truncated(tmp_path, format):
+    data = image_bytes(format)
+    path = tmp_path / f"cut.{format.lower()}"
+    path.write_bytes(data[:len(data) * 2 // 3])
+    assert not probe_image(str(path)).ok
+
+
+# EXIF 썸네일 안의 EOI 마커를 이미지 끝으로 보지 않음 (끝부분 검사 범위 밖에서 잘린 큰 사진)
+def test_cut_jpeg_with_thumbnail_is_truncated(tmp_path):
+    thumbnail = image_bytes("JPEG")
+    data = image_bytes("JPEG", size=(400, 300))
+    # APP1 세그먼트에 썸네일 JPEG 를 그대로 넣어 EOI 가 앞부분에 나오게 함
+    segment = b"Exif\x00\x00" + thumbnail
+    data = data[:2] + b"\xff\xe1" + (len(segment) + 2).to_bytes(2, "big") + segment + data[2:]
+    path = tmp_path / "cut.jpg"
+    path.write_bytes(data[:-len(data) // 3])
+    assert probe_image(str(path)).error == "파일 끝이 잘림"
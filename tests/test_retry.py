@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from converter import ConversionEngine
+from encoders import PillowEncoder
+from journal import BatchJournal
+from walker import FileWalker
+
+Image = pytest.importorskip("PIL.Image")
+
+pytestmark = pytest.mark.skipif(not PillowEncoder.available(), reason="Pillow 에 WebP 지원이 없음")
+
+
+def convert(journal):
+    engine = ConversionEngine.from_settings(journal.settings, journal=journal)
+    journal.open()
+    try:
+        with FileWalker.from_settings(journal.paths, journal.settings) as walker:
+            return {os.path.basename(result.source): result for result in engine.run(walker)}
+    finally:
+        journal.close()
+
+
+# a.png 와 a.jpg 는 출력 이름이 같아서 a.jpg 는 "변환된_a (2).webp" 로 정해짐
+# a.jpg 만 실패한 뒤 다시 변환해도 a.png 의 출력을 덮어쓰지 않고 처음과 같은 이름으로 저장해야 함
+def test_retry_keeps_collision_suffix(tmp_path):
+    Image.new("RGB", (16, 16), "red").save(tmp_path / "a.png")
+    (tmp_path / "a.jpg").write_bytes(b"\xff\xd8\xff")  # 잘린 JPEG - 헤더 검사에서 실패
+    settings = {"encoder": "pillow", "use_cache": False, "save_location_type": "custom",
+                "save_location_path": str(tmp_path / "out")}
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    results = convert(BatchJournal([str(tmp_path)], settings, path=journal_path))
+    png_output = str(tmp_path / "out" / "변환된_a.webp")
+    jpg_output = str(tmp_path / "out" / "변환된_a (2).webp")
+    assert results["a.png"].ok and results["a.png"].output == png_output
+    assert not results["a.jpg"].ok and results["a.jpg"].output == jpg_output
+    png_bytes = open(png_output, "rb").read()
+
+    Image.new("RGB", (16, 16), "blue").save(tmp_path / "a.jpg")
+    retry = BatchJournal.failed_batch(path=journal_path)
+    assert retry.paths == [str(tmp_path / "a.jpg")]
+    results = convert(retry)
+    assert list(results) == ["a.jpg"]
+    assert results["a.jpg"].ok and results["a.jpg"].output == jpg_output
+    assert open(png_output, "rb").read() == png_bytes
+
+    # 다시 변환하다 멈춘 배치를 이어서 변환할 때도 미리 차지한 출력 경로를 유지함
+    assert BatchJournal.load(journal_path).reserved == {png_output: str(tmp_path / "a.png")}
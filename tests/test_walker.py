@@ -0,0 +1,57 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from walker import FileWalker
+
+
+# 폴더 안에 이미지 하나와 이미지가 든 압축 파일 하나
+@pytest.fixture
+def folder(tmp_path):
+    (tmp_path / "photo.png").write_bytes(b"png")
+    with zipfile.ZipFile(tmp_path / "pack.zip", "w") as zf:
+        zf.writestr("inner/a.jpg", b"jpg")
+        zf.writestr("readme.txt", b"text")
+    return tmp_path
+
+
+# 드롭한 폴더 안의 압축 파일도 꺼내야 함 (심볼릭 링크를 따라가는 설정에서 일반 파일 분기가 압축 파일을 삼키던 문제)
+@pytest.mark.parametrize("follow_symlinks", [True, False])
+def test_archive_inside_folder_is_extracted(folder, follow_symlinks):
+    with FileWalker([str(folder)], follow_symlinks=follow_symlinks, archives=True) as walker:
+        files = list(walker)
+        names = sorted(getattr(f, "member_name", os.path.basename(f)) for f in files)
+        assert names == ["inner/a.jpg", "photo.png"]
+        assert walker.found == 2
+
+
+def test_archive_inside_folder_is_ignored_without_scan_archives(folder):
+    with FileWalker([str(folder)], follow_symlinks=True, archives=False) as walker:
+        assert [os.path.basename(f) for f in walker] == ["photo.png"]
+
+
+# 압축 파일에서 꺼낸 파일은 변환 결과를 받은 뒤 바로 삭제됨 (배치가 끝날 때까지 모아 두지 않음)
+def test_archive_members_are_removed_after_conversion(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    from converter import ConversionEngine
+    from encoders import PillowEncoder
+    if not PillowEncoder.available():
+        pytest.skip("Pillow 에 WebP 지원이 없음")
+
+    with zipfile.ZipFile(tmp_path / "pack.zip", "w") as zf:
+        for index in range(3):
+            buffer = io.BytesIO()
+            Image.new("RGB", (8, 8), (index * 80, 0, 0)).save(buffer, "PNG")
+            zf.writestr(f"img{index}.png", buffer.getvalue())
+    engine = ConversionEngine(encoder="pillow", workers=1, save_location_type="custom",
+                              save_location_path=str(tmp_path / "out"))
+    with FileWalker([str(tmp_path)], archives=True) as walker:
+        results = []
+        for result in engine.run(walker):
+            assert result.ok
+            assert not os.path.exists(result.source)
+            results.append(result)
+    assert len(results) == 3
+    assert len(os.listdir(tmp_path / "out")) == 3
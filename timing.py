@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+# 단계별 시간 측정 - 변환 과정의 각 단계(폴더 생성, 프로세스 실행, 인코딩 등)에 걸린 시간을 기록
+# 측정을 끄면 NULL_TRACER 를 사용하여 아무것도 기록하지 않음 (with 문 하나 정도의 비용)
+
+# 분포를 보여줄 구간 (초)
+HISTOGRAM_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0)
+
+# 보고서에 표시할 가장 오래 걸린 파일 수
+DEFAULT_SLOWEST = 10
+
+
+def _format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}초"
+
+
+# 측정 중인 구간 하나 (with 문으로 사용)
+class _Span:
+    __slots__ = ("tracer", "stage", "filename", "start")
+
+    def __init__(self, tracer, stage, filename):
+        self.tracer = tracer
+        self.stage = stage
+        self.filename = filename
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.add(self.stage, self.filename, self.start, time.perf_counter())
+
+
+# 아무것도 기록하지 않는 구간
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# 측정을 끈 경우 사용하는 기록기
+class NullTracer:
+    enabled = False
+
+    def span(self, stage, filename=None):
+        return _NULL_SPAN
+
+
+NULL_TRACER = NullTracer()
+
+
+class Tracer:
+    enabled = True
+
+    # trace_path 를 주면 finish() 에서 크롬 trace 파일로 저장
+    def __init__(self, trace_path=None):
+        self.trace_path = trace_path
+        self.start = time.perf_counter()
+        # (단계, 파일, 시작, 끝, 스레드) - list.append 는 여러 스레드에서 호출해도 안전함
+        self.events = []
+
+    def span(self, stage, filename=None):
+        return _Span(self, stage, filename)
+
+    def add(self, stage, filename, start, end):
+        self.events.append((stage, filename, start, end, threading.get_ident()))
+
+    # 기록을 비우고 새로 측정 시작 (폴더 감시처럼 계속 실행될 때 묶음마다 호출해서 기록이 쌓이지 않게 함)
+    # 작업 스레드가 모두 끝난 뒤에만 호출
+    def reset(self):
+        self.start = time.perf_counter()
+        self.events = []
+
+    # 단계별 (합계, 횟수, 최대) 시간
+    def stage_totals(self):
+        totals = {}
+        for stage, _, start, end, _ in self.events:
+            total, count, longest = totals.get(stage, (0.0, 0, 0.0))
+            totals[stage] = (total + end - start, count + 1, max(longest, end - start))
+        return totals
+
+    # 단계별 시간 분포 (HISTOGRAM_BUCKETS 구간별 횟수, 마지막은 그 이상)
+    def histograms(self):
+        histograms = defaultdict(lambda: [0] * (len(HISTOGRAM_BUCKETS) + 1))
+        for stage, _, start, end, _ in self.events:
+            duration = end - start
+            index = next((i for i, limit in enumerate(HISTOGRAM_BUCKETS) if duration < limit),
+                         len(HISTOGRAM_BUCKETS))
+            histograms[stage][index] += 1
+        return histograms
+
+    # 파일별 단계 시간을 합해서 오래 걸린 순서로 count 개
+    def slowest_files(self, count=DEFAULT_SLOWEST):
+        files = defaultdict(lambda: defaultdict(float))
+        for stage, filename, start, end, _ in self.events:
+            if filename is not None:
+                files[filename][stage] += end - start
+        ranked = sorted(files.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        return ranked[:count]
+
+    # 배치 하나의 측정 결과 (합계, 분포, 가장 오래 걸린 파일)
+    def report(self, slowest=DEFAULT_SLOWEST):
+        if not self.events:
+            return "측정된 단계가 없습니다."
+        elapsed = max(end for _, _, _, end, _ in self.events) - self.start
+        lines = [f"전체 {_format_seconds(elapsed)} (스레드별 단계 시간의 합은 전체 시간보다 클 수 있음)",
+                 "단계별 시간 (합계 / 횟수 / 평균 / 최대):"]
+        totals = self.stage_totals()
+        for stage, (total, count, longest) in sorted(totals.items(), key=lambda item: item[1][0], reverse=True):
+            lines.append(f"  {stage:<8} {_format_seconds(total):>10} {count:>6}회 "
+                         f"{_format_seconds(total / count):>10} {_format_seconds(longest):>10}")
+
+        labels = [f"<{_format_seconds(limit)}" for limit in HISTOGRAM_BUCKETS]
+        labels.append(f"≥{_format_seconds(HISTOGRAM_BUCKETS[-1])}")
+        lines.append("단계별 분포:")
+        for stage, counts in self.histograms().items():
+            buckets = " | ".join(f"{label} {count}" for label, count in zip(labels, counts))
+            lines.append(f"  {stage:<8} {buckets}")
+
+        lines.append(f"가장 오래 걸린 파일 {slowest}개:")
+        for filename, stages in self.slowest_files(slowest):
+            detail = ", ".join(f"{stage} {_format_seconds(seconds)}"
+                               for stage, seconds in sorted(stages.items(), key=lambda item: -item[1]))
+            name = getattr(filename, "display_name", filename)
+            lines.append(f"  {_format_seconds(sum(stages.values())):>10} {name} ({detail})")
+        return "\n".join(lines)
+
+    # 크롬 trace 형식 JSON 으로 저장 (chrome://tracing 또는 Perfetto 에서 열 수 있음)
+    def export_chrome_trace(self, path):
+        pid = os.getpid()
+        events = []
+        for stage, filename, start, end, thread in self.events:
+            event = {"name": stage, "cat": "convert", "ph": "X", "pid": pid, "tid": thread,
+                     "ts": round((start - self.start) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+            if filename is not None:
+                event["args"] = {"file": str(getattr(filename, "display_name", filename))}
+            events.append(event)
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"trace 저장 오류: {str(e)}")
+            return False
+
+    # 배치가 끝나면 보고서를 출력하고 trace 파일 저장
+    def finish(self, slowest=DEFAULT_SLOWEST):
+        print(self.report(slowest))
+        if self.trace_path and self.export_chrome_trace(self.trace_path):
+            print(f"trace 저장: {self.trace_path}")
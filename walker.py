@@ -0,0 +1,252 @@
+import fnmatch
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from converter import is_image_file
+
+# 파일 탐색기 - 드롭한 폴더와 압축 파일을 재귀적으로 훑으며 이미지 파일을 하나씩 넘겨줌
+# 전체 목록을 먼저 만들지 않으므로 탐색이 끝나기 전에 변환을 시작할 수 있음
+
+# 이미지 파일을 꺼내 변환할 수 있는 압축 파일 확장자
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# 압축 해제 시 한 번에 복사할 크기
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+# 쉼표로 구분된 패턴 문자열을 목록으로 변환 (설정 파일 저장 형식)
+def split_patterns(text):
+    if not text:
+        return []
+    return [pattern.strip() for pattern in text.split(',') if pattern.strip()]
+
+
+# 압축 파일 안의 이미지를 임시 폴더에 꺼낸 파일
+# 문자열(임시 파일 경로)로 그대로 쓸 수 있으며, origin 은 저장 위치 계산에 쓸 경로 (압축 파일 옆)
+class ArchiveMember(str):
+    def __new__(cls, path, archive, member_name):
+        member = super().__new__(cls, path)
+        member.archive = archive
+        member.member_name = member_name
+        member.origin = os.path.join(os.path.dirname(archive), os.path.basename(member_name))
+        return member
+
+    @property
+    def display_name(self):
+        return f"{self.archive}:{self.member_name}"
+
+    # 변환 결과를 기록한 뒤 꺼낸 임시 파일을 바로 삭제 (배치가 끝날 때까지 압축을 푼 전체 크기만큼 임시 공간을 쓰지 않도록)
+    # 이어서 변환할 때는 압축 파일에서 다시 꺼내므로 남겨 둘 필요가 없음
+    def release(self):
+        try:
+            os.remove(self)
+        except OSError:
+            pass
+
+
+class FileWalker:
+    def __init__(self, paths, include=None, exclude=None, follow_symlinks=True, archives=False):
+        self.paths = list(paths)
+        self.include = [pattern.lower() for pattern in include or []]
+        self.exclude = [pattern.lower() for pattern in exclude or []]
+        self.follow_symlinks = follow_symlinks
+        self.archives = archives
+
+        self.found = 0  # 지금까지 찾은 이미지 파일 수
+        self.finished = False  # 탐색이 끝났는지 여부
+        self.unsupported = []  # 직접 지정했지만 이미지가 아닌 파일
+        self.errors = []  # 읽지 못한 폴더나 압축 파일
+        # measure() 로 미리 센 전체 이미지 수와 바이트 수 (measured 가 True 가 된 뒤에만 사용)
+        self.total_files = 0
+        self.total_bytes = 0
+        self.measured = False
+        self._temp_dir = None
+
+    @classmethod
+    def from_settings(cls, paths, settings):
+        return cls(paths,
+                   include=split_patterns(settings.get("include_patterns", "")),
+                   exclude=split_patterns(settings.get("exclude_patterns", "")),
+                   follow_symlinks=settings.get("follow_symlinks", True),
+                   archives=settings.get("scan_archives", False))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+    # 압축 파일에서 꺼낸 임시 파일 삭제 (변환이 모두 끝난 뒤 호출, 결과를 받기 전에 멈춘 파일과 임시 폴더를 정리)
+    def cleanup(self):
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+
+    def __iter__(self):
+        visited = set()
+        try:
+            for path in self.paths:
+                if os.path.isdir(path):
+                    for entry_path, archive in self._walk(path, visited, self.errors):
+                        if archive:
+                            yield from self._extract(entry_path)
+                        else:
+                            self.found += 1
+                            yield entry_path
+                elif self.archives and is_archive(path):
+                    yield from self._extract(path)
+                elif is_image_file(path):
+                    # 직접 선택한 파일은 패턴과 관계없이 변환
+                    self.found += 1
+                    yield path
+                else:
+                    self.unsupported.append(path)
+        finally:
+            self.finished = True
+
+    # 변환할 이미지의 전체 수와 바이트 수를 미리 셈 (진행률과 남은 시간 계산용, 변환과 다른 스레드에서 실행)
+    # 파일을 꺼내지 않고 크기만 읽으며, 압축 파일은 목록에 적힌 원본 크기를 사용
+    # 변환 쪽 탐색이 먼저 끝나면 그 결과(found)가 정확하므로 중간에 멈춤
+    def measure(self):
+        visited = set()
+        count = 0
+        total = 0
+        for path in self.paths:
+            if os.path.isdir(path):
+                entries = self._walk(path, visited, [], verbose=False)
+            elif (self.archives and is_archive(path)) or is_image_file(path):
+                entries = [(path, not is_image_file(path))]
+            else:
+                continue
+            for entry_path, archive in entries:
+                if self.finished:
+                    return
+                sizes = self._member_sizes(entry_path) if archive else [self._file_size(entry_path)]
+                count += len(sizes)
+                total += sum(sizes)
+        self.total_files = count
+        self.total_bytes = total
+        self.measured = True
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    # 압축 파일 안에서 변환할 이미지들의 원본 크기
+    def _member_sizes(self, archive):
+        try:
+            if zipfile.is_zipfile(archive):
+                with zipfile.ZipFile(archive) as zf:
+                    return [info.file_size for info in zf.infolist()
+                            if not info.is_dir() and self.accepts(os.path.basename(info.filename), info.filename)]
+            with tarfile.open(archive, 'r:*') as tf:
+                return [member.size for member in tf
+                        if member.isfile() and self.accepts(os.path.basename(member.name), member.name)]
+        except (OSError, zipfile.BadZipFile, tarfile.TarError):
+            return []
+
+    # 폴더 안 파일 이름 (또는 상대 경로)이 패턴 중 하나와 일치하는지 확인
+    @staticmethod
+    def _matches(patterns, name, relative_path):
+        name = name.lower()
+        relative_path = relative_path.replace(os.sep, '/').lower()
+        return any(fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(relative_path, pattern)
+                   for pattern in patterns)
+
+    # 폴더 안 파일을 변환할지 (이미지 확장자, 포함/제외 패턴)
+    def accepts(self, name, relative_path):
+        if not is_image_file(name):
+            return False
+        if self.include and not self._matches(self.include, name, relative_path):
+            return False
+        return not self._matches(self.exclude, name, relative_path)
+
+    # 폴더 안 하위 폴더를 탐색할지 (제외 패턴)
+    def accepts_directory(self, name, relative_path):
+        return not self._matches(self.exclude, name, relative_path)
+
+    # os.scandir 로 폴더를 깊이 우선 탐색 (이미 방문한 폴더는 다시 들어가지 않아 심볼릭 링크 순환을 막음)
+    # (경로, 압축 파일 여부) 를 넘겨주고 읽지 못한 폴더나 파일은 errors 에 추가
+    def _walk(self, top, visited, errors, verbose=True):
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            try:
+                stat = os.stat(directory)
+            except OSError as e:
+                errors.append((directory, str(e)))
+                continue
+            key = (stat.st_dev, stat.st_ino)
+            if key in visited:
+                continue
+            visited.add(key)
+
+            subdirectories = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        relative_path = os.path.relpath(entry.path, top)
+                        try:
+                            if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                                if self.accepts_directory(entry.name, relative_path):
+                                    subdirectories.append(entry.path)
+                            elif not entry.is_file(follow_symlinks=self.follow_symlinks):
+                                continue
+                            elif self.accepts(entry.name, relative_path):
+                                yield entry.path, False
+                            elif self.archives and is_archive(entry.name):
+                                yield entry.path, True
+                        except OSError as e:
+                            errors.append((entry.path, str(e)))
+            except OSError as e:
+                errors.append((directory, str(e)))
+                if verbose:
+                    print(f"폴더 읽기 오류: {directory} ({e})")
+
+            # 이름순으로 처리되도록 역순으로 쌓음
+            stack.extend(sorted(subdirectories, reverse=True))
+
+    def _member_path(self, member_name):
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="imagetowebp-")
+        # 압축 파일 안의 경로는 사용하지 않고 번호와 파일 이름만 써서 폴더 밖으로 풀리지 않게 함
+        return os.path.join(self._temp_dir, f"{self.found}_{os.path.basename(member_name)}")
+
+    def _copy_member(self, archive, member_name, source):
+        path = self._member_path(member_name)
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(source, f, COPY_CHUNK_SIZE)
+        self.found += 1
+        return ArchiveMember(path, archive, member_name)
+
+    # 압축 파일 안의 이미지를 하나씩 임시 폴더에 꺼내서 넘겨줌
+    def _extract(self, archive):
+        try:
+            if zipfile.is_zipfile(archive):
+                with zipfile.ZipFile(archive) as zf:
+                    for info in zf.infolist():
+                        if info.is_dir() or not self.accepts(os.path.basename(info.filename), info.filename):
+                            continue
+                        with zf.open(info) as source:
+                            yield self._copy_member(archive, info.filename, source)
+            else:
+                with tarfile.open(archive, 'r:*') as tf:
+                    for member in tf:
+                        if not member.isfile() or not self.accepts(os.path.basename(member.name), member.name):
+                            continue
+                        source = tf.extractfile(member)
+                        if source is not None:
+                            yield self._copy_member(archive, member.name, source)
+        except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+            self.errors.append((archive, str(e)))
+            print(f"압축 파일 읽기 오류: {archive} ({e})")
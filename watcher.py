@@ -0,0 +1,292 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+
+from walker import FileWalker, split_patterns
+
+# 폴더 감시 - 감시 중인 폴더에 새로 생기거나 바뀐 이미지를 찾아서 변환할 묶음으로 넘겨줌
+# 리눅스에서는 inotify 로 변경 알림을 받고 (변경이 없으면 잠들어 있으므로 CPU 를 쓰지 않음),
+# 다른 OS 이거나 inotify 를 쓸 수 없으면 poll_interval 초마다 폴더를 훑어서 이전 상태와 비교
+# 아직 쓰는 중인 파일을 변환하지 않도록 크기와 수정 시각이 debounce 초 동안 바뀌지 않은 파일만 넘겨줌
+
+# 파일이 다 쓰였다고 볼 때까지 기다리는 시간 (초)
+DEFAULT_DEBOUNCE = 2.0
+
+# inotify 를 쓸 수 없을 때 폴더를 다시 훑는 간격 (초)
+DEFAULT_POLL_INTERVAL = 5.0
+
+# inotify 이벤트 (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# struct inotify_event (wd, mask, cookie, len) 뒤에 len 바이트의 파일 이름
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+# libc 의 inotify 함수 (리눅스가 아니거나 찾을 수 없으면 None)
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FolderWatcher:
+    def __init__(self, paths, include=None, exclude=None, follow_symlinks=True, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, polling=False, initial=True):
+        self.paths = [os.path.abspath(path) for path in paths]
+        # 파일/폴더 이름 필터는 폴더 탐색과 같은 규칙 사용 (이미지 확장자, 포함/제외 패턴)
+        self.filter = FileWalker(self.paths, include, exclude, follow_symlinks)
+        self.follow_symlinks = follow_symlinks
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.initial = initial  # 감시 시작 시 이미 있던 파일도 변환할지 여부
+        self.errors = []  # 읽지 못한 폴더
+
+        self.pending = {}  # 바뀐 파일 -> ((크기, 수정 시각), 마지막으로 바뀐 시각)
+        self.known = {}  # 변환하도록 넘겨준 (또는 시작 시 있던) 파일 -> (크기, 수정 시각)
+        self._stop_event = threading.Event()
+        self._wake_read, self._wake_write = os.pipe()
+        self._libc = None if polling else _load_inotify()
+        self._fd = None
+        self._watches = {}  # inotify watch 번호 -> (감시 폴더, 하위 폴더)
+        self._next_poll = 0.0
+        self._started = False
+
+    @classmethod
+    def from_settings(cls, paths, settings, **options):
+        return cls(paths,
+                   include=split_patterns(settings.get("include_patterns", "")),
+                   exclude=split_patterns(settings.get("exclude_patterns", "")),
+                   follow_symlinks=settings.get("follow_symlinks", True),
+                   **options)
+
+    # 사용 중인 감시 방식
+    @property
+    def backend(self):
+        return "inotify" if self._fd is not None else "polling"
+
+    # 다 쓰인 새 파일이나 바뀐 파일 목록을 계속 넘겨줌 (stop() 을 호출하면 끝남)
+    # 넘겨준 묶음을 변환하는 동안 생긴 변경은 inotify 나 다음 폴링에서 이어서 찾음
+    def batches(self):
+        try:
+            self.start()
+            while not self._stop_event.is_set():
+                ready = self._collect_ready()
+                if ready:
+                    yield ready
+                else:
+                    self._wait(self._next_timeout())
+        finally:
+            self.close()
+
+    # 감시 시작 (batches() 가 알아서 호출하지만 backend 를 먼저 알고 싶으면 직접 호출해도 됨)
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        if self._libc is not None and self._fd is None:
+            fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                print(f"inotify 를 사용할 수 없어 {self.poll_interval:g}초마다 폴더를 확인합니다. "
+                      f"({os.strerror(ctypes.get_errno())})")
+                self._libc = None
+            else:
+                self._fd = fd
+        for root in self.paths:
+            self._add_tree(root, root, self.initial)
+        self._next_poll = time.monotonic() + self.poll_interval
+
+    # 다른 스레드나 시그널 처리기에서 호출해도 안전함
+    def stop(self):
+        self._stop_event.set()
+        try:
+            os.write(self._wake_write, b'\0')
+        except OSError:
+            pass
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._watches.clear()
+        for fd in (self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._wake_read = self._wake_write = -1
+
+    # 변경이 생기거나 timeout 초가 지날 때까지 기다림 (None 이면 변경이 생길 때까지)
+    def _wait(self, timeout):
+        if self._fd is not None:
+            readable, _, _ = select.select([self._fd, self._wake_read], [], [], timeout)
+            if self._fd in readable:
+                self._read_events()
+            return
+
+        until_poll = max(self._next_poll - time.monotonic(), 0.0)
+        if self._stop_event.wait(until_poll if timeout is None else min(timeout, until_poll)):
+            return
+        if time.monotonic() >= self._next_poll:
+            self._poll()
+
+    # 기다리는 파일 중 가장 먼저 debounce 가 끝나는 시간 (기다리는 파일이 없으면 None)
+    def _next_timeout(self):
+        if not self.pending:
+            return None
+        first = min(since for _, since in self.pending.values())
+        return max(first + self.debounce - time.monotonic(), 0.0)
+
+    # 크기와 수정 시각이 debounce 초 동안 바뀌지 않은 파일을 꺼냄 (이미 넘겨준 상태 그대로면 제외)
+    def _collect_ready(self):
+        now = time.monotonic()
+        ready = []
+        for path, (signature, since) in list(self.pending.items()):
+            if now - since < self.debounce:
+                continue
+            current = self._signature(path)
+            if current is None:
+                del self.pending[path]
+            elif current != signature:
+                self.pending[path] = (current, now)
+            else:
+                del self.pending[path]
+                if self.known.get(path) != current:
+                    self.known[path] = current
+                    ready.append(path)
+        return sorted(ready)
+
+    @staticmethod
+    def _signature(path):
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        return info.st_size, info.st_mtime_ns
+
+    # 파일이 바뀌었다고 기록 (debounce 시간을 처음부터 다시 셈)
+    def _touch(self, path):
+        signature = self._signature(path)
+        if signature is not None:
+            self.pending[path] = (signature, time.monotonic())
+
+    # directory 와 그 하위 폴더를 훑어서 (종류, 경로) 를 넘겨줌 (종류: "dir" 또는 "file")
+    # 패턴은 감시 폴더(root) 기준 상대 경로로 비교
+    def _scan(self, root, directory):
+        visited = set()
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                info = os.stat(current)
+                if (info.st_dev, info.st_ino) in visited:
+                    continue
+                visited.add((info.st_dev, info.st_ino))
+                yield "dir", current
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        relative_path = os.path.relpath(entry.path, root)
+                        if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                            if self.filter.accepts_directory(entry.name, relative_path):
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=self.follow_symlinks) and \
+                                self.filter.accepts(entry.name, relative_path):
+                            yield "file", entry.path
+            except OSError as e:
+                self.errors.append((current, str(e)))
+
+    # 폴더를 감시 대상에 추가하고 안에 있는 이미지를 기록
+    # changed 가 False 이면 지금 상태를 이미 처리한 것으로 봄 (시작 시 기존 파일 건너뛰기)
+    def _add_tree(self, root, directory, changed):
+        for kind, path in self._scan(root, directory):
+            if kind == "dir":
+                self._add_watch(root, path)
+            elif changed:
+                self._touch(path)
+            else:
+                signature = self._signature(path)
+                if signature is not None:
+                    self.known[path] = signature
+
+    def _add_watch(self, root, directory):
+        if self._fd is None:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = (root, directory)
+            return
+        error = ctypes.get_errno()
+        if error in (errno.ENOSPC, errno.ENOMEM):
+            # 감시할 수 있는 폴더 수 한도 초과 (fs.inotify.max_user_watches) - 폴링으로 전환
+            print(f"inotify 감시 한도를 넘어 {self.poll_interval:g}초마다 폴더를 확인합니다.")
+            os.close(self._fd)
+            self._fd = None
+            self._watches.clear()
+        else:
+            self.errors.append((directory, os.strerror(error)))
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].split(b'\0', 1)[0]
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # 이벤트가 너무 많아 일부를 잃어버림 - 모든 감시 폴더를 다시 훑음 (이미 넘겨준 파일은 제외됨)
+                for root in self.paths:
+                    self._add_tree(root, root, True)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            watch = self._watches.get(wd)
+            if watch is None or not name or self._fd is None:
+                continue
+            root, directory = watch
+            path = os.path.join(directory, os.fsdecode(name))
+            relative_path = os.path.relpath(path, root)
+            if mask & IN_ISDIR:
+                # 새 폴더 (또는 옮겨 온 폴더) - 감시를 추가하고 이미 들어있는 파일도 변환
+                if mask & (IN_CREATE | IN_MOVED_TO) and \
+                        self.filter.accepts_directory(os.path.basename(path), relative_path):
+                    self._add_tree(root, path, True)
+            elif self.filter.accepts(os.path.basename(path), relative_path):
+                self._touch(path)
+
+    # 폴링 - 모든 감시 폴더를 훑어서 처음 보거나 크기/수정 시각이 바뀐 파일을 기록
+    def _poll(self):
+        self.errors = []
+        for root in self.paths:
+            for kind, path in self._scan(root, root):
+                if kind == "file" and path not in self.pending:
+                    signature = self._signature(path)
+                    if signature is not None and self.known.get(path) != signature:
+                        self.pending[path] = (signature, time.monotonic())
+        self._next_poll = time.monotonic() + self.poll_interval